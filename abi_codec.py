@@ -0,0 +1,523 @@
+"""
+Native ABI encoding and decoding for EAS schema payloads.
+
+Encoders and decoders are compiled once per type string and cached, so
+encoding an attestation payload is a handful of byte concatenations instead
+of a `cast abi-encode` subprocess.
+"""
+
+import json
+import struct
+from collections.abc import Mapping
+from functools import lru_cache
+from typing import Callable, List, Sequence, Tuple
+
+from eth_utils import keccak, to_checksum_address
+
+
+def split_types(type_list: str) -> List[str]:
+    """Split a comma separated type list, respecting nested tuples."""
+    types, depth, start = [], 0, 0
+    for i, ch in enumerate(type_list):
+        if ch == "(":
+            depth += 1
+        elif ch == ")":
+            depth -= 1
+        elif ch == "," and depth == 0:
+            types.append(type_list[start:i].strip())
+            start = i + 1
+    tail = type_list[start:].strip()
+    if tail:
+        types.append(tail)
+    return types
+
+
+def schema_fields(schema: str) -> List[Tuple[str, str]]:
+    """Parse an EAS schema string into (type, name) pairs."""
+    fields = []
+    for field in schema.split(","):
+        parts = field.strip().split()
+        fields.append((parts[0], parts[1] if len(parts) > 1 else ""))
+    return fields
+
+
+# --- encoders ----------------------------------------------------------------
+#
+# Every compiled encoder is a pair (is_dynamic, fn) where fn(value) -> bytes.
+# Static values encode to their in-place head; dynamic values encode to their
+# tail and are referenced by offset from the enclosing head.
+
+
+def _uint_encoder(bits: int):
+    limit = 1 << bits
+
+    def enc(value) -> bytes:
+        value = int(value)
+        if not 0 <= value < limit:
+            raise ValueError(f"Value {value} out of range for uint{bits}")
+        return value.to_bytes(32, "big")
+    return enc
+
+
+def _int_encoder(bits: int):
+    low, high = -(1 << (bits - 1)), 1 << (bits - 1)
+
+    def enc(value) -> bytes:
+        value = int(value)
+        if not low <= value < high:
+            raise ValueError(f"Value {value} out of range for int{bits}")
+        return value.to_bytes(32, "big", signed=True)
+    return enc
+
+
+def _encode_address(value) -> bytes:
+    if isinstance(value, (bytes, bytearray)):
+        raw = bytes(value)
+    else:
+        raw = bytes.fromhex(value[2:] if value.startswith("0x") else value)
+    if len(raw) != 20:
+        raise ValueError(f"Invalid address: {value}")
+    return b"\x00" * 12 + raw
+
+
+def _encode_bool(value) -> bytes:
+    return (b"\x00" * 31) + (b"\x01" if value else b"\x00")
+
+
+def _fixed_bytes_encoder(size: int):
+    def enc(value) -> bytes:
+        raw = bytes(value) if isinstance(value, (bytes, bytearray)) else bytes.fromhex(value[2:])
+        if len(raw) > size:
+            raise ValueError(f"Value too long for bytes{size}")
+        return raw.ljust(32, b"\x00")
+    return enc
+
+
+def _pad(raw: bytes) -> bytes:
+    return raw + b"\x00" * (-len(raw) % 32)
+
+
+def _encode_bytes(value) -> bytes:
+    if isinstance(value, str):
+        value = bytes.fromhex(value[2:] if value.startswith("0x") else value)
+    return len(value).to_bytes(32, "big") + _pad(bytes(value))
+
+
+def _encode_string(value) -> bytes:
+    raw = value.encode("utf-8")
+    return len(raw).to_bytes(32, "big") + _pad(raw)
+
+
+def _sequence_encoder(items: Sequence[Tuple[bool, Callable]]):
+    """Encode a fixed list of heterogeneous values (a tuple / argument list)."""
+    def enc(values) -> bytes:
+        if len(values) != len(items):
+            raise ValueError(f"Expected {len(items)} values, got {len(values)}")
+        # Static values (including static tuples wider than one word) sit in the head
+        encoded = [fn(value) for (_, fn), value in zip(items, values)]
+        offset = sum(32 if dynamic else len(e) for (dynamic, _), e in zip(items, encoded))
+        heads, tails = [], []
+        for (dynamic, _), e in zip(items, encoded):
+            if dynamic:
+                heads.append(offset.to_bytes(32, "big"))
+                tails.append(e)
+                offset += len(e)
+            else:
+                heads.append(e)
+        return b"".join(heads) + b"".join(tails)
+    return enc
+
+
+def _array_encoder(item: Tuple[bool, Callable]):
+    dynamic, fn = item
+
+    def enc(values) -> bytes:
+        length = len(values).to_bytes(32, "big")
+        if not dynamic:
+            return length + b"".join(fn(v) for v in values)
+        return length + _sequence_encoder([item] * len(values))(values)
+    return enc
+
+
+@lru_cache(maxsize=None)
+def compile_type(typ: str) -> Tuple[bool, Callable]:
+    """Compile an ABI type string into a cached (is_dynamic, encoder) pair."""
+    typ = typ.strip()
+    if typ.endswith("[]"):
+        return True, _array_encoder(compile_type(typ[:-2]))
+    if typ.startswith("(") and typ.endswith(")"):
+        items = [compile_type(t) for t in split_types(typ[1:-1])]
+        return any(d for d, _ in items), _sequence_encoder(items)
+    if typ == "string":
+        return True, _encode_string
+    if typ == "bytes":
+        return True, _encode_bytes
+    if typ == "address":
+        return False, _encode_address
+    if typ == "bool":
+        return False, _encode_bool
+    if typ.startswith("uint"):
+        return False, _uint_encoder(int(typ[4:] or 256))
+    if typ.startswith("int"):
+        return False, _int_encoder(int(typ[3:] or 256))
+    if typ.startswith("bytes"):
+        return False, _fixed_bytes_encoder(int(typ[5:]))
+    raise ValueError(f"Unsupported ABI type: {typ}")
+
+
+def encode(types: Sequence[str], values: Sequence) -> bytes:
+    """abi.encode(values) for the given list of types."""
+    return _sequence_encoder([compile_type(t) for t in types])(values)
+
+
+def function_selector(signature: str) -> bytes:
+    """4-byte selector for a function signature such as `attest((bytes32,...))`."""
+    return keccak(text=signature)[:4]
+
+
+def encode_call(signature: str, values: Sequence) -> bytes:
+    """Calldata for `signature` called with `values`."""
+    name, _, rest = signature.partition("(")
+    arg_types = split_types(rest[:rest.rindex(")")])
+    return function_selector(f"{name}({','.join(arg_types)})") + encode(arg_types, values)
+
+
+# --- decoders ----------------------------------------------------------------
+#
+# Every compiled decoder is a triple (is_dynamic, head_size, fn) where
+# fn(buf, pos) -> value reads the value whose encoding starts at POS.
+#
+# Payloads are untrusted (votes are never decoded onchain), so every offset
+# and length is checked against the buffer: malformed input raises ValueError
+# instead of decoding to empty or zero values.
+
+
+# A 32-byte word as four big-endian uint64s
+_WORD = struct.Struct(">4Q")
+
+
+def _need(buf, pos: int, size: int):
+    if pos + size > len(buf):
+        raise ValueError(f"ABI data too short: {size} bytes at offset {pos}, {len(buf)} available")
+
+
+def _read_word(buf, pos: int) -> int:
+    _need(buf, pos, 32)
+    return int.from_bytes(buf[pos:pos + 32], "big")
+
+
+def _uint_decoder(bits: int):
+    # Valid encodings are zero-padded, so only the low BITS need reading
+    start = 32 - bits // 8
+
+    def dec(buf, pos):
+        return int.from_bytes(buf[pos + start:pos + 32], "big")
+    return dec
+
+
+def _int_decoder(bits: int):
+    # ... and sign-extended
+    start = 32 - bits // 8
+
+    def dec(buf, pos):
+        return int.from_bytes(buf[pos + start:pos + 32], "big", signed=True)
+    return dec
+
+
+def _address_decoder(buf, pos):
+    return to_checksum_address(bytes(buf[pos + 12:pos + 32]))
+
+
+def _bool_decoder(buf, pos):
+    return buf[pos + 31] == 1
+
+
+def _fixed_bytes_decoder(size: int):
+    def dec(buf, pos):
+        return "0x" + bytes(buf[pos:pos + size]).hex()
+    return dec
+
+
+def _bytes_decoder(buf, pos):
+    length = _read_word(buf, pos)
+    _need(buf, pos + 32, length)
+    return bytes(buf[pos + 32:pos + 32 + length])
+
+
+def _string_decoder(buf, pos):
+    return _bytes_decoder(buf, pos).decode("utf-8", errors="replace")
+
+
+def _sequence_decoder(items: Sequence[Tuple[bool, int, Callable]]):
+    head_size = sum(size for _, size, _ in items)
+
+    def dec(buf, pos):
+        _need(buf, pos, head_size)
+        values, head = [], pos
+        for dynamic, size, fn in items:
+            if dynamic:
+                values.append(fn(buf, pos + _read_word(buf, head)))
+            else:
+                values.append(fn(buf, head))
+            head += size
+        return tuple(values)
+    dec.items = items
+    return dec
+
+
+def _array_decoder(item: Tuple[bool, int, Callable]):
+    dynamic, size, fn = item
+
+    def dec(buf, pos):
+        length = _read_word(buf, pos)
+        start = pos + 32
+        _need(buf, start, length * (32 if dynamic else size))     # before looping LENGTH times
+        if dynamic:
+            return [fn(buf, start + _read_word(buf, start + 32 * i)) for i in range(length)]
+        return [fn(buf, start + size * i) for i in range(length)]
+    dec.item = item
+    return dec
+
+
+@lru_cache(maxsize=None)
+def compile_decoder(typ: str) -> Tuple[bool, int, Callable]:
+    """Compile an ABI type string into a cached (is_dynamic, head_size, decoder) triple."""
+    typ = typ.strip()
+    if typ.endswith("[]"):
+        return True, 32, _array_decoder(compile_decoder(typ[:-2]))
+    if typ.startswith("(") and typ.endswith(")"):
+        items = [compile_decoder(t) for t in split_types(typ[1:-1])]
+        dynamic = any(d for d, _, _ in items)
+        return dynamic, 32 if dynamic else sum(size for _, size, _ in items), _sequence_decoder(items)
+    if typ == "string":
+        return True, 32, _string_decoder
+    if typ == "bytes":
+        return True, 32, _bytes_decoder
+    if typ == "address":
+        return False, 32, _address_decoder
+    if typ == "bool":
+        return False, 32, _bool_decoder
+    if typ.startswith("uint"):
+        return False, 32, _uint_decoder(int(typ[4:] or 256))
+    if typ.startswith("int"):
+        return False, 32, _int_decoder(int(typ[3:] or 256))
+    if typ.startswith("bytes"):
+        return False, 32, _fixed_bytes_decoder(int(typ[5:]))
+    raise ValueError(f"Unsupported ABI type: {typ}")
+
+
+def _checker(dynamic: bool, size: int, fn: Callable) -> Callable:
+    """fn(buf, pos) validating every offset and length of a value without decoding its contents."""
+    if fn is _bytes_decoder or fn is _string_decoder:
+        return lambda buf, pos: _need(buf, pos + 32, _read_word(buf, pos))
+    if not dynamic:
+        return lambda buf, pos: _need(buf, pos, size)
+    item = getattr(fn, "item", None)
+    if item is not None:                # T[]
+        check = _checker(*item)
+
+        def check_array(buf, pos):
+            length = _read_word(buf, pos)
+            start = pos + 32
+            _need(buf, start, length * (32 if item[0] else item[1]))
+            for i in range(length):
+                check(buf, start + (_read_word(buf, start + 32 * i) if item[0] else item[1] * i))
+        return check_array
+
+    items = [(d, s, _checker(d, s, f)) for d, s, f in fn.items]   # dynamic tuple
+
+    def check_tuple(buf, pos):
+        head = pos
+        for d, s, check in items:
+            check(buf, pos + _read_word(buf, head) if d else head)
+            head += s
+    return check_tuple
+
+
+def decode(types: Sequence[str], data) -> tuple:
+    """abi.decode(data, (types...)). Addresses come back checksummed, bytesN as 0x-hex."""
+    return _sequence_decoder([compile_decoder(t) for t in types])(memoryview(data), 0)
+
+
+# --- CLI argument coercion ---------------------------------------------------
+
+
+def _parse_bool(arg) -> bool:
+    if isinstance(arg, bool):
+        return arg
+    lowered = str(arg).strip().lower()
+    if lowered in ("true", "1"):
+        return True
+    if lowered in ("false", "0"):
+        return False
+    raise ValueError(f"Invalid bool: {arg}")
+
+
+def _parse_list(arg) -> list:
+    """Accept a JSON array or cast-style `[a,b,c]` for array arguments."""
+    if isinstance(arg, (list, tuple)):
+        return list(arg)
+    try:
+        parsed = json.loads(arg)
+        if isinstance(parsed, list):
+            return parsed
+    except ValueError:
+        pass
+    inner = arg.strip()
+    if not (inner.startswith("[") and inner.endswith("]")):
+        raise ValueError(f"Invalid array: {arg}")
+    inner = inner[1:-1].strip()
+    return [item.strip() for item in inner.split(",")] if inner else []
+
+
+def coerce_arg(typ: str, arg):
+    """Convert a CLI (string) argument into the Python value expected by `encode`."""
+    if typ.endswith("[]"):
+        return [coerce_arg(typ[:-2], item) for item in _parse_list(arg)]
+    if typ.startswith("uint") or typ.startswith("int"):
+        return arg if isinstance(arg, int) else int(str(arg), 0)
+    if typ == "bool":
+        return _parse_bool(arg)
+    if typ == "address":
+        return to_checksum_address(arg)
+    return arg
+
+
+class SchemaEncoder:
+    """Encoder for one EAS schema string, built once and reused."""
+
+    def __init__(self, schema: str):
+        self.schema = schema
+        self.fields = schema_fields(schema)
+        self.types = [typ for typ, _ in self.fields]
+        self.names = [name for _, name in self.fields]
+        self._encode = _sequence_encoder([compile_type(t) for t in self.types])
+
+    def coerce(self, args: Sequence) -> list:
+        return [coerce_arg(typ, arg) for typ, arg in zip(self.types, args)]
+
+    def encode(self, args: Sequence) -> bytes:
+        """Encode CLI-style arguments into the attestation `data` payload."""
+        if len(args) != len(self.types):
+            raise ValueError(f"Expected {len(self.types)} values for schema '{self.schema}', got {len(args)}")
+        return self._encode(self.coerce(args))
+
+
+@lru_cache(maxsize=None)
+def schema_encoder(schema: str) -> SchemaEncoder:
+    """Return the cached encoder for a schema string."""
+    return SchemaEncoder(schema)
+
+
+class LazyFields(Mapping):
+    """Read-only view of a decoded payload; each field is decoded on first access."""
+
+    __slots__ = ("_decoder", "_buf", "_values")
+
+    def __init__(self, decoder: "SchemaDecoder", data):
+        self._decoder = decoder
+        self._buf = memoryview(data)
+        self._values = {}
+
+    def __getitem__(self, name: str):
+        try:
+            return self._values[name]
+        except KeyError:
+            value = self._values[name] = self._decoder.field(self._buf, name)
+            return value
+
+    def __iter__(self):
+        return iter(self._decoder.names)
+
+    def __len__(self) -> int:
+        return len(self._decoder.names)
+
+    def __repr__(self) -> str:
+        return repr(dict(self))
+
+
+class SchemaDecoder:
+    """
+    Decoder for one EAS schema's `data` payload. Every field's head sits at a
+    fixed offset, so a single field (or a projection of a few) is read straight
+    from a memoryview without decoding the rest of the payload.
+    """
+
+    def __init__(self, schema: str):
+        self.schema = schema
+        self.fields = schema_fields(schema)
+        self.types = [typ for typ, _ in self.fields]
+        self.names = [name for _, name in self.fields]
+
+        self._layout = {}       # name -> (head offset, is_dynamic, fn)
+        self._blobs = []        # head offsets of string / bytes fields, checked inline
+        self._checks = []       # (head offset, checker) of the other dynamic fields
+        offset = 0
+        for typ, name in self.fields:
+            dynamic, size, fn = compile_decoder(typ)
+            self._layout[name] = (offset, dynamic, fn)
+            if fn is _string_decoder or fn is _bytes_decoder:
+                self._blobs.append(offset)
+            elif dynamic:
+                self._checks.append((offset, _checker(dynamic, size, fn)))
+            offset += size
+        self.head_size = offset
+        self._decode = _sequence_decoder([compile_decoder(t) for t in self.types])
+        self._projectors = {}
+
+    def field(self, data, name: str):
+        """Decode the single field NAME."""
+        offset, dynamic, fn = self._layout[name]
+        buf = data if isinstance(data, memoryview) else memoryview(data)
+        _need(buf, offset, 32)
+        return fn(buf, _read_word(buf, offset)) if dynamic else fn(buf, offset)
+
+    def projector(self, names: Sequence[str]) -> Callable:
+        """Compiled fn(data) -> tuple of just the NAMES fields, in that order."""
+        names = tuple(names)
+        project = self._projectors.get(names)
+        if project is None:
+            layout = [self._layout[name] for name in names]
+
+            def project(data):
+                buf = memoryview(data)
+                _need(buf, 0, self.head_size)
+                return tuple(fn(buf, _read_word(buf, offset)) if dynamic else fn(buf, offset)
+                             for offset, dynamic, fn in layout)
+            self._projectors[names] = project
+        return project
+
+    def project(self, data, names: Sequence[str]) -> dict:
+        return dict(zip(names, self.projector(names)(data)))
+
+    def view(self, data) -> LazyFields:
+        """
+        Lazy mapping over DATA. Raises ValueError if it is shorter than the
+        static head or any dynamic field's offset or length points outside it,
+        so later field reads cannot fail.
+        """
+        size = len(data)
+        if size < self.head_size:
+            raise ValueError(f"Payload of {size} bytes is shorter than the {self.head_size}-byte head of '{self.schema}'")
+        for head in self._blobs:
+            # Any set bit above the low 64 puts an offset or length out of range
+            a, b, c, pos = _WORD.unpack_from(data, head)
+            if a | b | c or pos + 32 > size:
+                raise ValueError(f"Offset of the field at {head} of '{self.schema}' is out of range")
+            a, b, c, length = _WORD.unpack_from(data, pos)
+            if a | b | c or pos + 32 + length > size:
+                raise ValueError(f"Length of the field at {head} of '{self.schema}' is out of range")
+        buf = memoryview(data)
+        for head, check in self._checks:
+            check(buf, _read_word(buf, head))
+        return LazyFields(self, data)
+
+    def decode(self, data) -> dict:
+        """Decode every field."""
+        return dict(zip(self.names, self._decode(memoryview(data), 0)))
+
+
+@lru_cache(maxsize=None)
+def schema_decoder(schema: str) -> SchemaDecoder:
+    """Return the cached decoder for a schema string."""
+    return SchemaDecoder(schema)
@@ -0,0 +1,237 @@
+"""
+Tally of ADVANCED_VOTE / DELEGATED_ADVANCED_VOTE ballots.
+
+The `choice` field is a JSON payload in one of three shapes:
+
+  {"approval": ["A", "C"]}            approve any number of options
+  {"weights": {"A": 3, "B": 1}}       split one vote across options
+  {"ranking": ["C", "A", "B"]}        ranked choice, counted by instant runoff
+
+A proposal's method and option list may be fixed in its CREATE_PROPOSAL
+`kwargs` (`{"voting": "ranked", "options": ["A", "B", "C"]}`); otherwise the
+first valid ballot sets the method and options are interned as they appear.
+Ballots are parsed once, as they arrive, into flat integer arrays (option ids
+plus offsets); results and IRV rounds are computed on NumPy arrays. Ballots
+that do not parse or do not fit the proposal are quarantined, not fatal.
+
+Vote validity (window, one vote per voter, eligibility) is decided by
+`tally.SimpleVoteTally`, which hands accepted ballots to this tally.
+"""
+
+import math
+from array import array
+from typing import Dict, List, Optional
+
+import numpy as np
+
+import safe_json
+
+
+APPROVAL, WEIGHTED, RANKED = "approval", "weighted", "ranked"
+
+# Payload key -> method
+PAYLOAD_KEYS = {"approval": APPROVAL, "weights": WEIGHTED, "ranking": RANKED}
+
+# Largest accepted weight; keeps sums exact in a float64
+MAX_WEIGHT = 2 ** 53
+
+# Valid ballots nest two deep; deeper JSON is refused before it is parsed
+MAX_DEPTH = 4
+
+
+class BallotError(ValueError):
+    pass
+
+
+class ProposalBallots:
+    """Ballots of one proposal: option ids, per-option weights and ballot offsets, flat."""
+
+    def __init__(self, method: Optional[str] = None, options: Optional[List[str]] = None):
+        self.method = method
+        self.fixed = options is not None
+        self.names: List[str] = list(options or [])
+        self.options: Dict[str, int] = {name: i for i, name in enumerate(self.names)}
+        self.ids = array("i")
+        self.weights = array("d")
+        self.offsets = array("q", [0])
+        self.live = bytearray()             # 0 once a ballot is retracted
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def _option(self, name) -> int:
+        name = str(name)
+        option = self.options.get(name)
+        if option is None:
+            if self.fixed:
+                raise BallotError(f"Unknown option: {name}")
+            option = self.options[name] = len(self.names)
+            self.names.append(name)
+        return option
+
+    def add(self, choice: str) -> int:
+        """Parse and append one ballot; returns its index. Raises BallotError."""
+        try:
+            payload = safe_json.loads(choice, MAX_DEPTH)
+        except (TypeError, ValueError) as e:
+            raise BallotError(f"Invalid JSON: {e}")
+        if not isinstance(payload, dict) or len(payload) != 1 or next(iter(payload)) not in PAYLOAD_KEYS:
+            raise BallotError(f"Expected one of {sorted(PAYLOAD_KEYS)} as the only key")
+        key, value = next(iter(payload.items()))
+        method = PAYLOAD_KEYS[key]
+        if self.method is not None and method != self.method:
+            raise BallotError(f"{method} ballot on a {self.method} proposal")
+
+        if method == WEIGHTED:
+            if not isinstance(value, dict) or not value:
+                raise BallotError("weights must be a non-empty object")
+            items = list(value.items())
+            weights = [w for _, w in items]
+            if not all(isinstance(w, (int, float)) and not isinstance(w, bool) and 0 <= w <= MAX_WEIGHT
+                       and math.isfinite(w) for w in weights):
+                raise BallotError(f"weights must be finite numbers between 0 and {MAX_WEIGHT}")
+            total = float(sum(weights))
+            if total <= 0:
+                raise BallotError("weights sum to zero")
+            names, weights = [n for n, _ in items], [w / total for w in weights]
+        else:
+            if not isinstance(value, list) or not value or not all(isinstance(n, (str, int)) for n in value):
+                raise BallotError(f"{key} must be a non-empty list of options")
+            if len(set(map(str, value))) != len(value):
+                raise BallotError(f"{key} lists an option twice")
+            names, weights = value, [1.0] * len(value)
+
+        ids = [self._option(name) for name in names]       # may raise before anything is appended
+        self.method = method
+        self.ids.extend(ids)
+        self.weights.extend(weights)
+        self.offsets.append(len(self.ids))
+        self.live.append(1)
+        return len(self) - 1
+
+    def _arrays(self):
+        ids = np.frombuffer(self.ids, dtype=np.int32) if len(self.ids) else np.zeros(0, dtype=np.int32)
+        weights = np.frombuffer(self.weights, dtype=np.float64) if len(self.weights) else np.zeros(0)
+        offsets = np.frombuffer(self.offsets, dtype=np.int64)
+        lengths = np.diff(offsets)
+        live = np.repeat(np.frombuffer(bytes(self.live), dtype=np.uint8).astype(bool), lengths)
+        return ids, weights, offsets, lengths, live
+
+    def totals(self) -> np.ndarray:
+        """Approvals (approval) or summed weights (weighted) per option."""
+        ids, weights, _, _, live = self._arrays()
+        return np.bincount(ids[live], weights=weights[live], minlength=len(self.names))
+
+    def ranking_matrix(self) -> np.ndarray:
+        """Live ranked ballots as an (n, max_rank) int32 matrix padded with -1."""
+        ids, _, offsets, lengths, _ = self._arrays()
+        keep = np.frombuffer(bytes(self.live), dtype=np.uint8).astype(bool)
+        lengths, starts = lengths[keep], offsets[:-1][keep]
+        matrix = np.full((len(lengths), int(lengths.max()) if len(lengths) else 0), -1, dtype=np.int32)
+        if len(lengths):
+            rows = np.repeat(np.arange(len(lengths)), lengths)
+            ranks = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+            matrix[rows, ranks] = ids[np.repeat(starts, lengths) + ranks]
+        return matrix
+
+
+def instant_runoff(matrix: np.ndarray, n_options: int) -> dict:
+    """
+    IRV over an (n, max_rank) ballot matrix (-1 padded). Each round counts
+    every ballot for its highest-ranked remaining option; an option with a
+    majority of the non-exhausted ballots wins, otherwise the options tied
+    for fewest votes are eliminated (all remaining tied: no winner).
+    """
+    if not len(matrix):
+        return {"rounds": [], "winner": None}
+    eliminated = np.zeros(n_options + 1, dtype=bool)    # last slot: the -1 padding
+    eliminated[-1] = True
+    rounds = []
+    rows = np.arange(len(matrix))
+    while True:
+        usable = ~eliminated[matrix]
+        has = usable.any(axis=1)
+        top = matrix[rows, usable.argmax(axis=1)][has]
+        counts = np.bincount(top, minlength=n_options)
+        active = int(has.sum())
+        rounds.append((counts, int(len(matrix) - active)))
+
+        remaining = np.flatnonzero(~eliminated[:-1])
+        if not len(remaining) or not active:
+            return {"rounds": rounds, "winner": None}
+        leader = remaining[np.argmax(counts[remaining])]
+        if counts[leader] * 2 > active or len(remaining) == 1:
+            return {"rounds": rounds, "winner": int(leader)}
+        lowest = counts[remaining].min()
+        losers = remaining[counts[remaining] == lowest]
+        if len(losers) == len(remaining):
+            return {"rounds": rounds, "winner": None}
+        eliminated[losers] = True
+
+
+class AdvancedVoteTally:
+    """Approval, weighted and ranked-choice results per proposal."""
+
+    def __init__(self):
+        self.ballots: Dict[str, ProposalBallots] = {}
+        self.quarantine: List[dict] = []                    # {"uid", "proposal_id", "error"}
+        self._where: Dict[str, tuple] = {}                  # vote uid -> (proposal id, ballot index)
+
+    def configure(self, proposal_id: str, kwargs: Optional[str]):
+        """Take the method / options from a CREATE_PROPOSAL `kwargs` JSON string, if it sets them."""
+        try:
+            config = safe_json.loads(kwargs, MAX_DEPTH) if kwargs else {}
+        except ValueError:
+            config = {}
+        if not isinstance(config, dict):
+            config = {}
+        method = config.get("voting")
+        options = config.get("options")
+        if method not in (APPROVAL, WEIGHTED, RANKED):
+            method = None
+        if not (isinstance(options, list) and options and all(isinstance(o, (str, int)) for o in options)):
+            options = None
+        if method or options:
+            self.ballots[proposal_id] = ProposalBallots(method, [str(o) for o in options] if options else None)
+
+    def add(self, proposal_id: str, uid: str, choice: str) -> bool:
+        """Record one accepted ballot; returns False (and quarantines it) if it is malformed."""
+        ballots = self.ballots.get(proposal_id)
+        if ballots is None:
+            ballots = self.ballots[proposal_id] = ProposalBallots()
+        try:
+            index = ballots.add(choice)
+        except BallotError as e:
+            self.quarantine.append({"uid": uid, "proposal_id": proposal_id, "error": str(e)})
+            return False
+        self._where[uid] = (proposal_id, index)
+        return True
+
+    def retract(self, uid: str) -> bool:
+        where = self._where.pop(uid, None)
+        if where is None:
+            return False
+        proposal_id, index = where
+        self.ballots[proposal_id].live[index] = 0
+        return True
+
+    def result(self, proposal_id: str) -> Optional[dict]:
+        ballots = self.ballots.get(proposal_id)
+        if ballots is None or ballots.method is None:
+            return None
+        names = ballots.names
+        result = {"method": ballots.method, "ballots": sum(ballots.live),
+                  "quarantined": sum(1 for q in self.quarantine if q["proposal_id"] == proposal_id)}
+        if ballots.method == RANKED:
+            runoff = instant_runoff(ballots.ranking_matrix(), len(names))
+            result["rounds"] = [{"counts": {names[i]: int(c) for i, c in enumerate(counts) if c},
+                                 "exhausted": exhausted} for counts, exhausted in runoff["rounds"]]
+            result["winner"] = names[runoff["winner"]] if runoff["winner"] is not None else None
+        else:
+            totals = ballots.totals()
+            cast = totals if ballots.method == WEIGHTED else totals.astype(np.int64)
+            result["totals"] = {name: (round(float(v), 6) if ballots.method == WEIGHTED else int(v))
+                                for name, v in zip(names, cast)}
+            best = np.flatnonzero(totals == totals.max()) if len(totals) and totals.max() > 0 else []
+            result["winner"] = names[best[0]] if len(best) == 1 else None
+        return result
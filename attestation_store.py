@@ -0,0 +1,410 @@
+"""
+Column-oriented in-memory store for indexed attestations.
+
+One table per schema, each column a growable NumPy array: UIDs as fixed
+32-byte values, addresses and refUIDs interned to uint32 ids, numeric schema
+fields in their own dtype (int8 `choice`, uint64 `startts` / `endts`, ...),
+and strings as offsets into one byte buffer. A vote costs ~100 bytes instead
+of a dict of Python objects.
+
+Lookups by uid, refUID, recipient (dao_id) and attester use sorted
+permutations of the key column (searchsorted, no key copies) plus a short
+unsorted tail of recent appends, so appends stay O(1) and lookups stay
+sub-millisecond. The store is an indexer sink: pass it to `Indexer.run`.
+"""
+
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from abi_codec import schema_fields
+from indexer import Sink
+
+
+ZERO_UID = "0x" + "00" * 32
+
+# Unsealed UIDs remembered for duplicate checks before by_uid is resealed
+RECENT_LIMIT = 1 << 20
+
+# Static ABI types held in a typed array; everything else gets a string or object column
+NUMERIC_DTYPES = {"uint8": np.uint8, "uint16": np.uint16, "uint32": np.uint32, "uint64": np.uint64,
+                  "int8": np.int8, "int16": np.int16, "int32": np.int32, "int64": np.int64, "bool": np.bool_}
+
+
+def _uid_bytes(uid: str) -> bytes:
+    return bytes.fromhex(uid[2:])
+
+
+def _uid_hex(raw: bytes) -> str:
+    return "0x" + bytes(raw).ljust(32, b"\0").hex()      # numpy drops trailing NULs from S32
+
+
+class Column:
+    """Growable typed array."""
+
+    def __init__(self, dtype, capacity: int = 1024, data: Optional[np.ndarray] = None):
+        self.data = np.zeros(capacity, dtype=dtype) if data is None else data
+        self.size = 0 if data is None else len(data)
+
+    def append(self, value):
+        if self.size == len(self.data):
+            # Also moves a memory-mapped snapshot column into memory on its first append
+            self.data = np.concatenate([self.data[:self.size], np.zeros(max(self.size, 1024), dtype=self.data.dtype)])
+        self.data[self.size] = value
+        self.size += 1
+
+    def values(self) -> np.ndarray:
+        return self.data[:self.size]
+
+    def __getitem__(self, i):
+        return self.data[i]
+
+    def __setitem__(self, i, value):
+        self.data[i] = value
+
+    @property
+    def nbytes(self) -> int:
+        return self.data.nbytes
+
+
+class StringColumn:
+    """UTF-8 strings packed end to end in one buffer, with uint64 offsets."""
+
+    def __init__(self, capacity: int = 1024, offsets: Optional[np.ndarray] = None, buffer: bytes = b""):
+        if offsets is None:
+            self.offsets = Column(np.uint64, capacity + 1)
+            self.offsets.append(0)
+        else:
+            self.offsets = Column(np.uint64, data=offsets)
+        self.buffer = bytearray(buffer)
+
+    def append(self, value: str):
+        self.buffer += value.encode("utf-8")
+        self.offsets.append(len(self.buffer))
+
+    def __getitem__(self, i: int) -> str:
+        return self.buffer[int(self.offsets[i]):int(self.offsets[i + 1])].decode("utf-8", errors="replace")
+
+    @property
+    def size(self) -> int:
+        return self.offsets.size - 1
+
+    @property
+    def nbytes(self) -> int:
+        return self.offsets.nbytes + len(self.buffer)
+
+
+class ObjectColumn:
+    """Fallback for rare wide types (uint256, string[]): a plain list."""
+
+    def __init__(self, data: Optional[list] = None):
+        self.data = data if data is not None else []
+
+    def append(self, value):
+        self.data.append(value)
+
+    def __getitem__(self, i: int):
+        return self.data[i]
+
+    @property
+    def size(self) -> int:
+        return len(self.data)
+
+    @property
+    def nbytes(self) -> int:
+        return 8 * len(self.data)
+
+
+class Interner:
+    """Value <-> dense uint32 id."""
+
+    def __init__(self, values: Sequence = ()):
+        self.values: List[object] = list(values)
+        self.ids: Dict[object, int] = {value: i for i, value in enumerate(self.values)}
+
+    def intern(self, value) -> int:
+        i = self.ids.get(value)
+        if i is None:
+            i = self.ids[value] = len(self.values)
+            self.values.append(value)
+        return i
+
+    def get(self, value) -> Optional[int]:
+        return self.ids.get(value)
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+
+class KeyIndex:
+    """
+    Rows of COLUMN grouped by key: a stable argsort of the sealed prefix,
+    searched with `sorter=` so keys are never copied, plus a linear scan of
+    the rows appended since. The index reseals on lookup once the tail
+    outgrows TAIL_LIMIT, so bulk appends never pay for sorting.
+    """
+
+    def __init__(self, column: Column, tail_limit: int = 65536):
+        self.column = column
+        self.tail_limit = tail_limit
+        self.order = np.zeros(0, dtype=np.uint32)
+        self.sealed = 0
+
+    def seal(self):
+        self.sealed = self.column.size
+        self.order = np.argsort(self.column.values(), kind="stable").astype(np.uint32)
+
+    def rows(self, key) -> np.ndarray:
+        if self.column.size - self.sealed > self.tail_limit:
+            self.seal()
+        keys = self.column.data
+        sealed = keys[:self.sealed]
+        lo = np.searchsorted(sealed, key, side="left", sorter=self.order)
+        hi = np.searchsorted(sealed, key, side="right", sorter=self.order)
+        head = self.order[lo:hi]        # stable sort: already in row order
+        tail = np.flatnonzero(keys[self.sealed:self.column.size] == key)
+        if not len(tail):
+            return head
+        return np.concatenate([head, (tail + self.sealed).astype(np.uint32)])
+
+    @property
+    def nbytes(self) -> int:
+        return self.order.nbytes
+
+
+class SchemaTable:
+    """All attestations of one schema, column by column."""
+
+    def __init__(self, store: "AttestationStore", name: str, schema: str):
+        self.store = store
+        self.name = name
+        self.schema = schema
+        self.fields = schema_fields(schema)
+        self.seq = Column(np.uint32)            # position in the store's global (chain) order
+        self.ref = Column(np.uint32)            # interned refUID
+        self.recipient = Column(np.uint32)      # interned address
+        self.attester = Column(np.uint32)       # interned address
+        self.chain_id = Column(np.uint32)
+        self.block = Column(np.uint32)
+        self.time = Column(np.uint64)
+        self.expiration_time = Column(np.uint64)
+        self.revocation_time = Column(np.uint64)
+        self.revoked_block = Column(np.uint32)  # block of the Revoked event, for reorg rollback
+
+        self.columns = {}
+        for typ, field in self.fields:
+            if typ in NUMERIC_DTYPES:
+                self.columns[field] = Column(NUMERIC_DTYPES[typ])
+            elif typ == "address":
+                self.columns[field] = Column(np.uint32)
+            elif typ == "bytes32":
+                self.columns[field] = Column("S32")
+            elif typ == "string":
+                self.columns[field] = StringColumn()
+            else:
+                self.columns[field] = ObjectColumn()
+        self._types = dict((field, typ) for typ, field in self.fields)
+
+        self.by_ref = KeyIndex(self.ref)
+        self.by_recipient = KeyIndex(self.recipient)
+        self.by_attester = KeyIndex(self.attester)
+
+    def __len__(self) -> int:
+        return self.seq.size
+
+    def append(self, record: dict, seq: int) -> int:
+        store = self.store
+        self.seq.append(seq)
+        self.ref.append(store.refs.intern(record["ref_uid"]))
+        self.recipient.append(store.addresses.intern(record["recipient"]))
+        self.attester.append(store.addresses.intern(record["attester"]))
+        self.chain_id.append(record.get("chain_id", 0))
+        self.block.append(record.get("block", 0))
+        self.time.append(record.get("time", 0))
+        self.expiration_time.append(record.get("expiration_time", 0))
+        self.revocation_time.append(record.get("revocation_time", 0))
+        self.revoked_block.append(0)
+
+        data = record["data"]
+        for field, column in self.columns.items():
+            typ = self._types[field]
+            value = data[field]
+            if typ == "address":
+                value = store.addresses.intern(value)
+            elif typ == "bytes32":
+                value = _uid_bytes(value)
+            column.append(value)
+        return len(self) - 1
+
+    STANDARD_COLUMNS = ("seq", "ref", "recipient", "attester", "chain_id", "block", "time",
+                        "expiration_time", "revocation_time", "revoked_block")
+
+    def column(self, field: str) -> np.ndarray:
+        """Typed array of a numeric / interned schema field (or a standard column) for all rows."""
+        column = self.columns.get(field) or getattr(self, field)
+        return column.values()
+
+    def value(self, row: int, field: str):
+        typ = self._types[field]
+        value = self.columns[field][row]
+        if typ == "address":
+            return self.store.addresses.values[value]
+        if typ == "bytes32":
+            return _uid_hex(value)
+        if isinstance(value, np.generic):
+            return value.item()
+        return value
+
+    def record(self, row: int) -> dict:
+        """Rebuild the indexer record of ROW (for logic that works on records)."""
+        store = self.store
+        seq = int(self.seq[row])
+        return {
+            "chain_id": int(self.chain_id[row]),
+            "event": "attested",
+            "block": int(self.block[row]),
+            "uid": _uid_hex(store.uids[seq]),
+            "schema": self.name,
+            "recipient": store.addresses.values[self.recipient[row]],
+            "attester": store.addresses.values[self.attester[row]],
+            "time": int(self.time[row]),
+            "expiration_time": int(self.expiration_time[row]),
+            "revocation_time": int(self.revocation_time[row]),
+            "ref_uid": store.refs.values[self.ref[row]],
+            "data": {field: self.value(row, field) for _, field in self.fields},
+        }
+
+    def rows_by_ref(self, ref_uid: str) -> np.ndarray:
+        ref = self.store.refs.get(ref_uid)
+        return self.by_ref.rows(ref) if ref is not None else np.zeros(0, dtype=np.uint32)
+
+    def rows_by_recipient(self, address: str) -> np.ndarray:
+        i = self.store.addresses.get(address)
+        return self.by_recipient.rows(i) if i is not None else np.zeros(0, dtype=np.uint32)
+
+    def rows_by_attester(self, address: str) -> np.ndarray:
+        i = self.store.addresses.get(address)
+        return self.by_attester.rows(i) if i is not None else np.zeros(0, dtype=np.uint32)
+
+    @property
+    def nbytes(self) -> int:
+        columns = [getattr(self, name) for name in self.STANDARD_COLUMNS] + list(self.columns.values())
+        return sum(c.nbytes for c in columns) + sum(i.nbytes for i in (self.by_ref, self.by_recipient, self.by_attester))
+
+
+class AttestationStore(Sink):
+    """Every indexed attestation, one SchemaTable per schema, in chain order."""
+
+    def __init__(self, schemas: Dict[str, str]):
+        self.addresses = Interner()
+        self.refs = Interner()
+        self.refs.intern(ZERO_UID)
+        self.tables = {name: SchemaTable(self, name, schema) for name, schema in schemas.items()}
+        self._table_names = list(self.tables)
+        self._table_ids = {name: i for i, name in enumerate(self._table_names)}
+
+        # Global order: uid, table and row of every attestation
+        self.uids = Column("S32")
+        self.table_of = Column(np.uint8)
+        self.row_of = Column(np.uint32)
+        self.by_uid = KeyIndex(self.uids)
+        self._recent = None                     # first 8 bytes of the UIDs after by_uid's sealed prefix
+        self._recent_from = 0
+
+    def __len__(self) -> int:
+        return self.uids.size
+
+    # --- ingest --------------------------------------------------------------
+
+    def _stored(self, uid: bytes) -> bool:
+        """
+        Whether UID is already stored. Unlike `seq_of` this never scans the
+        unsealed tail: a set of UID prefixes covers it, so a bulk load does
+        not slow down as the tail grows.
+        """
+        index = self.by_uid
+        if self._recent is None or self._recent_from != index.sealed:
+            tail = self.uids.data[index.sealed:self.uids.size].view(np.uint8).reshape(-1, 32)
+            self._recent = set(tail[:, :8].copy().view(">u8").ravel().tolist())
+            self._recent_from = index.sealed
+        if int.from_bytes(uid[:8], "big") in self._recent:
+            return len(index.rows(uid)) > 0
+        if not index.sealed:
+            return False
+        i = np.searchsorted(self.uids.data[:index.sealed], uid, sorter=index.order)
+        return i < index.sealed and bytes(self.uids.data[index.order[i]]).ljust(32, b"\0") == uid
+
+    def write(self, record: dict):
+        """
+        Sink interface: store an attested record, or apply a revocation.
+        Idempotent: an attestation whose UID is already stored is skipped,
+        so replaying blocks a snapshot already covers adds nothing.
+        """
+        if record.get("data") is None or record["schema"] not in self.tables:
+            return
+        if record["event"] == "revoked":
+            found = self.find(record["uid"])
+            if found is not None and record.get("revocation_time"):
+                table, row = found
+                table.revocation_time[row] = record["revocation_time"]
+                table.revoked_block[row] = record.get("block", 0)
+            return
+
+        uid = _uid_bytes(record["uid"])
+        if self._stored(uid):
+            return
+        table = self.tables[record["schema"]]
+        seq = len(self)
+        row = table.append(record, seq)
+        self.uids.append(uid)
+        self._recent.add(int.from_bytes(uid[:8], "big"))
+        if len(self._recent) > RECENT_LIMIT:
+            self.by_uid.seal()
+        self.table_of.append(self._table_ids[table.name])
+        self.row_of.append(row)
+
+    def extend(self, records: Iterable[dict]):
+        for record in records:
+            self.write(record)
+
+    # --- queries -------------------------------------------------------------
+
+    def seq_of(self, uid: str) -> Optional[int]:
+        """Global (chain order) position of UID, or None."""
+        seqs = self.by_uid.rows(_uid_bytes(uid))
+        return int(seqs[0]) if len(seqs) else None
+
+    def at(self, seq: int) -> tuple:
+        """(table, row) of the attestation at global position SEQ."""
+        return self.tables[self._table_names[self.table_of[seq]]], int(self.row_of[seq])
+
+    def find(self, uid: str) -> Optional[tuple]:
+        """(table, row) of UID, or None."""
+        seq = self.seq_of(uid)
+        return self.at(seq) if seq is not None else None
+
+    def get(self, uid: str) -> Optional[dict]:
+        found = self.find(uid)
+        return found[0].record(found[1]) if found else None
+
+    def referencing(self, ref_uid: str, schemas: Sequence[str]) -> Dict[str, np.ndarray]:
+        """Rows of each of SCHEMAS whose refUID is REF_UID (e.g. all votes on a proposal)."""
+        return {name: self.tables[name].rows_by_ref(ref_uid) for name in schemas}
+
+    def records(self, schemas: Optional[Sequence[str]] = None) -> Iterable[dict]:
+        """Records of SCHEMAS (default: all) in chain order."""
+        wanted = None if schemas is None else [self._table_ids[s] for s in schemas]
+        table_of, row_of = self.table_of.values(), self.row_of.values()
+        seqs = np.arange(len(self)) if wanted is None else np.flatnonzero(np.isin(table_of, wanted))
+        for seq in seqs:
+            yield self.tables[self._table_names[table_of[seq]]].record(int(row_of[seq]))
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate size of the array data, indexes included."""
+        return (sum(t.nbytes for t in self.tables.values()) + self.uids.nbytes + self.table_of.nbytes
+                + self.row_of.nbytes + self.by_uid.nbytes)
+
+    def stats(self) -> dict:
+        return {"attestations": len(self), "addresses": len(self.addresses), "refs": len(self.refs),
+                "nbytes": self.nbytes, "tables": {name: len(t) for name, t in self.tables.items() if len(t)}}
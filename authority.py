@@ -0,0 +1,203 @@
+"""
+Incremental GRANT authority index.
+
+protocol.md requires offchain services to check that an issuer had authority
+before honoring GRANT, CREATE_PROPOSAL, DELETE and similar attestations.
+Instead of walking the grant chain back to INSTANTIATE for every check, this
+index keeps, per (dao_id, address, permission), a timeline of the `level`
+bitmask the address held. `can` is a dict lookup plus a bisect over the few
+breakpoints one key has.
+
+Rules:
+  - The first INSTANTIATE / PERMA_INSTANTIATE of a DAO makes its attester the
+    root, holding every permission with every bit.
+  - A GRANT is valid if its attester held GRANT with the CREATE bit when it
+    was issued. It lasts until its own expiration / revocation, and never
+    beyond the earlier grant that authorized it, so revoking a grant also
+    ends what its grantee granted afterwards (prospectively).
+  - A DELETE of a grant, by an issuer holding the DELETE bit for the deleted
+    verb, nullifies the grant and everything it authorized (retroactively).
+  - The `filter` field is not interpreted.
+"""
+
+import time
+from bisect import bisect_right
+from typing import Dict, List, Optional, Tuple
+
+
+CREATE, REVOKE, DELETE = 1, 2, 4
+
+ALL_PERMISSIONS = "*"
+ALL_BITS = CREATE | REVOKE | DELETE
+
+FOREVER = 2 ** 64
+
+INSTANTIATE_SCHEMAS = ("INSTANTIATE", "PERMA_INSTANTIATE")
+
+# Every schema that can change the index
+AUTHORITY_SCHEMAS = INSTANTIATE_SCHEMAS + ("GRANT", "DELETE")
+
+# Schema -> (permission, bit) its attester must hold for the attestation to count.
+# DELETE checks the DELETE bit of the verb it names.
+REQUIRED_PERMISSION = {
+    "GRANT": ("GRANT", CREATE),
+    "CREATE_PROPOSAL_TYPE": ("CREATE_PROPOSAL_TYPE", CREATE),
+    "CREATE_PROPOSAL": ("CREATE_PROPOSAL", CREATE),
+}
+
+
+class Grant:
+    """One GRANT (or a DAO's root, for INSTANTIATE) and its effective validity."""
+
+    __slots__ = ("uid", "seq", "dao", "grantor", "grantee", "permission", "level",
+                 "start", "end", "deleted", "effective")
+
+    def __init__(self, uid: str, seq: int, dao: str, grantor: Optional[str], grantee: str,
+                 permission: str, level: int, start: int, end: int):
+        self.uid = uid
+        self.seq = seq
+        self.dao = dao
+        self.grantor = grantor
+        self.grantee = grantee
+        self.permission = permission
+        self.level = level
+        self.start = start
+        self.end = end
+        self.deleted = False
+        self.effective: Optional[Tuple[int, int]] = None     # [start, end) it actually confers authority
+
+    @property
+    def key(self) -> tuple:
+        return self.dao, self.grantee, self.permission
+
+
+def _end(record: dict) -> int:
+    """End of an attestation's own validity: expiration or revocation, whichever is first."""
+    ends = [t for t in (record.get("expiration_time"), record.get("revocation_time")) if t]
+    return min(ends) if ends else FOREVER
+
+
+class AuthorityIndex:
+    """Who may do what in which DAO, and when. Feed records in chain order."""
+
+    def __init__(self):
+        self.roots: Dict[str, str] = {}                         # dao -> root grant uid
+        self.grants: Dict[str, Grant] = {}
+        self._held: Dict[tuple, List[Grant]] = {}               # (dao, address, permission) -> grants
+        self._issued: Dict[tuple, List[Grant]] = {}             # (dao, grantor) -> grants it issued
+        self._timelines: Dict[tuple, Tuple[list, list]] = {}    # key -> (breakpoints, level masks)
+
+    # --- queries -------------------------------------------------------------
+
+    def level(self, dao: str, address: str, permission: str, at: Optional[int] = None) -> int:
+        """Bitmask of PERMISSION powers ADDRESS holds in DAO at time AT (default: now)."""
+        if at is None:
+            at = int(time.time())
+        mask = 0
+        for key in ((dao, address, permission), (dao, address, ALL_PERMISSIONS)):
+            timeline = self._timelines.get(key)
+            if timeline:
+                i = bisect_right(timeline[0], at) - 1
+                if i >= 0:
+                    mask |= timeline[1][i]
+        return mask
+
+    def can(self, dao: str, address: str, permission: str, bit: int, at: Optional[int] = None) -> bool:
+        return bool(self.level(dao, address, permission, at) & bit)
+
+    def allows(self, record: dict) -> bool:
+        """Whether RECORD's attester had the authority its schema requires when it was made."""
+        schema = record["schema"]
+        if schema == "DELETE":
+            permission, bit = record["data"]["verb"], DELETE
+        elif schema in REQUIRED_PERMISSION:
+            permission, bit = REQUIRED_PERMISSION[schema]
+        else:
+            return True
+        return self.can(record["recipient"], record["attester"], permission, bit, record["time"])
+
+    # --- updates -------------------------------------------------------------
+
+    def apply(self, record: dict):
+        """Update the index with one indexer record."""
+        if record.get("data") is None:
+            return
+        schema = record["schema"]
+
+        if record["event"] == "revoked":
+            grant = self.grants.get(record["uid"])
+            if grant is not None and record.get("revocation_time"):
+                grant.end = min(grant.end, record["revocation_time"])
+                self._changed(grant)
+            return
+
+        if schema in INSTANTIATE_SCHEMAS:
+            if record["recipient"] not in self.roots:
+                self.roots[record["recipient"]] = record["uid"]
+                self._add(Grant(record["uid"], len(self.grants), record["recipient"], None, record["attester"],
+                                ALL_PERMISSIONS, ALL_BITS, record["time"], _end(record)))
+        elif schema == "GRANT":
+            data = record["data"]
+            self._add(Grant(record["uid"], len(self.grants), record["recipient"], record["attester"], data["verb"],
+                            data["permission"], data["level"], record["time"], _end(record)))
+        elif schema == "DELETE":
+            grant = self.grants.get(record["ref_uid"])
+            if grant is not None and not grant.deleted and grant.dao == record["recipient"] and self.allows(record):
+                grant.deleted = True
+                self._changed(grant)
+
+    def _add(self, grant: Grant):
+        self.grants[grant.uid] = grant
+        self._held.setdefault(grant.key, []).append(grant)
+        if grant.grantor is not None:
+            self._issued.setdefault((grant.dao, grant.grantor), []).append(grant)
+        self._resolve(grant)
+        self._rebuild(grant.key)
+
+    def _resolve(self, grant: Grant) -> bool:
+        """Recompute GRANT's effective interval; returns True if it changed."""
+        previous = grant.effective
+        end = None
+        if grant.deleted:
+            pass
+        elif grant.grantor is None:
+            end = grant.end
+        else:
+            # Authorized by the earlier grant covering its issue time that lasts longest
+            for key in ((grant.dao, grant.grantor, "GRANT"), (grant.dao, grant.grantor, ALL_PERMISSIONS)):
+                for parent in self._held.get(key, ()):
+                    if (parent.seq < grant.seq and parent.effective and parent.level & CREATE
+                            and parent.effective[0] <= grant.start < parent.effective[1]):
+                        end = max(end or 0, min(grant.end, parent.effective[1]))
+
+        grant.effective = (grant.start, end) if end is not None and grant.start < end else None
+        return grant.effective != previous
+
+    def _changed(self, grant: Grant):
+        """Propagate a shortened / nullified grant to everything issued under it."""
+        stack = [grant]
+        self._resolve(grant)
+        while stack:
+            current = stack.pop()
+            self._rebuild(current.key)
+            if current.permission not in ("GRANT", ALL_PERMISSIONS):
+                continue
+            for child in self._issued.get((current.dao, current.grantee), ()):
+                if child.seq > current.seq and self._resolve(child):
+                    stack.append(child)
+
+    def _rebuild(self, key: tuple):
+        """Flatten the effective intervals of KEY's grants into (breakpoints, masks)."""
+        intervals = [(g.effective, g.level) for g in self._held.get(key, ()) if g.effective]
+        if not intervals:
+            self._timelines.pop(key, None)
+            return
+        points = sorted({t for (start, end), _ in intervals for t in (start, end)})
+        masks = []
+        for point in points:
+            mask = 0
+            for (start, end), level in intervals:
+                if start <= point < end:
+                    mask |= level
+            masks.append(mask)
+        self._timelines[key] = (points, masks)
@@ -0,0 +1,199 @@
+"""
+Time-interval index of IDENTITY_BADGE holders.
+
+A badge is held from its attestation time until its EAS expiration or, if its
+BADGE_DEFINITION is revocable, its revocation. A DELETE nullifies it outright.
+Per definition, the holding intervals sit in a centered interval tree, so
+"who held badge X at T" costs O(log n + holders). Per (definition, user), the
+merged validity segments are bisected, so "did V hold any of these badges at
+T" costs O(log n) per badge. Both are rebuilt lazily after a change.
+"""
+
+from bisect import bisect_right
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from authority import FOREVER
+
+
+BADGE_SCHEMAS = ("BADGE_DEFINITION", "IDENTITY_BADGE", "DELETE")
+
+
+class IntervalTree:
+    """Static centered interval tree over half-open [start, end) intervals."""
+
+    __slots__ = ("center", "by_start", "by_end", "left", "right")
+
+    def __init__(self, intervals: List[Tuple[int, int, object]]):
+        starts = sorted(start for start, _, _ in intervals)
+        self.center = starts[len(starts) // 2] if starts else 0
+        here, left, right = [], [], []
+        for interval in intervals:
+            start, end, _ = interval
+            if end <= self.center:
+                left.append(interval)
+            elif start > self.center:
+                right.append(interval)
+            else:
+                here.append(interval)
+        self.by_start = sorted(here, key=lambda i: i[0])
+        self.by_end = sorted(here, key=lambda i: -i[1])
+        self.left = IntervalTree(left) if left else None
+        self.right = IntervalTree(right) if right else None
+
+    def stab(self, at: int) -> List[object]:
+        """Values of every interval containing AT."""
+        found = []
+        node = self
+        while node is not None:
+            if at < node.center:
+                for start, _, value in node.by_start:
+                    if start > at:
+                        break
+                    found.append(value)
+                node = node.left
+            else:
+                for _, end, value in node.by_end:
+                    if end <= at:
+                        break
+                    found.append(value)
+                node = node.right
+        return found
+
+
+class Badge:
+    __slots__ = ("uid", "definition", "dao", "user", "issuer", "start", "expiration", "revocation", "deleted")
+
+    def __init__(self, uid: str, definition: str, dao: str, user: str, issuer: str, start: int,
+                 expiration: int, revocation: int):
+        self.uid = uid
+        self.definition = definition
+        self.dao = dao
+        self.user = user
+        self.issuer = issuer
+        self.start = start
+        self.expiration = expiration
+        self.revocation = revocation
+        self.deleted = False
+
+    def end(self, revocable: bool) -> int:
+        ends = [self.expiration] if self.expiration else []
+        if revocable and self.revocation:
+            ends.append(self.revocation)
+        return min(ends) if ends else FOREVER
+
+
+class BadgeIndex:
+    """
+    Badge holdings over time. Feed records in chain order. AUTHORIZE_DELETE
+    (delete_record) decides whether a DELETE from someone other than the
+    badge's issuer nullifies it.
+    """
+
+    def __init__(self, authorize_delete: Optional[Callable[[dict], bool]] = None):
+        self.authorize_delete = authorize_delete
+        self.definitions: Dict[str, Tuple[str, bool]] = {}      # uid -> (dao, revocable)
+        self.badges: Dict[str, Badge] = {}
+        self._by_definition: Dict[str, List[Badge]] = {}
+        self._by_holder: Dict[tuple, List[Badge]] = {}          # (definition, user) -> badges
+        self._trees: Dict[str, Optional[IntervalTree]] = {}
+        self._segments: Dict[tuple, Tuple[list, list]] = {}     # (definition, user) -> merged (starts, ends)
+
+    # --- updates -------------------------------------------------------------
+
+    def apply(self, record: dict):
+        """Update the index with one indexer record."""
+        if record.get("data") is None:
+            return
+        schema = record["schema"]
+
+        if record["event"] == "revoked":
+            badge = self.badges.get(record["uid"])
+            if badge is not None and record.get("revocation_time"):
+                badge.revocation = record["revocation_time"]
+                self._invalidate(badge)
+            return
+
+        if schema == "BADGE_DEFINITION":
+            self.definitions[record["uid"]] = (record["recipient"], bool(record["data"]["revocable"]))
+        elif schema == "IDENTITY_BADGE":
+            definition = self.definitions.get(record["ref_uid"])
+            if definition is None or definition[0] != record["recipient"]:
+                return
+            badge = Badge(record["uid"], record["ref_uid"], record["recipient"], record["data"]["user"],
+                          record["attester"], record["time"], record.get("expiration_time") or 0,
+                          record.get("revocation_time") or 0)
+            self.badges[badge.uid] = badge
+            self._by_definition.setdefault(badge.definition, []).append(badge)
+            self._by_holder.setdefault((badge.definition, badge.user), []).append(badge)
+            self._invalidate(badge)
+        elif schema == "DELETE":
+            badge = self.badges.get(record["ref_uid"])
+            if badge is None or badge.deleted or badge.dao != record["recipient"]:
+                return
+            if record["attester"] == badge.issuer or (self.authorize_delete and self.authorize_delete(record)):
+                badge.deleted = True
+                self._invalidate(badge)
+
+    def extend(self, records: Iterable[dict]):
+        for record in records:
+            self.apply(record)
+
+    def _invalidate(self, badge: Badge):
+        self._trees.pop(badge.definition, None)
+        self._segments.pop((badge.definition, badge.user), None)
+
+    def _intervals(self, badges: Iterable[Badge]) -> List[Tuple[int, int, str]]:
+        intervals = []
+        for badge in badges:
+            if not badge.deleted:
+                end = badge.end(self.definitions[badge.definition][1])
+                if badge.start < end:
+                    intervals.append((badge.start, end, badge.user))
+        return intervals
+
+    # --- queries -------------------------------------------------------------
+
+    def holders(self, badge_id: str, at: int) -> Set[str]:
+        """Users holding badge definition BADGE_ID at time AT."""
+        if badge_id not in self._trees:
+            intervals = self._intervals(self._by_definition.get(badge_id, ()))
+            self._trees[badge_id] = IntervalTree(intervals) if intervals else None
+        tree = self._trees[badge_id]
+        return set(tree.stab(at)) if tree else set()
+
+    def eligible(self, badge_ids: Iterable[str], at: int) -> Set[str]:
+        """Users holding any of BADGE_IDS at time AT."""
+        users = set()
+        for badge_id in badge_ids:
+            users |= self.holders(badge_id, at)
+        return users
+
+    def next_change(self, badge_id: str, after: int) -> Optional[int]:
+        """First time after AFTER at which a BADGE_ID badge starts or ends (None: never)."""
+        times = [t for start, end, _ in self._intervals(self._by_definition.get(badge_id, ()))
+                 for t in (start, end) if after < t < FOREVER]
+        return min(times, default=None)
+
+    def holds(self, user: str, badge_ids: Iterable[str], at: int) -> bool:
+        """Whether USER held any of BADGE_IDS at time AT."""
+        for badge_id in badge_ids:
+            key = (badge_id, user)
+            segments = self._segments.get(key)
+            if segments is None:
+                segments = self._segments[key] = self._merge(self._intervals(self._by_holder.get(key, ())))
+            starts, ends = segments
+            i = bisect_right(starts, at) - 1
+            if i >= 0 and at < ends[i]:
+                return True
+        return False
+
+    @staticmethod
+    def _merge(intervals: List[Tuple[int, int, str]]) -> Tuple[list, list]:
+        starts, ends = [], []
+        for start, end, _ in sorted(intervals):
+            if ends and start <= ends[-1]:
+                ends[-1] = max(ends[-1], end)
+            else:
+                starts.append(start)
+                ends.append(end)
+        return starts, ends
@@ -0,0 +1,538 @@
+"""
+Benchmarks for the hot paths, with machine-readable results.
+
+  python bench.py micro -o before.json          # codecs, schema IDs, DAO IDs, tally
+  python bench.py e2e -o e2e.json               # attestations against a local anvil chain
+  python bench.py compare before.json after.json
+  python bench.py workload records.jsonl --daos 100
+
+Every result has `median_us` (time per operation) and `ops_per_s`; a results
+file also records the git revision, Python and platform it came from, so
+runs can be compared with `compare`, which exits 1 on a regression.
+
+`e2e` needs an anvil node with EAS and both resolvers deployed by
+script/deploy_local.sh. It replays a workload.Workload in chain time: each
+second's transactions are signed by their own attester, broadcast as one
+batch and mined together with `evm_mine` at that timestamp, so vote bursts
+near `endts` arrive as full blocks, as they do on a real chain.
+"""
+
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+from itertools import groupby
+from typing import Callable, Dict, List, Optional
+
+import click
+import numpy as np
+from eth_account import Account
+from eth_utils import to_checksum_address
+
+from abi_codec import encode_call, schema_decoder, schema_encoder, schema_fields
+from attestation_store import AttestationStore
+from authority import AuthorityIndex
+from dao_id_gen import pack_eth_address, pack_eth_addresses
+from dao_id_unpack import unpack_eth_address, valid_dao_ids
+from eas_cli import (ATTEST_SIG, MULTI_ATTEST_SIG, RESOLVER, REVOCABILITY, SCHEMAS, attested_uids,
+                     build_attestation_request, get_schema_id)
+from indexer import iter_jsonl
+from metrics import METRICS
+from rpc_client import RpcClient, RpcError, RpcTransportError
+from schema_registry import SchemaInfo, SchemaRegistry
+from signer import Signer
+from tally import SimpleVoteTally
+from tx_sender import PipelinedSender
+from workload import ZERO_UID, Workload
+
+
+DEFAULT_DEPLOYMENT = "bench-deployment.json"
+
+# anvil's first default account, the deployer in script/deploy_local.sh
+ANVIL_KEY = "0xac0974bec39a17e36ba4a6b4d238ff944bacb478cbed5efcae784d7bf4f2ff80"
+
+# Fixed per-transaction gas: estimates would run at the wrong block time while replaying
+GAS_LIMIT = 1_000_000
+BLOCK_GAS_LIMIT = 1_000_000_000
+ACCOUNT_BALANCE = 100 * 10 ** 18
+
+ADD_ATTESTER_SIG = "addAttester(address)"
+
+# Addresses script/deploy_local.sh writes
+DEPLOYMENT_CONTRACTS = ("schema_registry", "eas", "entity_resolver", "votes_resolver")
+
+
+# --- measurement -------------------------------------------------------------
+
+
+def measure(fn: Callable, repeat: int = 5, items: int = 1) -> dict:
+    """
+    Time FN like timeit: calibrate the loop count to ~0.2 s, then take REPEAT
+    samples. With ITEMS, FN processes that many items and times are per item.
+    """
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    samples = [t / (number * items) for t in timer.repeat(repeat, number)]
+    median = statistics.median(samples)
+    return {"n": number * items, "repeat": repeat, "median_us": round(median * 1e6, 4),
+            "min_us": round(min(samples) * 1e6, 4), "max_us": round(max(samples) * 1e6, 4),
+            "ops_per_s": round(1 / median, 1)}
+
+
+def throughput(n: int, seconds: float, **extra) -> dict:
+    """Result row for N operations that took SECONDS of wall time."""
+    return {"n": n, "seconds": round(seconds, 4), "median_us": round(1e6 * seconds / max(n, 1), 2),
+            "ops_per_s": round(n / seconds, 1) if seconds else None, **extra}
+
+
+def metadata(command: str, params: dict) -> dict:
+    def git(*args) -> Optional[str]:
+        try:
+            return subprocess.run(["git", *args], capture_output=True, text=True, check=True,
+                                  cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    return {
+        "command": command,
+        "params": params,
+        "git_rev": git("rev-parse", "HEAD"),
+        "git_dirty": bool(git("status", "--porcelain", "--untracked-files=no")),
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "numpy": np.__version__,
+        "time": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+    }
+
+
+def write_results(path: str, command: str, params: dict, results: Dict[str, dict]):
+    doc = {"meta": metadata(command, params), "results": results}
+    if path == "-":
+        click.echo(json.dumps(doc, indent=2))
+    else:
+        with open(path, "w") as f:
+            json.dump(doc, f, indent=2)
+            f.write("\n")
+        click.echo(f"Wrote {len(results)} results to {path}", err=True)
+
+
+def print_table(results: Dict[str, dict]):
+    width = max(len(name) for name in results)
+    click.echo(f"{'benchmark':<{width}} {'median us':>12} {'ops/s':>14}", err=True)
+    for name, row in results.items():
+        ops = f"{row['ops_per_s']:,.0f}" if row.get("ops_per_s") else "-"
+        click.echo(f"{name:<{width}} {row['median_us']:>12.3f} {ops:>14}", err=True)
+
+
+# --- micro benchmarks --------------------------------------------------------
+
+
+def sample_value(typ: str):
+    """A representative value of ABI type TYP, as the CLI would pass it."""
+    if typ.endswith("[]"):
+        return [sample_value(typ[:-2]) for _ in range(3)]
+    if typ.startswith("uint"):
+        return min(1_700_000_000, 2 ** int(typ[4:] or 256) - 1)
+    if typ.startswith("int"):
+        return -1
+    if typ == "address":
+        return "0x" + "ab" * 20
+    if typ == "bool":
+        return True
+    if typ == "bytes32":
+        return "0x" + "11" * 32
+    if typ == "bytes":
+        return b"\x22" * 40
+    return "benchmark text of a typical length"
+
+
+def sample_args(schema: str) -> list:
+    return [sample_value(typ) for typ, _ in schema_fields(schema)]
+
+
+def bench_schema_ids(repeat: int) -> Dict[str, dict]:
+    names = list(SCHEMAS)
+    resolvers = {"entity_resolver": "0x" + "01" * 20, "votes_resolver": "0x" + "02" * 20}
+    revocability = {name: value == "true" for name, value in REVOCABILITY.items()}
+
+    def warm():
+        for name in names:
+            get_schema_id(name, 1)
+
+    def cold():
+        for name in names:
+            label = RESOLVER[name]
+            SchemaInfo(name, 1, SCHEMAS[name], resolvers[label] if label else "0x" + "00" * 20, revocability[name])
+
+    def registry():
+        SchemaRegistry(SCHEMAS, RESOLVER, revocability, lambda chain_id: resolvers, [1])
+
+    return {
+        "schema_id/get_schema_id": measure(warm, repeat, items=len(names)),
+        "schema_id/uncached": measure(cold, repeat, items=len(names)),
+        "schema_id/registry_build": measure(registry, repeat),
+    }
+
+
+def bench_codecs(repeat: int) -> Dict[str, dict]:
+    results = {}
+    for name, schema in SCHEMAS.items():
+        encoder, decoder = schema_encoder(schema), schema_decoder(schema)
+        args = sample_args(schema)
+        data = encoder.encode(args)
+        first = decoder.names[0]
+        results[f"encode/{name}"] = measure(lambda: encoder.encode(args), repeat)
+        results[f"decode/{name}"] = measure(lambda: decoder.decode(data), repeat)
+        results[f"decode_field/{name}"] = measure(lambda: decoder.view(data)[first], repeat)
+    return results
+
+
+def bench_dao_ids(repeat: int, batch: int = 10_000) -> Dict[str, dict]:
+    address = pack_eth_address("benchdao", 1, 1, 7)
+    names = [f"dao{i}" for i in range(batch)]
+    ones, nonces = [1] * batch, [i % 65536 for i in range(batch)]
+    addresses = pack_eth_addresses(names, ones, ones, nonces)
+    return {
+        "dao_id/pack_eth_address": measure(lambda: pack_eth_address("benchdao", 1, 1, 7), repeat),
+        "dao_id/unpack_eth_address": measure(lambda: unpack_eth_address(address), repeat),
+        "dao_id/pack_eth_addresses": measure(lambda: pack_eth_addresses(names, ones, ones, nonces), repeat, items=batch),
+        "dao_id/valid_dao_ids": measure(lambda: valid_dao_ids(addresses), repeat, items=batch),
+    }
+
+
+def bench_tally(workload: Workload) -> Dict[str, dict]:
+    """Load and tally WORKLOAD's records through the same path as `eas_cli.py tally`."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "records.jsonl")
+        n = workload.write_records(path)
+
+        start = time.perf_counter()
+        authority = AuthorityIndex()
+        store = AttestationStore(SCHEMAS)
+        for record in iter_jsonl(path):
+            authority.apply(record)
+            store.write(record)
+        loaded = time.perf_counter()
+        engine = SimpleVoteTally.from_store(store, authorize_delete=authority.allows, authorize=authority.allows)
+        tallied = time.perf_counter()
+        results = engine.results()
+        done = time.perf_counter()
+
+    return {
+        "tally/load": throughput(n, loaded - start),
+        "tally/from_store": throughput(n, tallied - loaded),
+        "tally/results": throughput(len(results), done - tallied),
+    }
+
+
+# --- end to end --------------------------------------------------------------
+
+
+class ChainBench:
+    """Replays a Workload against a local anvil chain; see the module docstring."""
+
+    def __init__(self, rpc: RpcClient, deployment: dict, signer: Signer):
+        self.rpc = rpc
+        self.deployment = deployment = {**deployment, **{name: to_checksum_address(deployment[name])
+                                                         for name in DEPLOYMENT_CONTRACTS}}
+        self.signer = signer
+        self.chain_id = int(rpc.call("eth_chainId"), 16)
+        self.eas = deployment["eas"]
+        self.registry = SchemaRegistry(SCHEMAS, RESOLVER, {name: value == "true" for name, value in REVOCABILITY.items()},
+                                       lambda chain_id: deployment, [self.chain_id])
+
+    def _sender(self) -> PipelinedSender:
+        return PipelinedSender(self.rpc, self.signer, self.chain_id, journal_path=None, poll=0.05)
+
+    def schema_uid(self, name: str) -> str:
+        return "0x" + self.registry.get(name, self.chain_id).uid
+
+    def register_schemas(self) -> int:
+        """Register every schema the SchemaRegistry does not know yet; returns how many."""
+        missing = [row["schema"] for row in self.registry.verify_chain(self.rpc, self.chain_id, self.deployment["schema_registry"])
+                   if row["status"] == "missing"]
+        if missing:
+            sender = self._sender()
+            for name in missing:
+                sender.submit(f"register:{name}", self.deployment["schema_registry"],
+                              self.registry.get(name, self.chain_id).register_calldata())
+            sender.wait()
+        return len(missing)
+
+    def prepare(self, workload: Workload):
+        """Fund every workload account and allow its entity attesters on EntitiesResolver."""
+        self.rpc.call("evm_setBlockGasLimit", [hex(BLOCK_GAS_LIMIT)])
+        self.rpc.batch([("anvil_setBalance", [address, hex(ACCOUNT_BALANCE)]) for address in workload.keys])
+
+        attesters = {event["attester"] for event in workload.events if RESOLVER[event["schema"]] == "entity_resolver"}
+        sender = self._sender()
+        for address in sorted(attesters):
+            sender.submit(f"attester:{address}", self.deployment["entity_resolver"],
+                          encode_call(ADD_ATTESTER_SIG, [address]))
+        sender.wait()
+
+    def replay(self, workload: Workload) -> Dict[str, dict]:
+        """Mine WORKLOAD second by second; returns throughput rows for setup and votes."""
+        accounts = {address: Account.from_key(key) for address, key in workload.keys.items()}
+        counts = self.rpc.batch([("eth_getTransactionCount", [address, "latest"]) for address in accounts])
+        nonces = {address: int(n, 16) for address, n in zip(accounts, counts)}
+
+        uids: Dict[str, str] = {}
+        last_ts = int(self.rpc.call("eth_getBlockByNumber", ["latest", False])["timestamp"], 16)
+        phases = {phase: {"attestations": 0, "reverted": 0, "rejected": 0, "blocks": 0, "gas_used": 0, "seconds": 0.0,
+                          "sign_seconds": 0.0, "send_seconds": 0.0, "mine_seconds": 0.0, "latencies": []}
+                  for phase in ("setup", "votes")}
+
+        self.rpc.call("evm_setAutomine", [False])
+        try:
+            for at, tick in groupby(workload.events, key=lambda event: event["at"]):
+                tick = list(tick)
+                stats = phases["votes" if tick[0]["schema"] == "SIMPLE_VOTE" else "setup"]
+                started = time.perf_counter()
+
+                max_fee, tip = self.signer.suggest_fees(self.rpc)
+                raws = []
+                for event in tick:
+                    request = build_attestation_request(event["schema"], event["args"],
+                                                        uids.get(event["ref"], ZERO_UID), event["recipient"])
+                    tx = {"chainId": self.chain_id, "nonce": nonces[event["attester"]], "to": self.eas,
+                          "data": encode_call(ATTEST_SIG, [(self.schema_uid(event["schema"]), request)]), "value": 0,
+                          "gas": GAS_LIMIT, "maxPriorityFeePerGas": tip, "maxFeePerGas": max_fee, "type": 2}
+                    signed = accounts[event["attester"]].sign_transaction(tx)
+                    raws.append("0x" + bytes(getattr(signed, "raw_transaction", None) or signed.rawTransaction).hex())
+                    nonces[event["attester"]] += 1
+                signed_at = time.perf_counter()
+
+                hashes = self.rpc.batch([("eth_sendRawTransaction", [raw]) for raw in raws], raise_errors=False)
+                sent_at = time.perf_counter()
+
+                waiting = {}
+                for event, tx_hash in zip(tick, hashes):
+                    if isinstance(tx_hash, RpcError):
+                        stats["rejected"] += 1
+                        nonces[event["attester"]] -= 1
+                    else:
+                        waiting[tx_hash] = event
+                while waiting:
+                    last_ts = max(at, last_ts + 1)
+                    self.rpc.call("evm_mine", [last_ts])
+                    stats["blocks"] += 1
+                    hashes = list(waiting)
+                    receipts = self.rpc.batch([("eth_getTransactionReceipt", [h]) for h in hashes])
+                    now = time.perf_counter()
+                    for tx_hash, receipt in zip(hashes, receipts):
+                        if receipt is None:
+                            continue
+                        event = waiting.pop(tx_hash)
+                        stats["latencies"].append(now - signed_at)
+                        stats["gas_used"] += int(receipt["gasUsed"], 16)
+                        found = attested_uids(receipt, self.eas) if int(receipt["status"], 16) == 1 else []
+                        if found:
+                            uids[event["id"]] = found[0]
+                            stats["attestations"] += 1
+                        else:
+                            stats["reverted"] += 1
+
+                done = time.perf_counter()
+                stats["sign_seconds"] += signed_at - started
+                stats["send_seconds"] += sent_at - signed_at
+                stats["mine_seconds"] += done - sent_at
+                stats["seconds"] += done - started
+        finally:
+            self.rpc.call("evm_setAutomine", [True])
+
+        results = {}
+        for phase, stats in phases.items():
+            latencies = stats.pop("latencies")
+            seconds = stats.pop("seconds")
+            extra = {name: round(value, 4) if isinstance(value, float) else value for name, value in stats.items()}
+            if latencies:
+                extra.update(latency_p50_ms=round(1000 * float(np.percentile(latencies, 50)), 2),
+                             latency_p95_ms=round(1000 * float(np.percentile(latencies, 95)), 2))
+            if stats["attestations"]:
+                extra["gas_per_attestation"] = stats["gas_used"] // stats["attestations"]
+            results[f"e2e/{phase}"] = throughput(stats["attestations"], seconds, **extra)
+        return results
+
+    def multi_attest(self, n: int, chunk_size: int) -> dict:
+        """N SET_PARAM_VALUE attestations from the signer through multiAttest, as `attest-batch` sends them."""
+        dao = pack_eth_address("benchbatch", self.chain_id, 1, 0)
+        requests = [build_attestation_request("SET_PARAM_VALUE", (f"param{i}", i), ZERO_UID, dao) for i in range(n)]
+        schema_uid = self.schema_uid("SET_PARAM_VALUE")
+        sender = self._sender()
+        run = time.time_ns()
+
+        start = time.perf_counter()
+        for i in range(0, n, chunk_size):
+            sender.submit(f"bench:{run}:{i}", self.eas,
+                          encode_call(MULTI_ATTEST_SIG, [[(schema_uid, requests[i:i + chunk_size])]]))
+        receipts = sender.wait()
+        seconds = time.perf_counter() - start
+
+        attested = sum(len(attested_uids(receipt, self.eas)) for receipt in receipts.values())
+        gas = sum(int(receipt["gasUsed"], 16) for receipt in receipts.values())
+        return throughput(attested, seconds, transactions=len(receipts), chunk_size=chunk_size,
+                          gas_per_attestation=gas // max(attested, 1))
+
+
+# --- CLI ---------------------------------------------------------------------
+
+
+def workload_options(fn):
+    options = [
+        click.option("--daos", default=10, show_default=True, help="Number of DAOs."),
+        click.option("--council", default=3, show_default=True, help="Council members granted GRANT by each root."),
+        click.option("--delegates", default=2, show_default=True, help="Delegates granted CREATE_PROPOSAL by each council member."),
+        click.option("--proposals", default=2, show_default=True, help="Proposals per DAO."),
+        click.option("--voters", default=50, show_default=True, help="Voters per DAO."),
+        click.option("--turnout", default=0.8, show_default=True, help="Fraction of voters voting on each proposal."),
+        click.option("--burst", default=0.7, show_default=True, help="Fraction of votes cast in the last --burst-window seconds."),
+        click.option("--burst-window", default=60, show_default=True, help="Seconds before endts the burst falls in."),
+        click.option("--voting-period", default=600, show_default=True, help="Seconds between startts and endts."),
+        click.option("--seed", default=0, show_default=True, help="Seed for keys, DAO IDs, choices and vote times."),
+    ]
+    for option in reversed(options):
+        fn = option(fn)
+    return fn
+
+
+def workload_params(params: dict) -> dict:
+    names = ("daos", "council", "delegates", "proposals", "voters", "turnout", "burst", "burst_window",
+             "voting_period", "seed")
+    return {name: params[name] for name in names}
+
+
+@click.group()
+def bench():
+    """Benchmarks with machine-readable results."""
+
+
+@bench.command()
+@click.option("-o", "--output", default="-", help="Results file (default: stdout).")
+@click.option("--repeat", default=5, show_default=True, help="Timing samples per benchmark.")
+@click.option("--only", multiple=True, type=click.Choice(["schema_id", "codec", "dao_id", "tally"]),
+              help="Run only these suites (repeatable).")
+@workload_options
+def micro(output: str, repeat: int, only: tuple, **params):
+    """In-process benchmarks: schema IDs, payload codecs for every schema,
+    DAO ID packing and loading / tallying a synthetic workload."""
+    suites = {
+        "schema_id": lambda: bench_schema_ids(repeat),
+        "codec": lambda: bench_codecs(repeat),
+        "dao_id": lambda: bench_dao_ids(repeat),
+        "tally": lambda: bench_tally(Workload(**workload_params(params))),
+    }
+    results = {}
+    for name, suite in suites.items():
+        if not only or name in only:
+            click.echo(f"Running {name}...", err=True)
+            results.update(suite())
+    print_table(results)
+    write_results(output, "micro", {"repeat": repeat, "only": list(only), **params}, results)
+
+
+@bench.command()
+@click.option("-o", "--output", default="-", help="Results file (default: stdout).")
+@click.option("--deployment", default=DEFAULT_DEPLOYMENT, show_default=True, type=click.Path(exists=True, dir_okay=False),
+              help="Addresses written by script/deploy_local.sh.")
+@click.option("--rpc-url", default=None, help="anvil endpoint (default: the deployment's rpc_url).")
+@click.option("--private-key", default=ANVIL_KEY, help="Deployer key; owns EntitiesResolver (default: anvil account 0).")
+@click.option("--batch", "batch_size", default=1000, show_default=True, help="Attestations for the multiAttest run (0 to skip).")
+@click.option("--chunk-size", default=50, show_default=True, help="Attestations per multiAttest transaction.")
+@workload_options
+def e2e(output: str, deployment: str, rpc_url: str, private_key: str, batch_size: int, chunk_size: int, **params):
+    """Attestation throughput against a local anvil chain.
+
+    Replays a synthetic workload (DAOs, grant trees, proposals, vote bursts
+    near endts) in chain time, then sends --batch attestations through
+    multiAttest. Per-stage timings are included under "stages".
+    """
+    with open(deployment) as f:
+        addresses = json.load(f)
+    rpc = RpcClient([rpc_url or addresses["rpc_url"]])
+    chain = ChainBench(rpc, addresses, Signer(Account.from_key(private_key)))
+
+    try:
+        registered = chain.register_schemas()
+        click.echo(f"Registered {registered} schemas", err=True)
+
+        head = rpc.call("eth_getBlockByNumber", ["latest", False])
+        workload = Workload(start=int(head["timestamp"], 16) + 1, chain_id=chain.chain_id, **workload_params(params))
+        click.echo(f"Workload: {workload.counts()}", err=True)
+        chain.prepare(workload)
+
+        METRICS.reset()
+        results = chain.replay(workload)
+        if batch_size:
+            results["e2e/multi_attest"] = chain.multi_attest(batch_size, chunk_size)
+        results["stages"] = METRICS.snapshot()
+    except (RpcError, RpcTransportError, OSError, TimeoutError) as e:
+        raise click.ClickException(f"Benchmark failed: {e}")
+
+    stages = results.pop("stages")
+    print_table(results)
+    results["stages"] = stages
+    write_results(output, "e2e", {"batch": batch_size, "chunk_size": chunk_size, **params}, results)
+
+
+@bench.command()
+@click.argument("baseline", type=click.Path(exists=True, dir_okay=False))
+@click.argument("candidate", type=click.Path(exists=True, dir_okay=False))
+@click.option("--threshold", default=0.10, show_default=True, help="Relative slowdown in median_us counted as a regression.")
+def compare(baseline: str, candidate: str, threshold: float):
+    """Compare two results files; exits 1 if any benchmark regressed."""
+    with open(baseline) as f:
+        old = json.load(f)
+    with open(candidate) as f:
+        new = json.load(f)
+
+    for label, doc in (("baseline", old), ("candidate", new)):
+        meta = doc["meta"]
+        dirty = " (dirty)" if meta.get("git_dirty") else ""
+        click.echo(f"{label:<10} {meta.get('git_rev') or '?'}{dirty} python {meta['python']} {meta['time']}")
+
+    names = [name for name in new["results"] if "median_us" in new["results"][name] and name in old["results"]]
+    if not names:
+        raise click.ClickException("No benchmarks in common")
+
+    regressions = 0
+    width = max(len(name) for name in names)
+    click.echo(f"{'benchmark':<{width}} {'before us':>12} {'after us':>12} {'change':>8}")
+    for name in names:
+        before, after = old["results"][name]["median_us"], new["results"][name]["median_us"]
+        change = after / before - 1 if before else 0.0
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressions += 1
+        elif change < -threshold:
+            flag = "  faster"
+        click.echo(f"{name:<{width}} {before:>12.3f} {after:>12.3f} {100 * change:>+7.1f}%{flag}")
+
+    for name in sorted(set(old["results"]) ^ set(new["results"])):
+        click.echo(f"{name}: only in {'baseline' if name in old['results'] else 'candidate'}")
+    if regressions:
+        click.echo(f"{regressions} regression(s) above {100 * threshold:.0f}%", err=True)
+        sys.exit(1)
+
+
+@bench.command()
+@click.argument("output")
+@workload_options
+def workload(output: str, **params):
+    """Write a synthetic workload as `index`-style JSONL records, e.g. for
+    `eas_cli.py --profile tally OUTPUT`."""
+    n = Workload(**workload_params(params)).write_records(output)
+    click.echo(f"Wrote {n} records to {output}", err=True)
+
+
+if __name__ == "__main__":
+    bench()
@@ -1,5 +1,13 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, Iterator, List, Optional
+
+import numpy as np
 from eth_utils import keccak
 
+# Packed DAO ID layout; the 17-byte record is exactly what the checksum hashes
+DAO_ID_DTYPE = np.dtype([("name", "S10"), ("chain_id", ">u4"), ("version", "u1"), ("nonce", ">u2")])
+
 def pack_eth_address(ascii_str: str, num4: int, num1: int, num2: int) -> str:
     """
     Pack components into a 20-byte Ethereum address.
@@ -42,23 +50,94 @@ def pack_eth_address(ascii_str: str, num4: int, num1: int, num2: int) -> str:
     hex_address = "0x" + final_bytes.hex()
     return hex_address
 
-# Example usage:
+def pack_eth_addresses(names: Iterable[str], chain_ids: Iterable[int], versions: Iterable[int],
+                       nonces: Iterable[int]) -> List[str]:
+    """
+    Batch version of pack_eth_address, taking one column per component:
+    names (ascii_str), chain_ids (num4), versions (num1) and nonces (num2).
+    """
+    names = [name.ljust(10, ".")[:10].encode("ascii") for name in names]
+    columns = {"chain_id": chain_ids, "version": versions, "nonce": nonces}
+    limits = {"chain_id": 0xFFFFFFFF, "version": 0xFF, "nonce": 0xFFFF}
+
+    records = np.zeros(len(names), dtype=DAO_ID_DTYPE)
+    records["name"] = names
+    for field, values in columns.items():
+        values = np.asarray(list(values), dtype=np.int64)
+        if len(values) != len(names):
+            raise ValueError(f"{field} has {len(values)} values, expected {len(names)}")
+        if len(values) and (values.min() < 0 or values.max() > limits[field]):
+            raise ValueError(f"{field} must fit in {DAO_ID_DTYPE[field].itemsize} byte(s)")
+        records[field] = values
+
+    return pack_records(records)
+
+
+def pack_records(records: np.ndarray) -> List[str]:
+    """
+    Pack a structured array of DAO_ID_DTYPE (name, chain_id, version, nonce)
+    into addresses. Short names are padded with '.' as in pack_eth_address.
+    """
+    records = np.ascontiguousarray(records, dtype=DAO_ID_DTYPE)
+    partial = records.view(np.uint8).reshape(len(records), DAO_ID_DTYPE.itemsize).copy()
+    names = partial[:, :10]
+    names[names == 0] = ord(".")
+
+    buf = partial.tobytes()
+    size = DAO_ID_DTYPE.itemsize
+    return ["0x" + (buf[i:i + size] + keccak(buf[i:i + size])[:3]).hex() for i in range(0, len(buf), size)]
+
+
+def _vanity_range(args: tuple) -> List[tuple]:
+    """Scan nonces [start, stop) of one (name, chain_id, version) for prefix / suffix matches."""
+    name, chain_id, version, start, stop, prefix, suffix = args
+    partial = bytearray(name.ljust(10, ".")[:10].encode("ascii") + chain_id.to_bytes(4, "big") + bytes([version, 0, 0]))
+    matches = []
+    for nonce in range(start, stop):
+        partial[15:17] = nonce.to_bytes(2, "big")
+        address = (bytes(partial) + keccak(bytes(partial))[:3]).hex()
+        if address.startswith(prefix) and address.endswith(suffix):
+            matches.append((nonce, "0x" + address))
+    return matches
+
+
+def vanity_search(name: str, chain_id: int, version: int, prefix: str = "", suffix: str = "",
+                  workers: Optional[int] = None, start: int = 0, stop: int = 0x10000) -> Iterator[tuple]:
+    """
+    Search the nonce (num2) space for DAO IDs whose hex starts with PREFIX and
+    ends with SUFFIX (case-insensitive, without 0x). Yields (nonce, address)
+    in nonce order, scanning slices of the space on WORKERS processes.
+    """
+    prefix = prefix.lower().removeprefix("0x")
+    suffix = suffix.lower()
+    if not (0 <= start <= stop <= 0x10000):
+        raise ValueError("nonce range must lie within 0..65536")
+
+    step = max(1, (stop - start) // (4 * (workers or os.cpu_count() or 1)))
+    slices = [(name, chain_id, version, lo, min(lo + step, stop), prefix, suffix) for lo in range(start, stop, step)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for matches in pool.map(_vanity_range, slices):
+            yield from matches
+
+
+if __name__ == "__main__":
+    # Example usage:
 
-customer_nonce = 0
+    customer_nonce = 0
 
-print("Sepolia:")
-version = 1
-address = pack_eth_address("syndicate", 11155111, version, customer_nonce)
-print(address)
+    print("Sepolia:")
+    version = 1
+    address = pack_eth_address("syndicate", 11155111, version, customer_nonce)
+    print(address)
 
-print("Mainnet:")
-address = pack_eth_address("syndicate", 1, version, customer_nonce)
-print(address)
+    print("Mainnet:")
+    address = pack_eth_address("syndicate", 1, version, customer_nonce)
+    print(address)
 
 
-print("Base:")
-address = pack_eth_address("towns", 8453, version, customer_nonce)
-print(address)
+    print("Base:")
+    address = pack_eth_address("towns", 8453, version, customer_nonce)
+    print(address)
 
 """
 Sepolia (syndicate):
@@ -1,4 +1,9 @@
-from eth_utils import to_bytes, to_hex
+from typing import Iterable, Tuple
+
+import numpy as np
+from eth_utils import keccak, to_bytes, to_hex
+
+from dao_id_gen import DAO_ID_DTYPE
 
 def unpack_eth_address(hex_address: str):
     """
@@ -37,7 +42,44 @@ def unpack_eth_address(hex_address: str):
         "checksum": checksum
     }
 
-# Example usage:
-packed_address = "0x73796e6469636174652e000000010000008e2647"
-unpacked = unpack_eth_address(packed_address)
-print(unpacked)
+def unpack_eth_addresses(hex_addresses: Iterable[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Batch version of unpack_eth_address that also verifies checksums.
+
+    Returns (records, invalid): a structured DAO_ID_DTYPE array (name,
+    chain_id, version, nonce) with the '.' padding still in the names, and the
+    indices of rows whose 3-byte keccak checksum does not match.
+    """
+    # Anything that is not a 20-byte hex address becomes a zero row, which fails the checksum
+    raw = np.frombuffer(b"".join(bytes.fromhex(a[2:]) if len(a) == 42 else bytes(20) for a in hex_addresses),
+                        dtype=np.uint8).reshape(-1, 20)
+    size = DAO_ID_DTYPE.itemsize
+    records = np.ascontiguousarray(raw[:, :size]).view(DAO_ID_DTYPE).reshape(-1)
+
+    buf = raw.tobytes()
+    expected = np.frombuffer(b"".join(keccak(buf[i:i + size])[:3] for i in range(0, len(buf), 20)),
+                             dtype=np.uint8).reshape(-1, 3)
+    valid = (expected == raw[:, size:]).all(axis=1)
+    return records, np.flatnonzero(~valid)
+
+
+def valid_dao_ids(hex_addresses: Iterable[str]) -> np.ndarray:
+    """
+    Boolean mask: which addresses are well-formed DAO IDs (valid checksum).
+    Each distinct address is hashed once, since logs repeat the same few DAOs.
+    """
+    hex_addresses = np.asarray([a.lower() for a in hex_addresses])
+    if not len(hex_addresses):
+        return np.zeros(0, dtype=bool)
+    distinct, inverse = np.unique(hex_addresses, return_inverse=True)
+    valid = np.ones(len(distinct), dtype=bool)
+    _, invalid = unpack_eth_addresses(distinct)
+    valid[invalid] = False
+    return valid[inverse.reshape(-1)]
+
+
+if __name__ == "__main__":
+    # Example usage:
+    packed_address = "0x73796e6469636174652e000000010000008e2647"
+    unpacked = unpack_eth_address(packed_address)
+    print(unpacked)
@@ -0,0 +1,131 @@
+"""
+Persistent registry of DAO IDs already used on chain, for collision checks.
+
+A Bloom filter answers "definitely not taken" without touching the exact
+index; only possible hits are confirmed against a sorted array of
+(address, chain_id) rows. Both are stored together in one .npz file, built
+from `index` output.
+"""
+
+import hashlib
+import math
+import os
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+
+DEFAULT_REGISTRY = ".eas-dao-ids.npz"
+
+
+def _address_bytes(address: str) -> bytes:
+    raw = bytes.fromhex(address[2:] if address.startswith("0x") else address)
+    if len(raw) != 20:
+        raise ValueError(f"Not a 20-byte address: {address}")
+    return raw
+
+
+class BloomFilter:
+    """Bit array with K positions per item (double hashing over blake2b)."""
+
+    def __init__(self, capacity: int, error_rate: float = 0.001, bits: Optional[np.ndarray] = None,
+                 hashes: Optional[int] = None):
+        self.capacity = capacity
+        nbytes = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2) // 8 + 1)
+        self.bits = bits if bits is not None else np.zeros(nbytes, dtype=np.uint8)
+        self.size = len(self.bits) * 8
+        self.hashes = hashes or max(1, round(self.size / capacity * math.log(2)))
+
+    def _positions(self, item: bytes) -> np.ndarray:
+        digest = hashlib.blake2b(item, digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return np.array([(h1 + i * h2) % self.size for i in range(self.hashes)], dtype=np.int64)
+
+    def add(self, item: bytes):
+        positions = self._positions(item)
+        np.bitwise_or.at(self.bits, positions >> 3, (1 << (positions & 7)).astype(np.uint8))
+
+    def __contains__(self, item: bytes) -> bool:
+        positions = self._positions(item)
+        return bool(np.all(self.bits[positions >> 3] & (1 << (positions & 7)).astype(np.uint8)))
+
+
+class DaoIdRegistry:
+    """Known DAO IDs per chain. `chains(address)` answers in well under a millisecond."""
+
+    def __init__(self, path: str = DEFAULT_REGISTRY, capacity: int = 1_000_000, error_rate: float = 0.001):
+        self.path = path
+        self.error_rate = error_rate
+        self.addresses = np.zeros(0, dtype="S20")        # sorted
+        self.chain_ids = np.zeros(0, dtype=np.uint32)    # aligned with addresses
+        self._pending: Dict[bytes, set] = {}
+
+        if path and os.path.exists(path):
+            with np.load(path) as stored:
+                self.addresses = stored["addresses"]
+                self.chain_ids = stored["chain_ids"]
+                self.bloom = BloomFilter(int(stored["capacity"]), error_rate, bits=stored["bloom"],
+                                         hashes=int(stored["hashes"]))
+        else:
+            self.bloom = BloomFilter(capacity, error_rate)
+
+    def __len__(self) -> int:
+        return len(self.addresses) + sum(len(chains) for chains in self._pending.values())
+
+    def add(self, address: str, chain_id: int) -> bool:
+        """Record ADDRESS as used on CHAIN_ID; returns False if it was already known there."""
+        raw = _address_bytes(address)
+        if chain_id in self._stored_chains(raw) or chain_id in self._pending.get(raw, ()):
+            return False
+        self._pending.setdefault(raw, set()).add(chain_id)
+        self.bloom.add(raw)
+        if len(self) > self.bloom.capacity:
+            self._regrow()
+        return True
+
+    def add_records(self, records: Iterable[dict]) -> int:
+        """Add the recipient of every indexer record; returns how many IDs were new."""
+        return sum(self.add(r["recipient"], r["chain_id"]) for r in records)
+
+    def _stored_chains(self, raw: bytes) -> List[int]:
+        start = np.searchsorted(self.addresses, raw, side="left")
+        end = np.searchsorted(self.addresses, raw, side="right")
+        return self.chain_ids[start:end].tolist()
+
+    def chains(self, address: str) -> List[int]:
+        """Chains ADDRESS is already used on (empty if it is free everywhere)."""
+        raw = _address_bytes(address)
+        if raw not in self.bloom:
+            return []
+        return sorted(set(self._stored_chains(raw)) | self._pending.get(raw, set()))
+
+    def taken(self, address: str) -> bool:
+        return bool(self.chains(address))
+
+    def _merged(self) -> Tuple[np.ndarray, np.ndarray]:
+        if not self._pending:
+            return self.addresses, self.chain_ids
+        rows = [(raw, chain_id) for raw, chains in self._pending.items() for chain_id in chains]
+        addresses = np.concatenate([self.addresses, np.array([r[0] for r in rows], dtype="S20")])
+        chain_ids = np.concatenate([self.chain_ids, np.array([r[1] for r in rows], dtype=np.uint32)])
+        order = np.lexsort((chain_ids, addresses))
+        return addresses[order], chain_ids[order]
+
+    def _regrow(self):
+        """Rebuild the Bloom filter at twice the capacity once it is full."""
+        self.addresses, self.chain_ids = self._merged()
+        self._pending = {}
+        self.bloom = BloomFilter(self.bloom.capacity * 2, self.error_rate)
+        for raw in np.unique(self.addresses):
+            self.bloom.add(bytes(raw).ljust(20, b"\0"))     # numpy drops trailing NULs from S20
+
+    def save(self):
+        """Merge pending IDs into the exact index and write the registry atomically."""
+        self.addresses, self.chain_ids = self._merged()
+        self._pending = {}
+        tmp = self.path + ".tmp"
+        with open(tmp, "wb") as f:
+            np.savez(f, addresses=self.addresses, chain_ids=self.chain_ids, bloom=self.bloom.bits,
+                     capacity=self.bloom.capacity, hashes=self.bloom.hashes)
+        os.replace(tmp, self.path)
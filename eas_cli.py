@@ -1,19 +1,43 @@
 #!/usr/bin/env python3
 """
 EAS Protocol CLI Tool
-Wraps forge commands for deploying schemas and creating attestations.
+Deploys schemas and creates attestations, signing with a Foundry keystore in process.
 """
 
 import os
 import sys
-import subprocess
+import csv
+import json
+import asyncio
+import socketserver
+import threading
+from functools import lru_cache
 from typing import Dict
 from dotenv import load_dotenv
 import click
 
-# from eth_abi import encode
 from eth_utils import keccak, to_checksum_address
 
+import offchain
+from advanced_tally import AdvancedVoteTally
+from attestation_store import AttestationStore
+from authority import AUTHORITY_SCHEMAS, AuthorityIndex
+from badges import BADGE_SCHEMAS, BadgeIndex
+from dao_id_gen import vanity_search
+from dao_registry import DEFAULT_REGISTRY, DaoIdRegistry
+from abi_codec import encode_call, schema_encoder
+from indexer import ATTESTED_TOPIC, Indexer, JsonlSink, iter_jsonl
+from metrics import METRICS, MetricsExporter, span
+from rpc_client import RpcError, RpcTransportError, get_client
+from schema_registry import SchemaRegistry
+from preflight import VoteCache, VotePreflight
+from query_api import DEFAULT_CACHE_SIZE, DaoState, QueryApi
+from relay import DEFAULT_QUEUE, DELEGATED_VOTE_SCHEMAS, VoteRelay
+from signer import Signer
+from snapshot import SnapshotSink, latest_snapshot, load_snapshot
+from tally import RESOLVER_VOTE_SCHEMAS, SimpleVoteTally
+from tx_sender import DEFAULT_JOURNAL, PipelinedSender
+
 # Load .env file
 load_dotenv()
 
@@ -87,9 +111,13 @@ def get_env_config() -> Dict[str, str]:
         click.echo("Required: CHAIN_ID, RPC_URL, FORGE_ACCOUNT, DAO_ID", err=True)
         sys.exit(1)
 
+    # RPC_URL may list several comma-separated endpoints for failover
+    rpc_urls = [url.strip() for url in rpc_url.split(",") if url.strip()]
+
     return {
         "chain_id": chain_id,
-        "rpc_url": rpc_url,
+        "rpc_url": rpc_urls[0],
+        "rpc_urls": rpc_urls,
         "forge_account": forge_account,
         "dao_id": dao_id
     }
@@ -97,61 +125,88 @@ def get_env_config() -> Dict[str, str]:
 def get_deployment_config(chain_id):
 
     if chain_id == 1:
-        rpc_url = 'https://eth.llamarpc.com'
+        rpc_urls = ['https://eth.llamarpc.com', 'https://ethereum-rpc.publicnode.com', 'https://eth.drpc.org']
         votes_resolver = '0x576c9f4C976e2E6AF9E7093F1A23Fa31B21D4cB3' # proxy
         entity_resolver = '0xf246C55a4f91f08c991F566fcF063156f67e6c03' # proxy
+        start_block = 23669823
     elif chain_id == 11155111:
-        rpc_url = 'https://ethereum-sepolia-rpc.publicnode.com'
+        rpc_urls = ['https://ethereum-sepolia-rpc.publicnode.com', 'https://sepolia.drpc.org']
         votes_resolver = '0xC8EA7C7651245728BE57c2d4C5638F8eF843b0E7'
         entity_resolver = '0x7106847Cc6c99E3D730D4f2a8312A905c0ad2ad7'
+        start_block = 9502547
     elif chain_id == 10:
-        rpc_url = 'https://optimism-rpc.publicnode.com'
+        rpc_urls = ['https://optimism-rpc.publicnode.com', 'https://mainnet.optimism.io', 'https://optimism.drpc.org']
         votes_resolver = '0x3d0Ee8700f3A2267a677504FfEdAE54A15ABBE7B'
         entity_resolver = '0x2829EE5e93cD1671140D8AE1fe7524Ba1F5AC6ad'
+        start_block = None
     elif chain_id == 11155420:
-        rpc_url = 'https://sepolia.optimism.io'
+        rpc_urls = ['https://sepolia.optimism.io', 'https://optimism-sepolia-rpc.publicnode.com']
         votes_resolver = ...
         entity_resolver = ...
+        start_block = None
     elif chain_id == 8453:
-        rpc_url = 'https://mainnet.base.org'
+        rpc_urls = ['https://mainnet.base.org', 'https://base-rpc.publicnode.com', 'https://base.drpc.org']
         votes_resolver = '0x83e02A6b7DA88d78a90Bdf7C0B8a9dd93624801c'
         entity_resolver = '0xEF28EB0D4186E5795ddD25E792697abFBabceC42'
+        start_block = None
     else:
         raise Exception(f"Chain ID unsupported: {chain_id}")
 
 
     return {
-        "rpc_url": rpc_url,
+        "rpc_url": rpc_urls[0],
+        "rpc_urls": rpc_urls,
         "votes_resolver": votes_resolver,
-        "entity_resolver": entity_resolver
+        "entity_resolver": entity_resolver,
+        "start_block": start_block    # resolver deployment block: nothing of ours exists before it
     }  
 
 
-def run_ext_command(binary, args: list) -> subprocess.CompletedProcess:
-    """Execute a forge command."""
-    cmd = [binary] + args
-    click.echo(f"Running: {' '.join(cmd)}")
+# Unlocked signers for this process, keyed by Foundry account name. The keystore
+# KDF runs once per account per session, not once per transaction.
+_SIGNERS: Dict[str, Signer] = {}
+
+
+def get_signer(forge_account: str) -> Signer:
+    """Unlock FORGE_ACCOUNT on first use and keep it for the session."""
+    if forge_account not in _SIGNERS:
+        try:
+            _SIGNERS[forge_account] = Signer.from_keystore(forge_account)
+        except (OSError, ValueError) as e:
+            raise click.ClickException(f"Could not unlock keystore '{forge_account}': {e}")
+    return _SIGNERS[forge_account]
+
+
+def send_transaction(rpc_urls: list, chain_id: int, forge_account: str, to: str, calldata: bytes) -> dict:
+    """Sign a call in process, broadcast it and wait for a successful receipt."""
+    rpc = get_client(rpc_urls)
+    signer = get_signer(forge_account)
 
-    print(" ".join(cmd))
     try:
-        result = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-            check=True
-        )
-        return result
-    except subprocess.CalledProcessError as e:
-        click.echo(f"Error executing command: {e}", err=True)
-        click.echo(f"stdout: {e.stdout}", err=True)
-        click.echo(f"stderr: {e.stderr}", err=True)
-        sys.exit(1)
+        with span("send"):
+            tx_hash = signer.send_transaction(rpc, chain_id, to, calldata)
+        click.echo(f"Sent {tx_hash} from {signer.address}", err=True)
+        receipt = rpc.wait_for_receipt(tx_hash)
+    except (RpcError, RpcTransportError, TimeoutError) as e:
+        raise click.ClickException(f"Transaction to {to} failed: {e}")
+
+    if int(receipt["status"], 16) != 1:
+        raise click.ClickException(f"Transaction {tx_hash} reverted")
+    return receipt
 
 
 @click.group()
-def cli():
+@click.option("--profile", is_flag=True, help="Print a per-stage timing breakdown to stderr on exit.")
+@click.option("--metrics-file", default=None, type=click.Path(dir_okay=False),
+              help="Export metrics here (JSON if it ends in .json, else a Prometheus textfile).")
+@click.option("--metrics-interval", default=15.0, show_default=True, help="Seconds between --metrics-file rewrites.")
+@click.pass_context
+def cli(ctx, profile: bool, metrics_file: str, metrics_interval: float):
     """EAS Protocol CLI - Deploy schemas and create attestations."""
-    pass
+    if metrics_file:
+        ctx.call_on_close(MetricsExporter(metrics_file, metrics_interval).start().stop)
+    if profile:
+        ctx.call_on_close(lambda: click.echo(METRICS.report(), err=True))
 
 
 # @cli.command()
@@ -171,72 +226,101 @@ def deploy(attestation_command: str, chainid: int):
     click.echo(f"Deploying schema for {attestation_command}")
     click.echo(f"Schema: {schema}")
 
-    schema_contract = SCHEMA_CONTRACTS[str(chainid)]
+    with span("encode"):
+        schema_contract, calldata = register_call(attestation_command, chainid)
 
-    resolver_label = RESOLVER[attestation_command]
-    if resolver_label:
-        resolver = config[resolver_label]
-    else:
-        resolver = '0x0000000000000000000000000000000000000000'
-
-    # Build forge command for schema deployment
-    # forge script is commonly used for deployments
-    
-    revocability = REVOCABILITY[attestation_command]
-
-    args = [
-        "send",
-        schema_contract,
-        "register(string,address,bool)(bytes32)",
-        schema,
-        resolver,
-        revocability,
-        "--rpc-url", config["rpc_url"],
-        "--account", env_config["forge_account"],
-        "--chain-id", str(chainid)
-    ]
-
-    result = run_ext_command("cast", args)
+    receipt = send_transaction(config["rpc_urls"], chainid, env_config["forge_account"], schema_contract, calldata)
     click.echo("Schema deployment initiated successfully!")
-    click.echo(result.stdout)
-
-@cli.command()
-@click.argument("chainid")
-def deployall(chainid:int):
-    for i, schema in enumerate(SCHEMAS.keys()):
-
-        print(i, schema)
+    click.echo(f"Transaction: {receipt['transactionHash']} (block {int(receipt['blockNumber'], 16)})")
+    return receipt
 
-        deploy(schema, int(chainid))
 
+def register_call(attestation_command: str, chainid: int) -> tuple:
+    """(SchemaRegistry address, register(...) calldata) for a schema on CHAINID."""
+    info = get_schema_registry().get(attestation_command, chainid)
+    return SCHEMA_CONTRACTS[str(chainid)], info.register_calldata()
 
-def get_schema_id(attestation_command: str, chainid: int):
-
-    schema = SCHEMAS[attestation_command]
 
-    deploy_config = get_deployment_config(chainid)
+_PREFLIGHTS: Dict[tuple, VotePreflight] = {}
 
-    resolver_label = RESOLVER[attestation_command]
 
-    if resolver_label:
-        resolver = deploy_config[resolver_label]
-    else:
-        resolver = '0x0000000000000000000000000000000000000000'
+def get_preflight(config: dict, snapshot_dir: str = None) -> VotePreflight:
+    """
+    Vote preflight for the session signer. Its cache starts from the latest
+    snapshot in SNAPSHOT_DIR (if any) and catches up with the chain's logs on
+    every use; without one, every vote is simulated.
+    """
+    chain_id = int(config["chain_id"])
+    key = (chain_id, snapshot_dir)
+    if key not in _PREFLIGHTS:
+        cache = VoteCache()
+        path = latest_snapshot(snapshot_dir) if snapshot_dir else None
+        if path:
+            store, covered = load_snapshot(path)
+            cache = VoteCache.from_store(store)
+            if chain_id in covered:
+                cache.blocks[chain_id] = covered[chain_id]
+        _PREFLIGHTS[key] = VotePreflight(get_client(config["rpc_urls"]), EAS_CONTRACTS[config["chain_id"]],
+                                         get_signer(config["forge_account"]).address, cache)
+
+    preflight = _PREFLIGHTS[key]
+    last = preflight.cache.blocks.get(chain_id)
+    if last is not None:
+        try:
+            chain_indexer(chain_id, 4, 0).run([preflight.cache], last + 1)
+        except (RpcError, RpcTransportError) as e:
+            click.echo(f"Warning: vote cache not caught up ({e}); checking against block {last}", err=True)
+    return preflight
+
+
+def get_sender(rpc_urls: list, chain_id: int, forge_account: str, journal: str) -> PipelinedSender:
+    """Pipelined sender for the session signer, resuming from JOURNAL."""
+    return PipelinedSender(get_client(rpc_urls), get_signer(forge_account), chain_id, journal_path=journal)
 
-    resolver = to_checksum_address(resolver)
-    revocable = REVOCABILITY[attestation_command]
 
-    # print(["string", "address", "bool"], [schema, resolver, revocable == "true"])
+@cli.command()
+@click.argument("chainid")
+@click.option("--journal", default=DEFAULT_JOURNAL, show_default=True, help="Transaction journal used to resume after a crash.")
+def deployall(chainid:int, journal: str):
+    """Register every schema on CHAINID, broadcasting all registrations back to back."""
+    chainid = int(chainid)
+    config = get_deployment_config(chainid)
+    env_config = get_env_config()
+    sender = get_sender(config["rpc_urls"], chainid, env_config["forge_account"], journal)
 
-    # abi.encodePacked equivalent:
-    packed = b""
-    packed += schema.encode("utf-8")           # string → utf-8 bytes
-    packed += bytes.fromhex(resolver[2:])      # address → 20 bytes
-    packed += b"\x01" if (revocable == "true") else b"\x00"  # bool → 1 byte
+    try:
+        for i, schema in enumerate(SCHEMAS.keys()):
+            key = f"deploy:{chainid}:{get_schema_id(schema, chainid)}"
+            if sender.is_confirmed(key):
+                click.echo(f"{i} {schema}: already registered")
+                continue
+            click.echo(f"{i} {schema}")
+            with span("encode"):
+                schema_contract, calldata = register_call(schema, chainid)
+            with span("send"):
+                sender.submit(key, schema_contract, calldata)
+
+        receipts = sender.wait()
+    except (RpcError, RpcTransportError, TimeoutError) as e:
+        raise click.ClickException(f"Deployment failed: {e}")
+
+    # The sender also finishes other jobs' transactions resumed from the journal; report only this one's
+    for key, receipt in receipts.items():
+        if not key.startswith(f"deploy:{chainid}:"):
+            continue
+        status = "ok" if int(receipt["status"], 16) == 1 else "REVERTED"
+        click.echo(f"{key}: {receipt['transactionHash']} block {int(receipt['blockNumber'], 16)} {status}")
+
+
+@lru_cache(maxsize=None)
+def get_schema_registry() -> SchemaRegistry:
+    """Schema UIDs, field layouts and resolvers for every chain in SCHEMA_CONTRACTS, built once."""
+    return SchemaRegistry(SCHEMAS, RESOLVER, {name: value == "true" for name, value in REVOCABILITY.items()},
+                          get_deployment_config, [int(chain_id) for chain_id in SCHEMA_CONTRACTS])
 
-    uid = keccak(packed).hex()
 
-    return uid
+def get_schema_id(attestation_command: str, chainid: int):
+    return get_schema_registry().get(attestation_command, int(chainid)).uid
 
 
 def normalize_bytes32(val: str) -> str:
@@ -257,9 +341,53 @@ def normalize_bytes32(val: str) -> str:
     return "0x" + hexstr.lower()
 
 
+ZERO_REFUID = "0x0000000000000000000000000000000000000000000000000000000000000000"
+
+
+def split_refuid(attestation_command: str, args: tuple):
+    """
+    Split the trailing refUID off ARGS, per OPTIONAL_REFUID / REQUIRES_REFUID.
+    Returns (schema_args, refuid); raises ValueError on a bad argument count or refUID.
+    """
+    n_fields = len(SCHEMAS[attestation_command].split(","))
+    args = tuple(args)
+
+    if attestation_command in OPTIONAL_REFUID:
+        allowed = (n_fields, n_fields + 1)
+    elif attestation_command in REQUIRES_REFUID:
+        allowed = (n_fields + 1,)
+    else:
+        allowed = (n_fields,)
+
+    if len(args) not in allowed:
+        expected = " or ".join(str(n) for n in allowed)
+        raise ValueError(f"Expected {expected} arguments for {attestation_command}, received {len(args)}")
+
+    if len(args) == n_fields:
+        return args, ZERO_REFUID
+
+    refuid = args[-1]
+    if len(refuid) != len(ZERO_REFUID) or not refuid.startswith("0x"):
+        raise ValueError(f"refUID must be a 0x-prefixed 32-byte hex string: {refuid}")
+    return args[:-1], refuid.lower()
+
+
+def normalize_args(attestation_command: str, args: tuple) -> list:
+    """Normalize schema arguments (auto-pad bytes32)."""
+    normalized_args = []
+    for arg, typ in zip(args, schema_encoder(SCHEMAS[attestation_command]).types):
+        if typ == "bytes32":
+            normalized_args.append(normalize_bytes32(arg))
+        else:
+            normalized_args.append(arg)
+    return normalized_args
+
+
 @cli.command()
 @click.argument("attestation_command", type=click.Choice(list(SCHEMAS.keys()), case_sensitive=False), required=False)
-def schema_hash(attestation_command: str = None):
+@click.option("--chainid", type=int, default=lambda: os.getenv("CHAIN_ID"),
+              help="Chain whose resolvers the UIDs are computed for (default: CHAIN_ID from .env).")
+def schema_hash(attestation_command: str = None, chainid: int = None):
     """Generate the Keccak-256 hash (schema UID) for schemas.
 
     If ATTESTATION_COMMAND is provided, generates the hash for that specific schema.
@@ -269,32 +397,26 @@ def schema_hash(attestation_command: str = None):
 
       eas_cli.py schema-hash
 
-      eas_cli.py schema-hash INSTANTIATE
+      eas_cli.py schema-hash INSTANTIATE --chainid 11155111
     """
+    if chainid is None:
+        raise click.UsageError("Pass --chainid or set CHAIN_ID: schema UIDs depend on the chain's resolvers")
+
+    registry = get_schema_registry()
     if attestation_command:
         # Generate hash for specific schema
-        attestation_command = attestation_command.upper()
-        schema = SCHEMAS[attestation_command]
-        schema_uid = get_schema_id(attestation_command)
-        revocable = REVOCABILITY[attestation_command]
-
-        click.echo(f"\nSchema: {attestation_command}")
-        click.echo(f"  Definition: {schema}")
-        click.echo(f"  Revocable: {revocable}")
-        click.echo(f"  UID: 0x{schema_uid}")
+        infos = [registry.get(attestation_command.upper(), chainid)]
     else:
         # Generate hashes for all schemas
         click.echo("\nGenerating schema UIDs for all schemas:\n")
-        for schema_name in SCHEMAS.keys():
-            schema = SCHEMAS[schema_name]
-            schema_uid = get_schema_id(schema_name)
-            revocable = REVOCABILITY[schema_name]
+        infos = registry.chain(chainid)
 
-            click.echo(f"{schema_name}:")
-            click.echo(f"  Definition: {schema}")
-            click.echo(f"  Revocable: {revocable}")
-            click.echo(f"  UID: 0x{schema_uid}")
-            click.echo()
+    for info in infos:
+        click.echo(f"{info.name}:")
+        click.echo(f"  Definition: {info.schema}")
+        click.echo(f"  Revocable: {str(info.revocable).lower()}")
+        click.echo(f"  UID: 0x{info.uid}")
+        click.echo()
 
 
 @cli.command()
@@ -307,31 +429,71 @@ def schema_hashes(chainid:int):
       PERMA_INSTANTIATE : 0xe85e53a6d27f83a8d9e6ee94d01a312f54e82de919a708c17a9da6a899258cd1
       ...
     """
+    infos = get_schema_registry().chain(int(chainid))
 
     click.echo("FOR WEB:")
     click.echo("{")
-    for schema_name in SCHEMAS.keys():
-        schema_uid = get_schema_id(schema_name, int(chainid))
-        click.echo(f"   '{schema_name}' : '0x{schema_uid}',")
+    for info in infos:
+        click.echo(f"   '{info.name}' : '0x{info.uid}',")
     click.echo("}")
 
     click.echo("FOR GOLDKSKY:")
-    for schema_name in SCHEMAS.keys():
-        schema_uid = get_schema_id(schema_name, int(chainid))
-        click.echo(f"   OR topics like '%{schema_uid}%'")
+    for info in infos:
+        click.echo(f"   OR topics like '%{info.uid}%'")
 
     click.echo("FOR YAML:")
     click.echo("cmd:")
     click.echo(f"  {chainid}:")
-    for schema_name in SCHEMAS.keys():
-        schema_uid = get_schema_id(schema_name, int(chainid))
-        click.echo(f"    {schema_name}: '0x{schema_uid}'")
+    for info in infos:
+        click.echo(f"    {info.name}: '0x{info.uid}'")
+
+
+@cli.command()
+@click.argument("chainids", nargs=-1, type=int)
+def verify(chainids: tuple):
+    """Check that every schema is registered, as defined here, on each chain.
+
+    Issues one batched getSchema request per chain, all chains concurrently.
+    Checks every chain in SCHEMA_CONTRACTS unless CHAINIDS are given, and
+    exits with status 1 if anything is missing or differs.
+
+    Example:
+
+      eas_cli.py verify 1 11155111
+    """
+    chainids = chainids or [int(chain_id) for chain_id in SCHEMA_CONTRACTS]
+    targets = {}
+    for chain_id in chainids:
+        if str(chain_id) not in SCHEMA_CONTRACTS:
+            raise click.ClickException(f"No SchemaRegistry known for chain {chain_id}")
+        targets[chain_id] = (get_client(get_deployment_config(chain_id)["rpc_urls"]), SCHEMA_CONTRACTS[str(chain_id)])
+
+    failed = False
+    for chain_id, rows in get_schema_registry().verify(targets).items():
+        if isinstance(rows, Exception):
+            click.echo(f"{chain_id}: unreachable ({rows})", err=True)
+            failed = True
+            continue
+        for row in rows:
+            failed = failed or row["status"] != "ok"
+            detail = f" {row['detail']}" if "detail" in row else ""
+            click.echo(f"{chain_id} {row['schema']:<24} {row['uid']} {row['status']}{detail}")
+
+    if failed:
+        sys.exit(1)
 
 
 @cli.command()
 @click.argument("attestation_command", type=click.Choice(list(SCHEMAS.keys()), case_sensitive=False))
 @click.argument("args", nargs=-1)
-def attest(attestation_command: str, args: tuple):
+@click.option("--offchain", "offchain_mode", is_flag=True, help="Sign an EIP-712 offchain attestation instead of sending a transaction.")
+@click.option("--eas-version", default=None, help="EAS contract version for the offchain EIP-712 domain (read from the contract if omitted).")
+@click.option("--no-preflight", "preflight", is_flag=True, flag_value=False, default=True,
+              help="Send a vote without checking it against VotesResolver first.")
+@click.option("--snapshot-dir", default=lambda: os.getenv("SNAPSHOT_DIR"),
+              help="`index` snapshots used as the vote preflight cache (default: SNAPSHOT_DIR from .env).")
+def attest(attestation_command: str, args: tuple, offchain_mode: bool, eas_version: str, preflight: bool,
+           snapshot_dir: str):
     """Create an attestation with the given arguments.
 
     DAO_UUID: Address of the DAO (used as recipient)
@@ -348,101 +510,707 @@ def attest(attestation_command: str, args: tuple):
       eas_cli.py attest GRANT 0x123... 0xabc... CREATE_PROPOSAL 1 ""
 
       eas_cli.py attest SIMPLE_VOTE 0x123... 0xdef... 0xabc... 1 "I support this" 100
+
+      eas_cli.py attest --offchain SIMPLE_VOTE 1 "I support this" 0xdef...
     """
     attestation_command = attestation_command.upper()
+
+    try:
+        if offchain_mode:
+            click.echo(json.dumps(create_offchain_attestation(attestation_command, args, eas_version)))
+            return
+        _, uids = create_attestation(attestation_command, args, preflight, snapshot_dir)
+    except ValueError as e:
+        click.echo(f"Error: {e}", err=True)
+        click.echo(f"Schema fields: {SCHEMAS[attestation_command]}", err=True)
+        sys.exit(1)
+
+    click.echo("✅ Attestation created successfully!")
+    for uid in uids:
+        click.echo(f"UID: {uid}")
+
+
+def build_attestation_request(attestation_command: str, args: tuple, refuid: str, dao_id: str) -> tuple:
+    """ABI-encode the schema payload and build the AttestationRequestData tuple."""
+    data = schema_encoder(SCHEMAS[attestation_command]).encode(normalize_args(attestation_command, args))
+    return (
+        dao_id,                                         # recipient
+        0,                                              # expirationTime
+        REVOCABILITY[attestation_command] == "true",    # revocable
+        refuid,                                         # refUID
+        data,                                           # data
+        0,                                              # value
+    )
+
+
+def create_attestation(attestation_command: str, args: tuple, preflight: bool = True, snapshot_dir: str = None) -> tuple:
+    """
+    Validate, encode, sign and send one attestation. Returns (receipt, uids).
+    Raises ValueError on bad arguments, or on a vote VotesResolver would revert.
+    """
     config = get_env_config()
-    schema = SCHEMAS[attestation_command]
+    chain_id = int(config["chain_id"])
+    eas_contract = EAS_CONTRACTS[config["chain_id"]]
+    schema_uid = get_schema_id(attestation_command, chain_id)
+
+    args, refuid = split_refuid(attestation_command, args)
 
-    dao_id = config['dao_id']
+    click.echo(f"Creating attestation: {attestation_command}", err=True)
+    click.echo(f"Arguments: {list(args)}", err=True)
 
-    schema_uid = get_schema_id(attestation_command, int(config["chain_id"]))
+    with span("encode"):
+        request = build_attestation_request(attestation_command, args, refuid, config["dao_id"])
+        calldata = encode_call(ATTEST_SIG, [("0x" + schema_uid, request)])
+
+    if preflight and attestation_command in RESOLVER_VOTE_SCHEMAS:
+        try:
+            with span("preflight"):
+                reason = get_preflight(config, snapshot_dir).check([(request[0], refuid, calldata)])[0]
+        except (RpcError, RpcTransportError) as e:
+            raise click.ClickException(f"Vote preflight failed: {e} (--no-preflight skips it)")
+        if reason:
+            raise ValueError(f"Vote would revert: {reason}")
+
+    receipt = send_transaction(config["rpc_urls"], chain_id, config["forge_account"], eas_contract, calldata)
+    click.echo(f"Transaction: {receipt['transactionHash']} (block {int(receipt['blockNumber'], 16)})", err=True)
+    return receipt, attested_uids(receipt, eas_contract)
+
+
+def offchain_domain(config: dict, version: str = None) -> dict:
+    """EIP-712 domain for offchain attestations on the configured chain."""
     eas_contract = EAS_CONTRACTS[config["chain_id"]]
+    if version is None:
+        try:
+            version = offchain.eas_version(get_client(config["rpc_urls"]), eas_contract)
+        except (RpcError, RpcTransportError) as e:
+            raise click.ClickException(f"Could not read EAS version, pass --eas-version: {e}")
+    return offchain.domain(int(config["chain_id"]), eas_contract, version)
 
-    # Parse schema fields (types only)
-    schema_fields = [f.strip().split()[0] for f in schema.split(",")]
 
-    REFUID_LEN = len("0x0000000000000000000000000000000000000000000000000000000000000000")
+def create_offchain_attestation(attestation_command: str, args: tuple, version: str = None) -> dict:
+    """Validate, encode and sign one offchain attestation. Raises ValueError on bad arguments."""
+    config = get_env_config()
+    args, refuid = split_refuid(attestation_command, args)
+    recipient, _, revocable, refuid, data, _ = build_attestation_request(attestation_command, args, refuid, config["dao_id"])
 
-    check = False
+    dom = offchain_domain(config, version)
+    message = offchain.build_message("0x" + get_schema_id(attestation_command, int(config["chain_id"])),
+                                     recipient, data, refuid, revocable)
+    return offchain.sign(get_signer(config["forge_account"]).private_key, dom, message)
 
-    if attestation_command in OPTIONAL_REFUID:
 
-        if len(args) == len(schema_fields):
-            check = True
-            refuid = "0x0000000000000000000000000000000000000000000000000000000000000000" 
-        elif (len(args) == len(schema_fields)) + 1:
-            check = True
-            refuid = args[-1]
-            args = args[:-1]
-            assert len(refuid) == REFUID_LEN
+ATTEST_SIG = "attest((bytes32,(address,uint64,bool,bytes32,bytes,uint256)))"
 
-    elif attestation_command in REQUIRES_REFUID:
+MULTI_ATTEST_SIG = "multiAttest((bytes32,(address,uint64,bool,bytes32,bytes,uint256)[])[])"
 
-        if (len(args) == len(schema_fields)) + 1:
-            check = True
-            refuid = args[-1]
-            args = args[:-1]
-            assert len(refuid) == REFUID_LEN
 
+def read_batch_rows(path: str) -> list:
+    """
+    Read the raw rows of a JSONL or CSV batch file: one string per non-blank
+    JSONL line, or one dict per CSV record. `parse_batch_row` turns each into
+    an (attestation_command, args, refUID) row.
+    """
+    with open(path, newline="") as f:
+        if path.lower().endswith(".csv"):
+            return list(csv.DictReader(f))
+        return [line for line in f if line.strip()]
+
+
+def parse_batch_row(raw) -> dict:
+    """
+    One row from `read_batch_rows` as a dict; raises ValueError if it is
+    malformed. In CSV files `args` is a JSON array and `refUID` may be left
+    empty.
+    """
+    if isinstance(raw, str):
+        try:
+            row = json.loads(raw)
+        except ValueError as e:
+            raise ValueError(f"invalid JSON: {e}")
+        if not isinstance(row, dict):
+            raise ValueError("expected a JSON object")
+        return row
+    if not raw.get("attestation_command"):
+        raise ValueError("no attestation_command column")
+    try:
+        args = json.loads(raw.get("args") or "[]")
+    except ValueError as e:
+        raise ValueError(f"args is not valid JSON: {e}")
+    return {"attestation_command": raw["attestation_command"], "args": args, "refUID": raw.get("refUID") or None}
+
+
+def prepare_batch_row(row: dict, dao_id: str) -> tuple:
+    """Validate one batch row and return (attestation_command, AttestationRequestData)."""
+    if not isinstance(row.get("attestation_command"), str):
+        raise ValueError("attestation_command must be a string")
+    attestation_command = row["attestation_command"].upper()
+    if attestation_command not in SCHEMAS:
+        raise ValueError(f"Unknown attestation command: {attestation_command}")
+    if not isinstance(row.get("args", []), list):
+        raise ValueError("args must be a JSON array")
+
+    args = tuple(str(a) if isinstance(a, (int, float)) and not isinstance(a, bool) else a for a in row.get("args", []))
+    if row.get("refUID"):
+        args = args + (row["refUID"],)
+    args, refuid = split_refuid(attestation_command, args)
+    return attestation_command, build_attestation_request(attestation_command, args, refuid, dao_id)
+
+
+def attested_uids(receipt: dict, eas_contract: str) -> list:
+    """UIDs from the Attested events of a receipt, in emission order."""
+    return ["0x" + log["data"][2:66] for log in receipt.get("logs", [])
+            if log["address"].lower() == eas_contract.lower() and log["topics"][0] == ATTESTED_TOPIC]
+
+
+@cli.command()
+@click.argument("batch_file", type=click.Path(exists=True, dir_okay=False))
+@click.option("--chunk-size", default=50, show_default=True, help="Attestations per multiAttest transaction.")
+@click.option("--journal", default=DEFAULT_JOURNAL, show_default=True, help="Transaction journal used to resume after a crash.")
+@click.option("--offchain", "offchain_mode", is_flag=True, help="Sign EIP-712 offchain attestations (JSONL on stdout) instead of sending transactions.")
+@click.option("--workers", default=None, type=int, help="Signing processes for --offchain (default: CPU count).")
+@click.option("--eas-version", default=None, help="EAS contract version for the offchain EIP-712 domain (read from the contract if omitted).")
+@click.option("--no-preflight", "preflight", is_flag=True, flag_value=False, default=True,
+              help="Send votes without checking them against VotesResolver first.")
+@click.option("--snapshot-dir", default=lambda: os.getenv("SNAPSHOT_DIR"),
+              help="`index` snapshots used as the vote preflight cache (default: SNAPSHOT_DIR from .env).")
+def attest_batch(batch_file: str, chunk_size: int, journal: str, offchain_mode: bool, workers: int, eas_version: str,
+                 preflight: bool, snapshot_dir: str):
+    """Submit many attestations through EAS multiAttest.
+
+    BATCH_FILE: JSONL or CSV file of (attestation_command, args, refUID) rows.
+    Rows are grouped by schema UID and sent in chunks of --chunk-size. All
+    chunks are broadcast back to back and confirmed together; re-running the
+    same file resumes from --journal. The resulting UIDs are printed as JSON
+    lines mapped back to their input row.
+
+    Votes are preflighted first: if any would revert (voting not open,
+    already voted, wrong DAO), nothing is sent.
+
+    Examples:
+
+      eas_cli.py attest-batch badges.jsonl
+
+      eas_cli.py attest-batch grants.csv --chunk-size 100
+
+      eas_cli.py attest-batch votes.jsonl --offchain > signed.jsonl
+    """
+    config = get_env_config()
+    chain_id = int(config["chain_id"])
+    eas_contract = EAS_CONTRACTS[config["chain_id"]]
+
+    # Validate every row before sending anything
+    groups, errors = {}, []
+    with span("encode"):
+        for i, raw in enumerate(read_batch_rows(batch_file)):
+            try:
+                attestation_command, request = prepare_batch_row(parse_batch_row(raw), config["dao_id"])
+            except (KeyError, ValueError) as e:
+                errors.append(f"row {i}: {e}")
+                continue
+            schema_uid = get_schema_id(attestation_command, chain_id)
+            groups.setdefault(schema_uid, []).append((i, attestation_command, request))
+
+    if errors:
+        for error in errors:
+            click.echo(f"Error: {error}", err=True)
+        sys.exit(1)
+
+    if offchain_mode:
+        dom = offchain_domain(config, eas_version)
+        rows = (("0x" + schema_uid, recipient, data, refuid, revocable)
+                for schema_uid, entries in groups.items()
+                for _, _, (recipient, _, revocable, refuid, data, _) in entries)
+        private_key = get_signer(config["forge_account"]).private_key
+        # sign_many is lazy: drain it inside the span so it times the signing, not the output
+        with span("offchain_sign"):
+            signed = list(offchain.sign_many(private_key, dom, rows, workers=workers))
+        order = [(i, command) for entries in groups.values() for i, command, _ in entries]
+        for (row_index, attestation_command), attestation in zip(order, signed):
+            click.echo(json.dumps({"row": row_index, "attestation_command": attestation_command, **attestation}))
+        return
+
+    with open(batch_file, "rb") as f:
+        batch_id = keccak(f.read()).hex()[:16]
+    sender = get_sender(config["rpc_urls"], chain_id, config["forge_account"], journal)
+
+    chunks, pending = {}, []
+    for schema_uid, entries in groups.items():
+        for start in range(0, len(entries), chunk_size):
+            chunk = entries[start:start + chunk_size]
+            key = f"batch:{chain_id}:{batch_id}:{schema_uid}:{start}:{chunk_size}"
+            chunks[key] = (schema_uid, chunk)
+            if sender.is_confirmed(key):
+                click.echo(f"Skipping {len(chunk)} {chunk[0][1]} attestations (already confirmed)", err=True)
+            else:
+                pending.append(key)
+
+    # Reject votes VotesResolver would revert before anything is signed
+    votes = []
+    for key in pending:
+        schema_uid, chunk = chunks[key]
+        votes += [(i, schema_uid, request) for i, command, request in chunk if command in RESOLVER_VOTE_SCHEMAS]
+    if votes and preflight:
+        checks = [(request[0], request[3], encode_call(ATTEST_SIG, [("0x" + schema_uid, request)]))
+                  for _, schema_uid, request in votes]
+        try:
+            with span("preflight"):
+                reasons = get_preflight(config, snapshot_dir).check(checks)
+        except (RpcError, RpcTransportError) as e:
+            raise click.ClickException(f"Vote preflight failed: {e} (--no-preflight skips it)")
+        rejected = [f"row {i}: vote would revert ({reason})" for (i, _, _), reason in zip(votes, reasons) if reason]
+        if rejected:
+            for error in rejected:
+                click.echo(f"Error: {error}", err=True)
+            sys.exit(1)
+
+    try:
+        for key in pending:
+            schema_uid, chunk = chunks[key]
+            click.echo(f"Submitting {len(chunk)} {chunk[0][1]} attestations", err=True)
+            with span("encode"):
+                calldata = encode_call(MULTI_ATTEST_SIG, [[("0x" + schema_uid, [request for _, _, request in chunk])]])
+            with span("send"):
+                sender.submit(key, eas_contract, calldata)
+
+        receipts = sender.wait()
+    except (RpcError, RpcTransportError, TimeoutError) as e:
+        raise click.ClickException(f"Batch submission failed: {e}")
+
+    failed = 0
+    for key, (_, chunk) in chunks.items():
+        receipt = receipts.get(key) or sender.confirmed_receipt(key)
+        uids = attested_uids(receipt, eas_contract)
+
+        if len(uids) != len(chunk):
+            click.echo(f"Error: expected {len(chunk)} Attested events, found {len(uids)} in {receipt.get('transactionHash')}", err=True)
+            failed += 1
+            continue
+
+        for (row_index, attestation_command, _), uid in zip(chunk, uids):
+            click.echo(json.dumps({"row": row_index, "attestation_command": attestation_command, "uid": uid}))
+
+    if failed:
+        sys.exit(1)
+
+
+def chain_indexer(chain_id: int, workers: int, confirmations: int, reorg_window: int = 0) -> Indexer:
+    """Indexer over every protocol schema deployed on CHAIN_ID."""
+    config = get_deployment_config(chain_id)
+    schemas = {uid: (info.name, info.schema) for uid, info in get_schema_registry().by_uid(chain_id).items()}
+    return Indexer(chain_id, get_client(config["rpc_urls"]), EAS_CONTRACTS[str(chain_id)], schemas,
+                   workers=workers, confirmations=confirmations, reorg_window=reorg_window)
+
+
+@cli.command()
+@click.argument("chainids", nargs=-1, type=int, required=True)
+@click.option("--from-block", type=int, default=None, help="First block to scan (default: the resolver deployment block).")
+@click.option("--to-block", type=int, default=None, help="Last block to scan (default: chain head).")
+@click.option("--output", default=None,
+              help="JSONL file to append records to ('-' for stdout; the default unless --snapshot-dir is given).")
+@click.option("--workers", default=4, show_default=True, help="Concurrent eth_getLogs requests per chain.")
+@click.option("--confirmations", default=0, show_default=True, help="Stay this many blocks behind the head.")
+@click.option("--follow", is_flag=True, help="Keep tailing new blocks after the backfill.")
+@click.option("--snapshot-dir", default=None, help="Keep indexed state in snapshots here, resuming from the latest.")
+@click.option("--snapshot-interval", default=300.0, show_default=True, help="Seconds between snapshots.")
+@click.option("--reorg-window", default=64, show_default=True,
+              help="Blocks re-read on restart or after a reorg (held out of the snapshot store).")
+def index(chainids: tuple, from_block: int, to_block: int, output: str, workers: int, confirmations: int, follow: bool,
+          snapshot_dir: str, snapshot_interval: float, reorg_window: int):
+    """Stream the protocol's Attested / Revoked events as decoded JSONL records.
+
+    Each chain is scanned concurrently from the resolver deployment block
+    (or --from-block); attestation bodies are fetched and decoded.
+
+    With --snapshot-dir, records are also kept in a columnar store that is
+    snapshotted periodically and on exit. A restart loads the latest snapshot
+    and only scans the blocks after it.
+
+    Examples:
+
+      eas_cli.py index 11155111
+
+      eas_cli.py index 1 11155111 --output attestations.jsonl --follow
+
+      eas_cli.py index 1 11155111 --snapshot-dir snapshots --follow
+    """
+    store, covered = None, {}
+    if snapshot_dir:
+        path = latest_snapshot(snapshot_dir)
+        if path:
+            with span("snapshot_load"):
+                store, covered = load_snapshot(path)
+            click.echo(f"Loaded {path}: {len(store)} attestations", err=True)
+        else:
+            store = AttestationStore(SCHEMAS)
+
+    starts = {}
+    for chain_id in chainids:
+        if str(chain_id) not in EAS_CONTRACTS:
+            raise click.ClickException(f"No EAS contract known for chain {chain_id}")
+        if from_block is not None:
+            starts[chain_id] = from_block
+        elif chain_id in covered:
+            starts[chain_id] = covered[chain_id] + 1
+        else:
+            starts[chain_id] = get_deployment_config(chain_id)["start_block"]
+        if starts[chain_id] is None:
+            raise click.ClickException(f"No known deployment block for chain {chain_id}; pass --from-block")
+
+    sinks = []
+    if output or not snapshot_dir:
+        sinks.append(JsonlSink(output or "-"))
+    if snapshot_dir:
+        sinks.append(SnapshotSink(store, snapshot_dir, snapshot_interval, reorg_window, covered=covered))
+    errors = []
+
+    def run(chain_id):
+        try:
+            indexer = chain_indexer(chain_id, workers, confirmations, reorg_window if snapshot_dir else 0)
+            last = indexer.run(sinks, starts[chain_id], to_block, follow)
+            click.echo(f"Chain {chain_id}: indexed blocks {starts[chain_id]}..{last}", err=True)
+        except (RpcError, RpcTransportError) as e:
+            errors.append(f"Chain {chain_id}: {e}")
+
+    threads = [threading.Thread(target=run, args=(chain_id,), daemon=True) for chain_id in chainids]
+    for thread in threads:
+        thread.start()
+    try:
+        for thread in threads:
+            while thread.is_alive():
+                thread.join(0.5)
+    finally:
+        for sink in sinks:
+            sink.close()
+
+    if errors:
+        raise click.ClickException("; ".join(errors))
+
+
+@cli.command("tally")
+@click.argument("records_file", type=click.Path(exists=True))
+@click.argument("proposal_ids", nargs=-1)
+@click.option("--badge", "badge_ids", multiple=True,
+              help="Only count voters holding this badge definition at the proposal's start (repeatable).")
+def tally_votes(records_file: str, proposal_ids: tuple, badge_ids: tuple):
+    """Tally vote results from `index` output.
+
+    RECORDS_FILE is a JSONL file or an `index --snapshot-dir` directory.
+    With --badge, a vote only counts if the voter held one of the badges
+    (IDENTITY_BADGE, not expired, revoked or deleted) at `startts`.
+
+    Prints one JSON line per proposal (all proposals if none are given) with
+    For / Against / Abstain counts and the quorum / approval outcome, plus
+    the approval, weighted or ranked-choice result of ADVANCED_VOTE ballots
+    under "advanced". Malformed ballots are reported on stderr.
+    Proposals and proposal types only count if their attester held the
+    matching GRANT at the time; DELETEs of others' votes need the DELETE bit.
+
+    Example:
+
+      eas_cli.py tally attestations.jsonl 0xPROPOSAL_ID
+    """
+    authority = AuthorityIndex()
+    badges = BadgeIndex(authorize_delete=authority.allows)
+    if os.path.isdir(records_file):
+        path = latest_snapshot(records_file)
+        if path is None:
+            raise click.ClickException(f"No snapshot in {records_file}")
+        with span("snapshot_load"):
+            store, _ = load_snapshot(path)
+        with span("load"):
+            for record in store.records(AUTHORITY_SCHEMAS):
+                authority.apply(record)
+            if badge_ids:
+                badges.extend(store.records(BADGE_SCHEMAS))
     else:
-        if len(args) == len(schema_fields):
-            check = True
-            refuid = "0x0000000000000000000000000000000000000000000000000000000000000000" 
-
-    if not check:
-        click.echo(f"Error: Expected {len(schema_fields)} arguments for {attestation_command}", err=True)
-        click.echo(f"Schema fields: {schema}", err=True)
-        click.echo(f"Received {len(args)} arguments", err=True)
+        store = AttestationStore(SCHEMAS)
+        with span("load"):
+            for record in iter_jsonl(records_file):
+                authority.apply(record)
+                badges.apply(record)
+                store.write(record)
+
+    badge_ids = [normalize_bytes32(b) for b in badge_ids]
+    eligible = (lambda proposal: badges.eligible(badge_ids, proposal.start)) if badge_ids else None
+    advanced = AdvancedVoteTally()
+    with span("tally"):
+        engine = SimpleVoteTally.from_store(store, authorize_delete=authority.allows, authorize=authority.allows,
+                                            eligible=eligible, advanced=advanced)
+    for ballot in advanced.quarantine:
+        click.echo(f"Quarantined ballot {ballot['uid']} on {ballot['proposal_id']}: {ballot['error']}", err=True)
+
+    proposal_ids = [normalize_bytes32(p) for p in proposal_ids] or None
+    for proposal_id in proposal_ids or []:
+        if proposal_id not in engine.proposals:
+            raise click.ClickException(f"Proposal not found in {records_file}: {proposal_id}")
+
+    with span("results"):
+        for result in engine.results(proposal_ids):
+            click.echo(json.dumps(result))
+
+
+@cli.command("dao-ids-build")
+@click.argument("records_files", nargs=-1, required=True, type=click.Path(exists=True, dir_okay=False))
+@click.option("--registry", default=DEFAULT_REGISTRY, show_default=True, help="Known DAO ID registry file.")
+def dao_ids_build(records_files: tuple, registry: str):
+    """Add every recipient in `index` output to the known DAO ID registry.
+
+    Example:
+
+      eas_cli.py dao-ids-build attestations.jsonl
+    """
+    known = DaoIdRegistry(registry)
+    added = sum(known.add_records(iter_jsonl(path)) for path in records_files)
+    known.save()
+    click.echo(f"Added {added} DAO IDs; {len(known)} known in {registry}")
+
+
+@cli.command("dao-id-check")
+@click.argument("addresses", nargs=-1, required=True)
+@click.option("--registry", default=DEFAULT_REGISTRY, show_default=True, help="Known DAO ID registry file.")
+def dao_id_check(addresses: tuple, registry: str):
+    """Check whether DAO IDs are already used on any indexed chain.
+
+    Exits with status 1 if any of ADDRESSES is taken.
+
+    Example:
+
+      eas_cli.py dao-id-check 0x73796e6469636174652e00aa36a701000079e0f1
+    """
+    known = DaoIdRegistry(registry)
+    taken = False
+    for address in addresses:
+        chains = known.chains(address)
+        taken = taken or bool(chains)
+        click.echo(json.dumps({"address": to_checksum_address(address), "taken": bool(chains), "chains": chains}))
+    if taken:
         sys.exit(1)
 
-    # Normalize arguments (auto-pad bytes32)
-    normalized_args = []
-    for arg, typ in zip(args, schema_fields):
-        if typ == "bytes32":
-            normalized_args.append(normalize_bytes32(arg))
+
+@cli.command()
+@click.argument("name")
+@click.argument("chainid", type=int)
+@click.option("--version", "protocol_version", default=1, show_default=True, help="Protocol version byte (num1).")
+@click.option("--prefix", default="", help="Wanted hex prefix of the address.")
+@click.option("--suffix", default="", help="Wanted hex suffix of the address.")
+@click.option("--workers", default=None, type=int, help="Search processes (default: CPU count).")
+@click.option("--limit", default=10, show_default=True, help="Stop after this many free matches.")
+@click.option("--registry", default=DEFAULT_REGISTRY, show_default=True, help="Known DAO ID registry file.")
+def vanity(name: str, chainid: int, protocol_version: int, prefix: str, suffix: str, workers: int, limit: int, registry: str):
+    """Search the nonce space for DAO IDs matching a vanity prefix / suffix.
+
+    Matches already used on an indexed chain (see dao-ids-build) are skipped.
+
+    Example:
+
+      eas_cli.py vanity syndicate 1 --suffix 000
+    """
+    known = DaoIdRegistry(registry)
+    found = 0
+    for nonce, address in vanity_search(name, chainid, protocol_version, prefix, suffix, workers):
+        if known.taken(address):
+            continue
+        click.echo(json.dumps({"nonce": nonce, "address": to_checksum_address(address)}))
+        found += 1
+        if found >= limit:
+            break
+    if not found:
+        raise click.ClickException("No free DAO ID matches; try a shorter prefix / suffix")
+
+
+@cli.command()
+@click.option("--host", default="127.0.0.1", show_default=True, help="Address to listen on.")
+@click.option("--port", default=8080, show_default=True, help="HTTP port.")
+@click.option("--batch-size", default=50, show_default=True, help="Votes per multiAttestByDelegation transaction.")
+@click.option("--max-wait", default=5.0, show_default=True, help="Seconds a vote may wait for a full batch.")
+@click.option("--max-batches", default=4, show_default=True, help="Batch transactions in flight at once.")
+@click.option("--queue", "queue_path", default=DEFAULT_QUEUE, show_default=True, help="Durable vote queue.")
+@click.option("--journal", default=DEFAULT_JOURNAL, show_default=True, help="Transaction journal used to resume after a crash.")
+@click.option("--workers", default=None, type=int, help="Signature-checking processes (default: CPU count).")
+@click.option("--eas-version", default=None, help="EAS contract version for the EIP-712 domain (read from the contract if omitted).")
+@click.option("--snapshot-dir", default=lambda: os.getenv("SNAPSHOT_DIR"),
+              help="`index` snapshots used to reject votes on closed proposals early (default: SNAPSHOT_DIR from .env).")
+def relay(host: str, port: int, batch_size: int, max_wait: float, max_batches: int, queue_path: str, journal: str,
+          workers: int, eas_version: str, snapshot_dir: str):
+    """Relay signed delegated votes, paying their gas from FORGE_ACCOUNT.
+
+    Voters POST EIP-712 signed DELEGATED_SIMPLE_VOTE / DELEGATED_ADVANCED_VOTE
+    requests to /votes; they are queued and sent in multiAttestByDelegation
+    batches. GET /stats reports queue depth and latency.
+
+    Example vote:
+
+      {"schema": "0x...", "attester": "0xVOTER", "recipient": "0xDAO_ID", "refUID": "0xPROPOSAL_ID",
+       "data": "0x...", "nonce": 0, "deadline": 0, "signature": {"v": 27, "r": "0x...", "s": "0x..."}}
+    """
+    config = get_env_config()
+    chain_id = int(config["chain_id"])
+    eas_contract = EAS_CONTRACTS[config["chain_id"]]
+    rpc = get_client(config["rpc_urls"])
+    version = eas_version or offchain_domain(config)["version"]
+    schemas = {"0x" + get_schema_id(name, chain_id): SCHEMAS[name] for name in DELEGATED_VOTE_SCHEMAS}
+    cache = get_preflight(config, snapshot_dir).cache if snapshot_dir else None
+
+    vote_relay = VoteRelay(rpc, get_sender(config["rpc_urls"], chain_id, config["forge_account"], journal),
+                           eas_contract, chain_id, version, schemas, queue_path, batch_size, max_wait, workers, cache,
+                           refresh=(lambda: get_preflight(config, snapshot_dir)) if snapshot_dir else None,
+                           max_batches=max_batches)
+    click.echo(f"Relaying delegated votes on http://{host}:{port} from {get_signer(config['forge_account']).address} "
+               f"({len(vote_relay.queue)} queued)", err=True)
+    try:
+        asyncio.run(vote_relay.serve(host, port))
+    except KeyboardInterrupt:
+        pass
+
+
+@cli.command()
+@click.argument("chainids", nargs=-1, type=int)
+@click.option("--host", default="127.0.0.1", show_default=True, help="Address to listen on.")
+@click.option("--port", default=8081, show_default=True, help="HTTP port.")
+@click.option("--snapshot-dir", default=lambda: os.getenv("SNAPSHOT_DIR"),
+              help="Start from the latest `index` snapshot here (default: SNAPSHOT_DIR from .env).")
+@click.option("--records", "records_file", default=None, type=click.Path(exists=True, dir_okay=False),
+              help="Start from `index` JSONL output instead of a snapshot.")
+@click.option("--cache-size", default=DEFAULT_CACHE_SIZE, show_default=True, help="Cached query results kept.")
+@click.option("--workers", default=4, show_default=True, help="Concurrent eth_getLogs requests per chain.")
+@click.option("--confirmations", default=0, show_default=True, help="Stay this many blocks behind the head.")
+def api(chainids: tuple, host: str, port: int, snapshot_dir: str, records_file: str, cache_size: int, workers: int,
+        confirmations: int):
+    """Serve cached DAO queries (proposals, tallies, grants, badge holders) over HTTP.
+
+    State is loaded from a snapshot or a records file, then kept current by
+    following CHAINIDS from where it ends. Results are cached until an
+    attestation, revocation or DELETE that affects them is indexed, and
+    carry ETags for conditional requests.
+
+      GET /daos/<dao>/proposals          GET /proposals/<uid>
+      GET /daos/<dao>/grants             GET /badges/<uid>/holders
+      GET /stats
+
+    Example:
+
+      eas_cli.py api 1 --snapshot-dir snapshots
+    """
+    covered = {}
+    with span("load"):
+        if records_file:
+            state = DaoState()
+            for record in iter_jsonl(records_file):
+                state.write(record)
+                covered[record["chain_id"]] = max(covered.get(record["chain_id"], 0), record["block"])
+        elif snapshot_dir and latest_snapshot(snapshot_dir):
+            path = latest_snapshot(snapshot_dir)
+            store, covered = load_snapshot(path)
+            state = DaoState.from_store(store)
+            click.echo(f"Loaded {path}: {len(store)} attestations", err=True)
         else:
-            normalized_args.append(arg)
+            state = DaoState()
+    query_api = QueryApi(state, cache_size)
+
+    starts = {}
+    for chain_id in chainids:
+        if str(chain_id) not in EAS_CONTRACTS:
+            raise click.ClickException(f"No EAS contract known for chain {chain_id}")
+        starts[chain_id] = covered[chain_id] + 1 if chain_id in covered else get_deployment_config(chain_id)["start_block"]
+        if starts[chain_id] is None:
+            raise click.ClickException(f"No known deployment block for chain {chain_id}; index it into --snapshot-dir first")
+
+    def follow(chain_id):
+        try:
+            chain_indexer(chain_id, workers, confirmations).run([state], starts[chain_id], None, follow=True)
+        except (RpcError, RpcTransportError) as e:
+            click.echo(f"Chain {chain_id}: indexing stopped: {e}", err=True)
+
+    for chain_id in chainids:
+        threading.Thread(target=follow, args=(chain_id,), daemon=True).start()
+
+    click.echo(f"Serving {len(state.proposals)} proposals on http://{host}:{port}", err=True)
+    try:
+        asyncio.run(query_api.serve(host, port))
+    except KeyboardInterrupt:
+        pass
+
+
+def handle_request(request: dict) -> dict:
+    """Run one `serve` request and return its JSON-serializable response."""
+    command = request.get("command")
+
+    if command == "attest":
+        attestation_command = request["attestation_command"].upper()
+        args = tuple(request.get("args", []))
+        if request.get("refUID"):
+            args = args + (request["refUID"],)
+        receipt, uids = create_attestation(attestation_command, args, request.get("preflight", True),
+                                           os.getenv("SNAPSHOT_DIR"))
+        return {"tx": receipt["transactionHash"], "uids": uids}
+
+    if command == "deploy":
+        receipt = deploy(request["attestation_command"], int(request["chainid"]))
+        return {"tx": receipt["transactionHash"]}
+
+    if command == "ping":
+        return {}
+
+    raise ValueError(f"Unknown command: {command}")
+
+
+def serve_lines(lines, write):
+    """Answer JSONL requests from LINES, one JSON response line per request."""
+    for line in lines:
+        if not line.strip():
+            continue
+        response = {}
+        try:
+            request = json.loads(line)
+            response["id"] = request.get("id")
+            response.update(handle_request(request))
+            response["ok"] = True
+        except SystemExit:
+            response.update(ok=False, error="command aborted")
+        except Exception as e:
+            response.update(ok=False, error=getattr(e, "message", None) or str(e))
+        write(json.dumps(response) + "\n")
 
-    click.echo(f"Creating attestation: {attestation_command}")
-    click.echo(f"Arguments: {normalized_args}")
-
-    # Step 1: ABI-encode schema payload
-    abi_sig = f"f({','.join(schema_fields)})"
-    encode_cmd = ["abi-encode", abi_sig, *normalized_args]
-    enc_result = run_ext_command("cast", encode_cmd)
-    encoded_bytes = enc_result.stdout.strip()
-    revocable = REVOCABILITY[attestation_command]
-
-    # Step 2: Build AttestationRequestData tuple
-    attestation_data = (
-        "(" +
-        f"{dao_id}," +                                 # recipient
-        "0," +                                         # expirationTime
-        revocable +"," +                               # revocable
-        f"{refuid}," +  # refUID
-        f"{encoded_bytes}," +                          # data
-        "0" +                                          # value
-        ")"
-    )
 
-    print(attestation_data)
+@cli.command()
+@click.option("--socket", "socket_path", type=click.Path(dir_okay=False), help="Listen on a unix socket instead of stdin.")
+def serve(socket_path: str):
+    """Long-running session: unlock FORGE_ACCOUNT once and run JSONL commands.
 
-    # Step 3: Call EAS.attest
-    full_request = f"(0x{schema_uid},{attestation_data})"
+    Reads one JSON request per line from stdin (or each connection to
+    --socket) and writes one JSON response per line. Requests are run in
+    order so transaction nonces stay sequential.
 
-    cast_args = [
-        "send",
-        eas_contract,
-        "attest((bytes32,(address,uint64,bool,bytes32,bytes,uint256)))",
-        full_request,
-        "--rpc-url", config["rpc_url"],
-        "--account", config["forge_account"],
-        "--chain-id", str(config["chain_id"]),
-    ]
+    Examples:
+
+      {"id": 1, "command": "attest", "attestation_command": "SIMPLE_VOTE", "args": [1, ""], "refUID": "0x..."}
+
+      {"id": 2, "command": "deploy", "attestation_command": "GRANT", "chainid": 11155111}
+    """
+    config = get_env_config()
+    signer = get_signer(config["forge_account"])
+    click.echo(f"Unlocked {signer.address}; ready for requests", err=True)
+
+    if not socket_path:
+        # Responses own stdout; progress messages from the commands go to stderr
+        out, sys.stdout = sys.stdout, sys.stderr
+        serve_lines(sys.stdin, lambda line: (out.write(line), out.flush()))
+        return
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            lines = (raw.decode() for raw in self.rfile)
+            serve_lines(lines, lambda line: (self.wfile.write(line.encode()), self.wfile.flush()))
+
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+    with socketserver.UnixStreamServer(socket_path, Handler) as server:
+        click.echo(f"Listening on {socket_path}", err=True)
+        try:
+            server.serve_forever()
+        finally:
+            os.unlink(socket_path)
 
-    result = run_ext_command("cast", cast_args)
-    click.echo("✅ Attestation created successfully!")
-    click.echo(result.stdout)
 
 if __name__ == "__main__":
     cli()
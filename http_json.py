@@ -0,0 +1,74 @@
+"""
+Minimal keep-alive HTTP/1.1 JSON server on asyncio streams, shared by
+`relay` and `api` so neither needs a web framework.
+
+A route is `async route(method, path, headers, body)` returning
+(status, payload) or (status, payload, extra_headers). PAYLOAD is encoded
+as JSON, sent as-is if it is already bytes, and omitted if it is None
+(e.g. for 304 Not Modified). Header names in HEADERS are lower-case. An
+exception escaping the route is logged and answered with a 500.
+"""
+
+import asyncio
+import json
+import traceback
+from http import HTTPStatus
+from typing import Awaitable, Callable, Dict, Tuple
+
+import click
+
+MAX_BODY = 4 * 1024 * 1024
+
+Route = Callable[[str, str, Dict[str, str], bytes], Awaitable[tuple]]
+
+
+def _response(status: int, payload, headers: Dict[str, str]) -> bytes:
+    status = HTTPStatus(status)
+    if payload is None:
+        body = b""
+    elif isinstance(payload, bytes):
+        body = payload
+    else:
+        body = json.dumps(payload).encode()
+    lines = [f"HTTP/1.1 {status.value} {status.phrase}"]
+    if payload is not None:
+        lines.append("Content-Type: application/json")
+    lines += [f"{name}: {value}" for name, value in headers.items()]
+    lines.append(f"Content-Length: {len(body)}")
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body
+
+
+async def handle_connection(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, route: Route):
+    """Answer requests on one connection until the client closes it."""
+    try:
+        while True:
+            line = await reader.readline()
+            if not line.strip():
+                break
+            method, path, _ = line.decode("latin-1").split(" ", 2)
+            headers = {}
+            while True:
+                header = await reader.readline()
+                if not header.strip():
+                    break
+                name, _, value = header.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+            length = int(headers.get("content-length") or 0)
+            if length > MAX_BODY:
+                result: Tuple = (HTTPStatus.REQUEST_ENTITY_TOO_LARGE, {"error": "Body too large"})
+            else:
+                request_body = await reader.readexactly(length)
+                try:
+                    result = await route(method, path, headers, request_body)
+                except Exception:
+                    click.echo(f"Error handling {method} {path}:\n{traceback.format_exc()}", err=True)
+                    result = (HTTPStatus.INTERNAL_SERVER_ERROR, {"error": "Internal error"})
+            status, payload, extra = result if len(result) == 3 else (*result, {})
+            writer.write(_response(status, payload, extra))
+            await writer.drain()
+            if headers.get("connection", "").lower() == "close" or length > MAX_BODY:
+                break
+    except (ValueError, asyncio.IncompleteReadError, ConnectionError):
+        pass
+    finally:
+        writer.close()
@@ -0,0 +1,310 @@
+"""
+Streaming indexer for EAS Attested / Revoked logs of the DAO protocol schemas.
+
+    scan_logs  ->  fetch attestation bodies  ->  decode  ->  sinks
+
+Block ranges are fetched concurrently by a bounded worker pool. The range
+span adapts to the provider: it is halved (and the failed range split) when
+a node rejects a query as too large, and grows again after successes.
+Attestation bodies are fetched with batched `getAttestation` eth_calls.
+Every stage is a generator, so records flow to the sinks as soon as their
+block range is in. When following the head, the indexer checks before each
+poll that the block it last indexed up to is still canonical; after a reorg
+it tells the sinks to rewind REORG_WINDOW blocks and reads them again.
+"""
+
+import json
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from eth_utils import keccak, to_checksum_address
+
+from abi_codec import LazyFields, decode, encode_call, schema_decoder
+from dao_id_unpack import valid_dao_ids
+from metrics import count, span
+from rpc_client import RpcClient, RpcError
+
+
+ATTESTED_TOPIC = "0x" + keccak(text="Attested(address,address,bytes32,bytes32)").hex()
+REVOKED_TOPIC = "0x" + keccak(text="Revoked(address,address,bytes32,bytes32)").hex()
+
+ATTESTATION_TYPE = "(bytes32,bytes32,uint64,uint64,uint64,bytes32,address,address,bool,bytes)"
+
+# Phrases providers use when an eth_getLogs range / result set is too large (geth, Alchemy, Infura,
+# QuickNode, Ankr, Nethermind, ...). Rate limits and execution timeouts are not on it: splitting
+# the range would not help.
+RANGE_ERRORS = ("block range", "blocks range", "range too large", "range is too large", "query returned more than",
+                "response size", "exceeds max results", "exceeds limit", "too many blocks", "too many logs")
+
+
+class RangeTooLarge(RpcError):
+    """The node refused a range even at the smallest span."""
+
+
+def _topic_address(topic: str) -> str:
+    return to_checksum_address("0x" + topic[-40:])
+
+
+class LogScanner:
+    """Concurrent, adaptively split eth_getLogs scanning over a block range."""
+
+    def __init__(self, rpc: RpcClient, address: str, topics: list, workers: int = 4,
+                 initial_span: int = 2000, min_span: int = 1, max_span: int = 50000):
+        self.rpc = rpc
+        self.address = address
+        self.topics = topics
+        self.workers = workers
+        self.span = initial_span
+        self.min_span = min_span
+        self.max_span = max_span
+        self._lock = threading.Lock()
+
+    def _get_logs(self, start: int, end: int) -> list:
+        try:
+            with span("get_logs"):
+                return self.rpc.call("eth_getLogs", [{
+                    "address": self.address,
+                    "topics": self.topics,
+                    "fromBlock": hex(start),
+                    "toBlock": hex(end),
+                }])
+        except RpcError as e:
+            if any(marker in (e.message or "").lower() for marker in RANGE_ERRORS):
+                raise RangeTooLarge(e.code, e.message, e.data)
+            raise
+
+    def _fetch(self, start: int, end: int) -> list:
+        """Fetch one range, splitting it in halves while the node refuses it."""
+        try:
+            logs = self._get_logs(start, end)
+        except RangeTooLarge:
+            if end <= start:
+                raise
+            with self._lock:
+                self.span = max(self.min_span, (end - start + 1) // 2)
+            mid = (start + end) // 2
+            return self._fetch(start, mid) + self._fetch(mid + 1, end)
+
+        with self._lock:
+            self.span = min(self.max_span, self.span + max(1, self.span // 4))
+        return logs
+
+    def scan(self, from_block: int, to_block: int) -> Iterator[Tuple[int, list]]:
+        """Yield (last block, logs) for each range in block order, keeping WORKERS ranges in flight."""
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            in_flight = deque()
+            next_block = from_block
+            while next_block <= to_block or in_flight:
+                while next_block <= to_block and len(in_flight) < self.workers * 2:
+                    end = min(to_block, next_block + self.span - 1)
+                    in_flight.append((end, pool.submit(self._fetch, next_block, end)))
+                    next_block = end + 1
+                end, future = in_flight.popleft()
+                yield end, future.result()
+
+
+class Indexer:
+    """Indexes one chain's EAS logs for a set of schema UIDs into sinks."""
+
+    def __init__(self, chain_id: int, rpc: RpcClient, eas_contract: str, schemas: Dict[str, tuple],
+                 workers: int = 4, batch_size: int = 100, confirmations: int = 0, reorg_window: int = 0):
+        """
+        SCHEMAS maps 0x-prefixed schema UID -> (schema name, schema string).
+        REORG_WINDOW is how many blocks to re-read after a reorg (0: no checks).
+        """
+        self.chain_id = chain_id
+        self.rpc = rpc
+        self.eas_contract = to_checksum_address(eas_contract)
+        self.schemas = {uid.lower(): value for uid, value in schemas.items()}
+        self.batch_size = batch_size
+        self.confirmations = confirmations
+        self.reorg_window = reorg_window
+        self.scanner = LogScanner(rpc, self.eas_contract,
+                                  [[ATTESTED_TOPIC, REVOKED_TOPIC], None, None, list(self.schemas)],
+                                  workers=workers)
+        self._decoders = {uid: schema_decoder(schema) for uid, (_, schema) in self.schemas.items()}
+
+    def head(self) -> int:
+        return self.rpc.block_number() - self.confirmations
+
+    def block_hash(self, number: int) -> Optional[str]:
+        block = self.rpc.call("eth_getBlockByNumber", [hex(number), False])
+        return block["hash"] if block else None
+
+    def fetch_bodies(self, uids: Sequence[str]) -> List[Optional[tuple]]:
+        """Batched getAttestation(uid) calls; returns decoded Attestation tuples."""
+        calls = [("eth_call", [{"to": self.eas_contract,
+                                "data": "0x" + encode_call("getAttestation(bytes32)", [uid]).hex()}, "latest"])
+                 for uid in uids]
+        bodies = []
+        with span("fetch_bodies"):
+            results = self.rpc.batch(calls, size=self.batch_size, raise_errors=False)
+        for result in results:
+            if isinstance(result, RpcError) or not result or result == "0x":
+                bodies.append(None)
+            else:
+                bodies.append(decode([ATTESTATION_TYPE], bytes.fromhex(result[2:]))[0])
+        return bodies
+
+    def decode_data(self, schema_uid: str, data: bytes) -> Optional[LazyFields]:
+        """Lazy view of the payload: consumers that read one or two fields only decode those."""
+        try:
+            return self._decoders[schema_uid].view(data)
+        except ValueError:
+            return None
+
+    def _record(self, log: dict) -> dict:
+        schema_uid = log["topics"][3].lower()
+        return {
+            "chain_id": self.chain_id,
+            "event": "attested" if log["topics"][0] == ATTESTED_TOPIC else "revoked",
+            "block": int(log["blockNumber"], 16),
+            "tx": log["transactionHash"],
+            "log_index": int(log["logIndex"], 16),
+            "uid": "0x" + log["data"][2:66],
+            "schema": self.schemas[schema_uid][0],
+            "schema_uid": schema_uid,
+            "recipient": _topic_address(log["topics"][1]),
+            "attester": _topic_address(log["topics"][2]),
+        }
+
+    def records(self, from_block: int, to_block: int) -> Iterator[dict]:
+        """Decoded records for every matching log in [FROM_BLOCK, TO_BLOCK], in chain order."""
+        for _, records in self.windows(from_block, to_block):
+            yield from records
+
+    def windows(self, from_block: int, to_block: int) -> Iterator[Tuple[int, List[dict]]]:
+        """(last block, records) for each getLogs range of [FROM_BLOCK, TO_BLOCK], in chain order."""
+        for end, logs in self.scanner.scan(from_block, to_block):
+            if not logs:
+                yield end, []
+                continue
+            records = [self._record(log) for log in logs
+                       if log["topics"][3].lower() in self.schemas and not log.get("removed")]
+            for record, valid in zip(records, valid_dao_ids(r["recipient"] for r in records)):
+                record["dao_id_valid"] = bool(valid)
+
+            # Revoked records get the body too, for their revocation_time
+            for record, body in zip(records, self.fetch_bodies([r["uid"] for r in records])):
+                if body is None:
+                    continue
+                _, _, ts, expiration, revocation, ref_uid, _, _, revocable, data = body
+                record.update({
+                    "time": ts,
+                    "expiration_time": expiration,
+                    "revocation_time": revocation,
+                    "ref_uid": ref_uid,
+                    "revocable": revocable,
+                    "data": self.decode_data(record["schema_uid"], data),
+                })
+            count("records_indexed", len(records), chain=self.chain_id)
+            yield end, records
+
+    def run(self, sinks: Sequence["Sink"], from_block: int, to_block: Optional[int] = None,
+            follow: bool = False, poll: float = 5.0) -> int:
+        """
+        Push records into SINKS from FROM_BLOCK up to TO_BLOCK (default: head),
+        checkpointing after every getLogs range so a long backfill can be
+        snapshotted (and resumed) as it goes. With FOLLOW, keep tailing new
+        blocks, rewinding the sinks when a reorg replaces indexed blocks.
+        Returns the last indexed block.
+        """
+        last = from_block - 1
+        tip = None          # (block, hash) indexed up to, re-checked before each poll
+        while True:
+            if tip and self.block_hash(tip[0]) != tip[1]:
+                last = max(from_block - 1, tip[0] - self.reorg_window)
+                tip = None
+                count("reorgs", chain=self.chain_id)
+                for sink in sinks:
+                    sink.rewind(self.chain_id, last)
+            target = self.head() if to_block is None else to_block
+            if target > last:
+                # Hashed before the scan: a reorg during it shows up on the next check
+                target_hash = self.block_hash(target) if follow and self.reorg_window else None
+                for end, records in self.windows(last + 1, target):
+                    for record in records:
+                        for sink in sinks:
+                            sink.write(record)
+                    last = end
+                    for sink in sinks:
+                        sink.checkpoint(self.chain_id, last)
+                if target_hash:
+                    tip = (target, target_hash)
+            if not follow:
+                return last
+            time.sleep(poll)
+
+
+# --- sinks -------------------------------------------------------------------
+
+
+class Sink:
+    """Receives decoded records. Subclass and override `write`."""
+
+    def write(self, record: dict):
+        raise NotImplementedError
+
+    def checkpoint(self, chain_id: int, block: int):
+        """Called after every record up to BLOCK has been written."""
+
+    def rewind(self, chain_id: int, block: int):
+        """
+        Called after a reorg: records after BLOCK on CHAIN_ID may be orphaned
+        and are written again from the new chain. Sinks that cannot take
+        records back ignore it.
+        """
+
+    def close(self):
+        pass
+
+
+def _json_default(value):
+    if isinstance(value, (bytes, bytearray)):
+        return "0x" + bytes(value).hex()
+    if isinstance(value, LazyFields):
+        return dict(value)
+    raise TypeError(f"Not JSON serializable: {type(value)}")
+
+
+class JsonlSink(Sink):
+    """Appends one JSON object per record to a file (or stdout for '-')."""
+
+    def __init__(self, path: str = "-"):
+        self._file = sys.stdout if path == "-" else open(path, "a")
+        self._lock = threading.Lock()
+
+    def write(self, record: dict):
+        line = json.dumps(record, default=_json_default)
+        with self._lock:
+            self._file.write(line + "\n")
+
+    def checkpoint(self, chain_id: int, block: int):
+        with self._lock:
+            self._file.flush()
+
+    def close(self):
+        if self._file is not sys.stdout:
+            self._file.close()
+
+
+class CallbackSink(Sink):
+    """Adapts a plain function into a sink."""
+
+    def __init__(self, fn):
+        self._fn = fn
+
+    def write(self, record: dict):
+        self._fn(record)
+
+
+def iter_jsonl(path: str) -> Iterable[dict]:
+    """Read back records written by JsonlSink."""
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
@@ -0,0 +1,171 @@
+"""
+Stage timings and counters for the CLI and its pipelines.
+
+`span("stage")` times a block, `count("name")` bumps a counter and
+`gauge("name", value)` sets a level, all in one process-wide registry.
+`--profile` prints it as a per-stage breakdown on exit; `--metrics-file`
+exports it as JSON or as a Prometheus textfile (for the node_exporter
+textfile collector), rewritten periodically by long-running commands.
+
+A span costs two clock reads and a lock, so spans wrap stages and RPC
+round trips, not per-record work. Nested spans are each counted in full.
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional, Tuple
+
+
+PROMETHEUS_PREFIX = "eas_"
+
+
+def _labels(labels: dict) -> Tuple[Tuple[str, str], ...]:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _format_labels(labels: Tuple[Tuple[str, str], ...]) -> str:
+    return "{" + ",".join(f'{name}="{value}"' for name, value in labels) + "}" if labels else ""
+
+
+class Metrics:
+    """Thread-safe registry of span timings, counters and gauges."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = time.monotonic()
+        self.spans: Dict[str, list] = {}                # stage -> [count, total seconds, max seconds]
+        self.counters: Dict[tuple, float] = {}          # (name, labels) -> value
+        self.gauges: Dict[tuple, float] = {}            # (name, labels) -> last value
+
+    @contextmanager
+    def span(self, name: str):
+        """Time the enclosed block as stage NAME."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def observe(self, name: str, seconds: float):
+        with self._lock:
+            stats = self.spans.get(name)
+            if stats is None:
+                self.spans[name] = [1, seconds, seconds]
+            else:
+                stats[0] += 1
+                stats[1] += seconds
+                stats[2] = max(stats[2], seconds)
+
+    def count(self, name: str, value: float = 1, **labels):
+        key = (name, _labels(labels))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def gauge(self, name: str, value: float, **labels):
+        with self._lock:
+            self.gauges[(name, _labels(labels))] = value
+
+    def reset(self):
+        with self._lock:
+            self.started = time.monotonic()
+            self.spans.clear()
+            self.counters.clear()
+            self.gauges.clear()
+
+    # --- export --------------------------------------------------------------
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "uptime": round(time.monotonic() - self.started, 6),
+                "spans": {name: {"count": count, "seconds": round(total, 6), "max": round(peak, 6)}
+                          for name, (count, total, peak) in self.spans.items()},
+                "counters": {name + _format_labels(labels): value for (name, labels), value in self.counters.items()},
+                "gauges": {name + _format_labels(labels): value for (name, labels), value in self.gauges.items()},
+            }
+
+    def report(self) -> str:
+        """Human-readable per-stage breakdown, slowest stage first."""
+        snap = self.snapshot()
+        wall = snap["uptime"] or 1e-9
+        lines = [f"{'stage':<20} {'calls':>7} {'total s':>10} {'mean ms':>10} {'max ms':>10} {'% wall':>7}"]
+        for name, stats in sorted(snap["spans"].items(), key=lambda item: -item[1]["seconds"]):
+            lines.append(f"{name:<20} {stats['count']:>7} {stats['seconds']:>10.3f} "
+                         f"{1000 * stats['seconds'] / stats['count']:>10.2f} {1000 * stats['max']:>10.2f} "
+                         f"{100 * stats['seconds'] / wall:>6.1f}%")
+        lines.append(f"{'wall':<20} {'':>7} {wall:>10.3f}")
+        values = {**snap["counters"], **snap["gauges"]}
+        if values:
+            lines.append("")
+            width = max(len(name) for name in values)
+            lines += [f"{name:<{width}} {value:>10g}" for name, value in sorted(values.items())]
+        return "\n".join(lines)
+
+    def prometheus(self) -> str:
+        """Prometheus text exposition format."""
+        with self._lock:
+            spans = dict(self.spans)
+            counters = dict(self.counters)
+            gauges = dict(self.gauges)
+            uptime = time.monotonic() - self.started
+        p = PROMETHEUS_PREFIX
+        lines = [f"# TYPE {p}stage_seconds_total counter", f"# TYPE {p}stage_calls_total counter",
+                 f"# TYPE {p}stage_seconds_max gauge"]
+        for name, (count, total, peak) in sorted(spans.items()):
+            lines += [f'{p}stage_seconds_total{{stage="{name}"}} {total:.6f}',
+                      f'{p}stage_calls_total{{stage="{name}"}} {count}',
+                      f'{p}stage_seconds_max{{stage="{name}"}} {peak:.6f}']
+        typed = set()
+        for (name, labels), value in sorted(counters.items()):
+            if name not in typed:
+                lines.append(f"# TYPE {p}{name}_total counter")
+                typed.add(name)
+            lines.append(f"{p}{name}_total{_format_labels(labels)} {value:g}")
+        for (name, labels), value in sorted(gauges.items()):
+            if name not in typed:
+                lines.append(f"# TYPE {p}{name} gauge")
+                typed.add(name)
+            lines.append(f"{p}{name}{_format_labels(labels)} {value:g}")
+        lines += [f"# TYPE {p}uptime_seconds gauge", f"{p}uptime_seconds {uptime:.3f}"]
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str):
+        """Write JSON (if PATH ends in .json) or a Prometheus textfile, atomically."""
+        text = json.dumps(self.snapshot()) + "\n" if path.endswith(".json") else self.prometheus()
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            f.write(text)
+        os.replace(tmp, path)
+
+
+METRICS = Metrics()
+
+span = METRICS.span
+count = METRICS.count
+gauge = METRICS.gauge
+
+
+class MetricsExporter:
+    """Rewrites PATH from METRICS every INTERVAL seconds, and once more on stop()."""
+
+    def __init__(self, path: str, interval: float = 15.0, metrics: Optional[Metrics] = None):
+        self.path = path
+        self.interval = interval
+        self.metrics = metrics or METRICS
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="metrics-exporter", daemon=True)
+
+    def start(self) -> "MetricsExporter":
+        self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.metrics.write(self.path)
+
+    def stop(self):
+        self._stop.set()
+        self.metrics.write(self.path)
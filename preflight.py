@@ -0,0 +1,127 @@
+"""
+Preflight checks for vote attestations, so votes VotesResolver would revert
+are rejected before they are signed and sent.
+
+VotesResolver.onAttest asserts that the vote's recipient is the proposal's
+recipient, then reverts with VotingNotStarted / VotingEnded outside
+[startts, endts] and with AlreadyVoted once the attester has voted on the
+proposal with any vote schema. `VoteCache` holds proposal windows and the
+per-proposal voted sets, kept current from indexed records (it is an
+indexer sink). Votes on proposals the cache has not seen are simulated with
+one batched `eth_call` of the real attest calldata instead.
+"""
+
+import time
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+from eth_utils import keccak
+
+from indexer import Sink
+from rpc_client import RpcClient, RpcError
+from tally import RESOLVER_VOTE_SCHEMAS
+
+
+# Revert selector -> name, for simulated calls
+REVERTS = {keccak(text=sig)[:4].hex(): sig.split("(")[0]
+           for sig in ("VotingNotStarted()", "VotingEnded()", "AlreadyVoted()", "InvalidAttester()",
+                       "Panic(uint256)", "Error(string)", "InvalidSchema()", "AccessDenied()")}
+
+RECIPIENT_MISMATCH = "RecipientMismatch"
+
+
+class VoteCache(Sink):
+    """Proposal windows and voters per proposal, from `index` records."""
+
+    def __init__(self):
+        self.proposals: Dict[str, Tuple[str, int, int]] = {}     # uid -> (dao, startts, endts)
+        self.voted: Dict[str, Set[str]] = {}                     # proposal uid -> lowercase attesters
+        self.blocks: Dict[int, int] = {}                         # chain id -> last block applied
+
+    @classmethod
+    def from_store(cls, store) -> "VoteCache":
+        """Fill from an AttestationStore (e.g. a loaded snapshot)."""
+        cache = cls()
+        for record in store.records(("CREATE_PROPOSAL",)):
+            cache.write(record)
+        addresses, refs = store.addresses.values, store.refs.values
+        for name in RESOLVER_VOTE_SCHEMAS:
+            table = store.tables[name]
+            for ref, attester in zip(table.column("ref").tolist(), table.column("attester").tolist()):
+                cache.voted.setdefault(refs[ref], set()).add(addresses[attester].lower())
+        return cache
+
+    def write(self, record: dict):
+        if record.get("event") != "attested" or record.get("data") is None:
+            return
+        if record["schema"] == "CREATE_PROPOSAL":
+            data = record["data"]
+            self.proposals[record["uid"]] = (record["recipient"], data["startts"], data["endts"])
+        elif record["schema"] in RESOLVER_VOTE_SCHEMAS:
+            self.voted.setdefault(record["ref_uid"], set()).add(record["attester"].lower())
+
+    def checkpoint(self, chain_id: int, block: int):
+        self.blocks[chain_id] = block
+
+
+def vote_error(cache: VoteCache, voter: str, recipient: str, proposal_id: str, now: int) -> Optional[str]:
+    """The revert VOTER's vote would hit, for a proposal present in CACHE; None if it would pass."""
+    dao, start, end = cache.proposals[proposal_id]
+    if dao.lower() != recipient.lower():
+        return RECIPIENT_MISMATCH
+    if now < start:
+        return "VotingNotStarted"
+    if now > end:
+        return "VotingEnded"
+    if voter.lower() in cache.voted.get(proposal_id, ()):
+        return "AlreadyVoted"
+    return None
+
+
+def revert_reason(error: RpcError) -> str:
+    data = error.data.get("data") if isinstance(error.data, dict) else error.data
+    if isinstance(data, str) and data.startswith("0x") and len(data) >= 10:
+        return REVERTS.get(data[2:10].lower(), f"reverted ({data[:10]})")
+    return error.message
+
+
+class VotePreflight:
+    """
+    Decide, for a list of attest calls, which would revert in VotesResolver.
+    ATTESTER is the address that will sign; CACHE may be None (simulate all).
+    """
+
+    def __init__(self, rpc: RpcClient, eas_contract: str, attester: str, cache: Optional[VoteCache] = None):
+        self.rpc = rpc
+        self.eas_contract = eas_contract
+        self.attester = attester
+        self.cache = cache
+
+    def check(self, votes: Sequence[Tuple[str, str, bytes]], now: Optional[int] = None) -> List[Optional[str]]:
+        """
+        VOTES are (recipient, proposal_id, attest calldata) in send order.
+        Returns the revert reason for each vote, or None if it should go through.
+        """
+        now = int(time.time()) if now is None else now
+        reasons: List[Optional[str]] = [None] * len(votes)
+        cold = []
+        for i, (recipient, proposal_id, calldata) in enumerate(votes):
+            if self.cache is not None and proposal_id in self.cache.proposals:
+                reasons[i] = vote_error(self.cache, self.attester, recipient, proposal_id, now)
+            else:
+                cold.append(i)
+
+        if cold:
+            calls = [("eth_call", [{"from": self.attester, "to": self.eas_contract,
+                                    "data": "0x" + votes[i][2].hex()}, "latest"]) for i in cold]
+            for i, result in zip(cold, self.rpc.batch(calls, raise_errors=False)):
+                if isinstance(result, RpcError):
+                    reasons[i] = revert_reason(result)
+
+        # The first vote per proposal in this batch takes the attester's one vote
+        pending: Set[str] = set()
+        for i, (_, proposal_id, _) in enumerate(votes):
+            if reasons[i] is None:
+                if proposal_id in pending:
+                    reasons[i] = "AlreadyVoted"
+                pending.add(proposal_id)
+        return reasons
@@ -0,0 +1,432 @@
+"""
+Cached, read-optimized queries over DAO state, as a library or over HTTP.
+
+DaoState is an indexer Sink. It feeds each record to the same AuthorityIndex,
+BadgeIndex and SimpleVoteTally the `tally` command uses, and reports which
+*dependency keys* the record touched:
+
+    proposal:<uid>    a vote, retraction or SET_PROPOSAL_TYPE on the proposal
+    type:<uid>        its proposal type
+    proposals:<dao>   a new (or retroactively unauthorized) proposal
+    grants:<dao>      GRANT / INSTANTIATE, their revocation or DELETE
+    badge:<uid>       IDENTITY_BADGE issued, revoked or deleted under a definition
+
+QueryCache is an LRU of serialized JSON results. Each entry remembers the
+keys it was computed from, so ingesting a record evicts exactly the results
+it can change and nothing else. Entries that change with the clock (a
+proposal opening or closing, a grant or badge expiring) also carry the time
+of their next boundary. A hit is a dict lookup returning ready-made bytes
+and a strong ETag, so the thousands of identical polls a proposal gets near
+`endts` never touch the indexes.
+
+    GET /daos/<dao>/proposals
+    GET /daos/<dao>/grants[?address=0x...]
+    GET /proposals/<uid>
+    GET /badges/<uid>/holders[?at=<unix time>]
+    GET /stats
+
+Responses carry an ETag; a request with a matching If-None-Match gets 304.
+"""
+
+import asyncio
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from http import HTTPStatus
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from eth_utils import is_address, to_checksum_address
+
+from advanced_tally import AdvancedVoteTally
+from authority import FOREVER, AuthorityIndex
+from badges import BadgeIndex
+from http_json import handle_connection
+from indexer import Sink
+from metrics import count, gauge, span
+from tally import RESOLVER_VOTE_SCHEMAS, ZERO_UID, SimpleVoteTally
+
+
+DEFAULT_CACHE_SIZE = 10_000
+
+# Proposal fields copied out of CREATE_PROPOSAL payloads
+PROPOSAL_FIELDS = ("title", "description", "startts", "endts", "tags")
+
+
+def _etag(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=8).hexdigest() + '"'
+
+
+def _status(start: int, end: int, now: int) -> Tuple[str, Optional[int]]:
+    """Proposal status at NOW and the time it next changes (None: never)."""
+    if now < start:
+        return "pending", start
+    if now <= end:
+        return "active", end + 1
+    return "closed", None
+
+
+class QueryCache:
+    """
+    LRU of (body, etag) results keyed by query, with a reverse index from
+    dependency key to the queries computed from it.
+    """
+
+    def __init__(self, size: int = DEFAULT_CACHE_SIZE):
+        self.size = size
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[tuple, tuple]" = OrderedDict()    # query -> (body, etag, deps, expires)
+        self._dependents: Dict[str, Set[tuple]] = {}
+        self.hits = self.misses = self.invalidated = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, query: tuple, now: float) -> Optional[Tuple[bytes, str]]:
+        with self._lock:
+            entry = self._entries.get(query)
+            if entry is None or (entry[3] is not None and now >= entry[3]):
+                self.misses += 1
+                count("query_cache", result="miss")
+                return None
+            self._entries.move_to_end(query)
+            self.hits += 1
+        count("query_cache", result="hit")
+        return entry[0], entry[1]
+
+    def put(self, query: tuple, body: bytes, deps: Iterable[str], expires: Optional[int] = None) -> str:
+        etag = _etag(body)
+        deps = tuple(deps)
+        with self._lock:
+            self._drop(query)
+            self._entries[query] = (body, etag, deps, expires)
+            for dep in deps:
+                self._dependents.setdefault(dep, set()).add(query)
+            while len(self._entries) > self.size:
+                self._drop(next(iter(self._entries)))
+        return etag
+
+    def invalidate(self, deps: Iterable[str]) -> int:
+        """Evict every result computed from any of DEPS; returns how many."""
+        n = 0
+        with self._lock:
+            for dep in deps:
+                for query in self._dependents.pop(dep, ()):
+                    if self._drop(query):
+                        n += 1
+            self.invalidated += n
+        if n:
+            count("query_invalidations", n)
+        return n
+
+    def _drop(self, query: tuple) -> bool:
+        entry = self._entries.pop(query, None)
+        if entry is None:
+            return False
+        for dep in entry[2]:
+            dependents = self._dependents.get(dep)
+            if dependents is not None:
+                dependents.discard(query)
+                if not dependents:
+                    del self._dependents[dep]
+        return True
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._dependents.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {"entries": len(self._entries), "size": self.size, "hits": self.hits, "misses": self.misses,
+                    "hit_rate": round(self.hits / lookups, 4) if lookups else None, "invalidated": self.invalidated}
+
+
+class DaoState(Sink):
+    """
+    Authority, badges, proposals and tallies, updated one record at a time.
+    Records must arrive in chain order. ON_CHANGE(keys) is called with the
+    dependency keys each record touched, after the state is updated.
+    """
+
+    def __init__(self, on_change: Optional[Callable[[Set[str]], None]] = None):
+        self.on_change = on_change
+        self.lock = threading.RLock()
+        self.authority = AuthorityIndex()
+        self.badges = BadgeIndex(authorize_delete=self.authority.allows)
+        self.advanced = AdvancedVoteTally()
+        self.tally = SimpleVoteTally(authorize_delete=self.authority.allows, advanced=self.advanced)
+        self.proposals: Dict[str, dict] = {}                # uid -> PROPOSAL_FIELDS + dao, attester, time
+        self.by_dao: Dict[str, List[str]] = {}              # dao -> proposal uids, in creation order
+        self.grants_by_dao: Dict[str, List[str]] = {}       # dao -> grant uids (and its root)
+        self.hidden: Set[str] = set()                       # proposals whose authority was deleted
+        self._gated: Dict[str, Dict[str, dict]] = {}        # dao -> uid -> proposal / type record, for re-checks
+        self._votes: Dict[str, str] = {}                    # vote uid -> proposal uid
+        self.records = 0
+        self.blocks: Dict[int, int] = {}
+
+    @classmethod
+    def from_store(cls, store, on_change: Optional[Callable[[Set[str]], None]] = None) -> "DaoState":
+        """Replay every record of an AttestationStore (e.g. a loaded snapshot)."""
+        state = cls()
+        for record in store.records():
+            state.write(record)
+        state.on_change = on_change
+        return state
+
+    # --- ingestion -----------------------------------------------------------
+
+    def write(self, record: dict):
+        with self.lock:
+            keys = self._apply(record)
+            self.records += 1
+            if keys and self.on_change is not None:
+                self.on_change(keys)
+
+    def checkpoint(self, chain_id: int, block: int):
+        self.blocks[chain_id] = block
+        gauge("api_block", block, chain=chain_id)
+
+    def _apply(self, record: dict) -> Set[str]:
+        if record.get("data") is None:
+            return set()
+        schema, dao, uid = record["schema"], record["recipient"], record["uid"]
+
+        if record["event"] == "revoked":
+            keys = set()
+            grant = self.authority.grants.get(uid)
+            if grant is not None:
+                keys.add(f"grants:{grant.dao}")
+            badge = self.badges.badges.get(uid)
+            if badge is not None:
+                keys.add(f"badge:{badge.definition}")
+            self.authority.apply(record)
+            self.badges.apply(record)
+            return keys
+
+        self.authority.apply(record)
+        self.badges.apply(record)
+
+        if schema in RESOLVER_VOTE_SCHEMAS:
+            self.tally.apply(record)
+            if record["ref_uid"] in self.proposals:
+                self._votes[uid] = record["ref_uid"]
+                return {f"proposal:{record['ref_uid']}"}
+            return set()
+
+        if schema in ("CREATE_PROPOSAL", "CREATE_PROPOSAL_TYPE"):
+            if not self.authority.allows(record):
+                return set()
+            self.tally.apply(record)
+            self._gated.setdefault(dao, {})[uid] = {key: record[key] for key in ("schema", "recipient", "attester", "time")}
+            if schema == "CREATE_PROPOSAL_TYPE":
+                return {f"type:{uid}"}
+            data = record["data"]
+            self.proposals[uid] = dict({field: data[field] for field in PROPOSAL_FIELDS}, dao=dao,
+                                       attester=record["attester"], time=record["time"])
+            self.by_dao.setdefault(dao, []).append(uid)
+            return {f"proposal:{uid}", f"proposals:{dao}"}
+
+        if schema == "SET_PROPOSAL_TYPE":
+            self.tally.apply(record)
+            return {f"proposal:{record['data']['proposal_id']}"}
+
+        if schema in ("INSTANTIATE", "PERMA_INSTANTIATE", "GRANT"):
+            if uid in self.authority.grants:
+                self.grants_by_dao.setdefault(dao, []).append(uid)
+            return {f"grants:{dao}"}
+
+        if schema == "IDENTITY_BADGE":
+            return {f"badge:{record['ref_uid']}"}
+
+        if schema == "DELETE":
+            target = record["ref_uid"]
+            keys = set()
+            self.tally.apply(record)
+            if target in self._votes:
+                keys.add(f"proposal:{self._votes[target]}")
+            badge = self.badges.badges.get(target)
+            if badge is not None:
+                keys.add(f"badge:{badge.definition}")
+            if target in self.authority.grants:
+                keys.add(f"grants:{dao}")
+                keys |= self._reauthorize(dao)
+            return keys
+        return set()
+
+    def _reauthorize(self, dao: str) -> Set[str]:
+        """A deleted grant voids retroactively: drop proposals / types issued under it."""
+        keys = set()
+        for uid, record in list(self._gated.get(dao, {}).items()):
+            if self.authority.allows(record):
+                continue
+            del self._gated[dao][uid]
+            if record["schema"] == "CREATE_PROPOSAL_TYPE":
+                self.tally.proposal_types.pop(uid, None)
+                keys.add(f"type:{uid}")
+            else:
+                self.hidden.add(uid)
+                keys |= {f"proposal:{uid}", f"proposals:{dao}"}
+        return keys
+
+    # --- queries -------------------------------------------------------------
+    #
+    # Each returns (result, dependency keys, expiry time or None). Call with `lock` held.
+
+    def proposal(self, uid: str, now: int) -> Tuple[Optional[dict], List[str], Optional[int]]:
+        meta = self.proposals.get(uid)
+        if meta is None or uid in self.hidden:
+            return None, [f"proposal:{uid}"], None
+        status, expires = _status(meta["startts"], meta["endts"], now)
+        type_uid = self.tally.proposals[uid].type_uid
+        result = dict(self.tally.result(uid), **meta, status=status, proposal_type=type_uid)
+        return result, [f"proposal:{uid}", f"type:{type_uid or ZERO_UID}"], expires
+
+    def dao_proposals(self, dao: str, now: int) -> Tuple[List[dict], List[str], Optional[int]]:
+        rows, boundaries = [], []
+        for uid in self.by_dao.get(dao, ()):
+            if uid in self.hidden:
+                continue
+            meta = self.proposals[uid]
+            status, expires = _status(meta["startts"], meta["endts"], now)
+            if expires is not None:
+                boundaries.append(expires)
+            rows.append({"proposal_id": uid, "title": meta["title"], "startts": meta["startts"],
+                         "endts": meta["endts"], "status": status})
+        return rows, [f"proposals:{dao}"], min(boundaries, default=None)
+
+    def grants(self, dao: str, now: int, address: Optional[str] = None) -> Tuple[List[dict], List[str], Optional[int]]:
+        """Grants in effect at NOW (optionally only those held by ADDRESS)."""
+        rows, boundaries = [], []
+        for uid in self.grants_by_dao.get(dao, ()):
+            grant = self.authority.grants[uid]
+            if grant.effective is None or (address and grant.grantee.lower() != address.lower()):
+                continue
+            start, end = grant.effective
+            if now < start:
+                boundaries.append(start)
+                continue
+            if now >= end:
+                continue
+            if end < FOREVER:
+                boundaries.append(end)
+            rows.append({"uid": grant.uid, "grantor": grant.grantor, "grantee": grant.grantee,
+                         "permission": grant.permission, "level": grant.level, "start": start,
+                         "end": end if end < FOREVER else None})
+        return rows, [f"grants:{dao}"], min(boundaries, default=None)
+
+    def badge_holders(self, badge_id: str, now: int, at: Optional[int] = None) -> Tuple[List[str], List[str], Optional[int]]:
+        """Holders at AT; without AT, holders now, cached until the next badge starts or ends."""
+        holders = sorted(self.badges.holders(badge_id, now if at is None else at))
+        expires = self.badges.next_change(badge_id, now) if at is None else None
+        return holders, [f"badge:{badge_id}"], expires
+
+
+class QueryApi:
+    """
+    Cached queries over a DaoState. The `*_json` methods return (body, etag)
+    with the serialized result, or None if the object is unknown; the plain
+    methods return the decoded result. DAO IDs may be given in any case; an
+    invalid one raises ValueError.
+    """
+
+    def __init__(self, state: Optional[DaoState] = None, cache_size: int = DEFAULT_CACHE_SIZE,
+                 clock: Callable[[], float] = time.time):
+        self.cache = QueryCache(cache_size)
+        self.state = state or DaoState()
+        self.state.on_change = self.cache.invalidate
+        self.clock = clock
+
+    def _query(self, query: tuple, compute: Callable[[int], tuple]) -> Optional[Tuple[bytes, str]]:
+        now = int(self.clock())
+        found = self.cache.get(query, now)
+        if found is None:
+            # Compute and store under the state lock, so an invalidation cannot slip in between
+            with self.state.lock:
+                with span("query"):
+                    result, deps, expires = compute(now)
+                body = json.dumps(result).encode()
+                found = body, self.cache.put(query, body, deps, expires)
+        return None if found[0] == b"null" else found
+
+    def proposal_json(self, proposal_id: str) -> Optional[Tuple[bytes, str]]:
+        proposal_id = proposal_id.lower()
+        return self._query(("proposal", proposal_id), lambda now: self.state.proposal(proposal_id, now))
+
+    def proposals_json(self, dao: str) -> Tuple[bytes, str]:
+        dao = _dao(dao)
+        return self._query(("proposals", dao), lambda now: self.state.dao_proposals(dao, now))
+
+    def grants_json(self, dao: str, address: Optional[str] = None) -> Tuple[bytes, str]:
+        dao, address = _dao(dao), address.lower() if address else None
+        return self._query(("grants", dao, address), lambda now: self.state.grants(dao, now, address))
+
+    def badge_holders_json(self, badge_id: str, at: Optional[int] = None) -> Tuple[bytes, str]:
+        badge_id = badge_id.lower()
+        return self._query(("badge", badge_id, at), lambda now: self.state.badge_holders(badge_id, now, at))
+
+    def proposal(self, proposal_id: str) -> Optional[dict]:
+        found = self.proposal_json(proposal_id)
+        return json.loads(found[0]) if found else None
+
+    def proposals(self, dao: str) -> List[dict]:
+        return json.loads(self.proposals_json(dao)[0])
+
+    def grants(self, dao: str, address: Optional[str] = None) -> List[dict]:
+        return json.loads(self.grants_json(dao, address)[0])
+
+    def badge_holders(self, badge_id: str, at: Optional[int] = None) -> List[str]:
+        return json.loads(self.badge_holders_json(badge_id, at)[0])
+
+    def stats(self) -> dict:
+        return {"cache": self.cache.stats(), "records": self.state.records, "proposals": len(self.state.proposals),
+                "blocks": self.state.blocks}
+
+    # --- HTTP ----------------------------------------------------------------
+
+    async def route(self, method: str, path: str, headers: Dict[str, str], body: bytes) -> tuple:
+        if method != "GET":
+            return HTTPStatus.METHOD_NOT_ALLOWED, {"error": f"{method} not allowed"}
+        url = urlsplit(path)
+        parts = [part for part in url.path.split("/") if part]
+        params = {name: values[-1] for name, values in parse_qs(url.query).items()}
+
+        try:
+            if parts == ["stats"]:
+                return HTTPStatus.OK, self.stats()
+            if len(parts) == 3 and parts[0] == "daos" and parts[2] == "proposals":
+                found = self.proposals_json(parts[1])
+            elif len(parts) == 3 and parts[0] == "daos" and parts[2] == "grants":
+                found = self.grants_json(parts[1], params.get("address"))
+            elif len(parts) == 2 and parts[0] == "proposals":
+                found = self.proposal_json(parts[1])
+            elif len(parts) == 3 and parts[0] == "badges" and parts[2] == "holders":
+                found = self.badge_holders_json(parts[1], int(params["at"]) if "at" in params else None)
+            else:
+                return HTTPStatus.NOT_FOUND, {"error": f"No route for {method} {url.path}"}
+        except ValueError as e:
+            return HTTPStatus.BAD_REQUEST, {"error": str(e)}
+
+        if found is None:
+            return HTTPStatus.NOT_FOUND, {"error": "Not found"}
+        payload, etag = found
+        cache_headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if etag in [tag.strip() for tag in headers.get("if-none-match", "").split(",")]:
+            return HTTPStatus.NOT_MODIFIED, None, cache_headers
+        return HTTPStatus.OK, payload, cache_headers
+
+    async def serve(self, host: str, port: int):
+        """Answer HTTP on HOST:PORT until cancelled."""
+        server = await asyncio.start_server(lambda r, w: handle_connection(r, w, self.route), host, port)
+        async with server:
+            await server.serve_forever()
+
+
+def _dao(value: str) -> str:
+    """DAO IDs in records are checksummed, as the indexer writes them."""
+    if not is_address(value):
+        raise ValueError(f"Invalid DAO ID: {value}")
+    return to_checksum_address(value)
@@ -0,0 +1,613 @@
+"""
+Relay for DELEGATED_SIMPLE_VOTE / DELEGATED_ADVANCED_VOTE attestations.
+
+Voters sign an EAS delegated Attest request (EIP-712, domain name "EAS") and
+POST it; the relay pays the gas. EAS records the voter as the attester, so
+VotesResolver counts the vote for the voter, not the relay.
+
+    POST /votes            one signed vote, or a JSON array of them
+    GET  /votes/<proposal>/<voter>
+    GET  /stats            queue depth, in-flight votes, latency
+
+Signatures are recovered concurrently in a process pool. Accepted votes are
+deduplicated on (proposal, voter), mirroring `_proposalVotes`, and are
+appended (fsynced) to a local JSONL queue before the request is answered, so
+a restart loses nothing. The queue is flushed into one
+`multiAttestByDelegation` transaction when it holds BATCH_SIZE votes or its
+oldest vote has waited MAX_WAIT seconds. Batches are not waited for one by
+one: up to MAX_BATCHES are in flight at once, with consecutive sender nonces.
+One reverting entry reverts a whole multi-attestation, so each batch is
+simulated first and the votes that would revert are rejected on their own.
+
+EAS checks each delegated signature against the attester's next nonce, so a
+voter's votes must land in nonce order: a batch carries at most one vote per
+voter, a voter with a batch in flight waits for it to settle, and a vote is only accepted with the nonce following the voter's
+on-chain nonce and queued votes. EAS 1.2+ signs attester, value and deadline
+as well; older deployments (e.g. 0.26) use the shorter legacy request.
+"""
+
+import asyncio
+import json
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from http import HTTPStatus
+from typing import Dict, List, Optional, Tuple
+
+import click
+from eth_keys import keys
+from eth_utils import keccak, to_checksum_address
+
+import offchain
+import safe_json
+from abi_codec import encode, encode_call, schema_decoder
+from http_json import handle_connection
+from indexer import ATTESTED_TOPIC
+from metrics import METRICS, count, gauge, span
+from preflight import VoteCache, revert_reason, vote_error
+from rpc_client import RpcClient, RpcError, RpcTransportError
+from tx_sender import PipelinedSender
+
+
+DELEGATED_VOTE_SCHEMAS = ("DELEGATED_SIMPLE_VOTE", "DELEGATED_ADVANCED_VOTE")
+
+DEFAULT_QUEUE = ".eas-relay-queue.jsonl"
+
+DOMAIN_NAME = "EAS"
+
+ATTEST_TYPEHASH = keccak(text="Attest(address attester,bytes32 schema,address recipient,uint64 expirationTime,"
+                              "bool revocable,bytes32 refUID,bytes data,uint256 value,uint256 nonce,uint64 deadline)")
+LEGACY_ATTEST_TYPEHASH = keccak(text="Attest(bytes32 schema,address recipient,uint64 expirationTime,bool revocable,"
+                                     "bytes32 refUID,bytes data,uint256 nonce)")
+
+MULTI_ATTEST_BY_DELEGATION_SIG = ("multiAttestByDelegation((bytes32,(address,uint64,bool,bytes32,bytes,uint256)[],"
+                                  "(uint8,bytes32,bytes32)[],address,uint64)[])")
+LEGACY_MULTI_ATTEST_BY_DELEGATION_SIG = ("multiAttestByDelegation((bytes32,(address,uint64,bool,bytes32,bytes,uint256)[],"
+                                         "(uint8,bytes32,bytes32)[],address)[])")
+
+SECP256K1_N = 0xFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFEBAAEDCE6AF48A03BBFD25E8CD0364141
+
+
+
+def is_legacy(version: str) -> bool:
+    """Whether EAS VERSION predates attester / value / deadline in delegated requests (1.2.0)."""
+    try:
+        return tuple(int(part) for part in version.split(".")[:2]) < (1, 2)
+    except ValueError:
+        return False
+
+
+def recover_delegated(separator: bytes, legacy: bool, message: tuple, signature: tuple) -> Optional[str]:
+    """
+    Signer of a delegated Attest request, or None if the signature is malformed.
+    MESSAGE is (attester, schema, recipient, expirationTime, revocable, refUID,
+    data, value, nonce, deadline); SIGNATURE is (v, r, s).
+    """
+    attester, schema, recipient, expiration, revocable, ref_uid, data, value, nonce, deadline = message
+    if legacy:
+        struct = encode(["bytes32", "bytes32", "address", "uint64", "bool", "bytes32", "bytes32", "uint256"],
+                        [LEGACY_ATTEST_TYPEHASH, schema, recipient, expiration, revocable, ref_uid, keccak(data), nonce])
+    else:
+        struct = encode(["bytes32", "address", "bytes32", "address", "uint64", "bool", "bytes32", "bytes32",
+                         "uint256", "uint256", "uint64"],
+                        [ATTEST_TYPEHASH, attester, schema, recipient, expiration, revocable, ref_uid, keccak(data),
+                         value, nonce, deadline])
+    v, r, s = signature
+    if v >= 27:
+        v -= 27
+    if v not in (0, 1) or not 0 < r < SECP256K1_N or not 0 < s <= SECP256K1_N // 2:
+        return None
+    digest = keccak(b"\x19\x01" + separator + keccak(struct))
+    try:
+        return keys.Signature(vrs=(v, r, s)).recover_public_key_from_msg_hash(digest).to_checksum_address()
+    except Exception:
+        return None
+
+
+class VoteRejected(ValueError):
+    """A vote the relay will not queue; STATUS is the HTTP status to answer with."""
+
+    def __init__(self, message: str, status: int = HTTPStatus.BAD_REQUEST):
+        super().__init__(message)
+        self.status = status
+
+
+def _bytes32(value) -> str:
+    if not isinstance(value, str) or not value.startswith("0x") or len(value) != 66:
+        raise VoteRejected(f"Expected a 0x-prefixed bytes32, got {value!r}")
+    int(value, 16)
+    return value.lower()
+
+
+def _uint(value, bits: int) -> int:
+    number = int(value, 0) if isinstance(value, str) else value
+    if not isinstance(number, int) or isinstance(number, bool) or not 0 <= number < 2 ** bits:
+        raise VoteRejected(f"Expected a uint{bits}, got {value!r}")
+    return number
+
+
+class DelegatedVote:
+    """One signed delegated vote, as POSTed: a JSON object with the fields below."""
+
+    __slots__ = ("schema", "attester", "recipient", "ref_uid", "data", "nonce", "deadline", "v", "r", "s")
+
+    FIELDS = ("schema", "attester", "recipient", "refUID", "data", "nonce", "deadline", "signature")
+
+    @classmethod
+    def from_payload(cls, payload: dict) -> "DelegatedVote":
+        """Parse and normalize; raises VoteRejected on a malformed vote."""
+        if not isinstance(payload, dict):
+            raise VoteRejected("Expected a JSON object")
+        missing = [field for field in cls.FIELDS if field not in payload and field != "deadline"]
+        if missing:
+            raise VoteRejected(f"Missing fields: {', '.join(missing)}")
+        if payload.get("revocable") or payload.get("expirationTime") or payload.get("value"):
+            raise VoteRejected("Delegated votes are irrevocable, never expire and carry no value")
+        vote = cls()
+        try:
+            vote.schema = _bytes32(payload["schema"])
+            vote.attester = to_checksum_address(payload["attester"])
+            vote.recipient = to_checksum_address(payload["recipient"])
+            vote.ref_uid = _bytes32(payload["refUID"])
+            if not isinstance(payload["data"], str) or not payload["data"].startswith("0x"):
+                raise VoteRejected("data must be 0x-prefixed hex")
+            vote.data = bytes.fromhex(payload["data"][2:])
+            vote.nonce = _uint(payload["nonce"], 256)
+            vote.deadline = _uint(payload.get("deadline", 0), 64)
+            signature = payload["signature"]
+            vote.v = _uint(signature["v"], 8)
+            vote.r = _uint(signature["r"], 256)
+            vote.s = _uint(signature["s"], 256)
+        except (TypeError, KeyError, ValueError) as e:
+            if isinstance(e, VoteRejected):
+                raise
+            raise VoteRejected(f"Malformed vote: {e}")
+        return vote
+
+    def to_payload(self) -> dict:
+        return {"schema": self.schema, "attester": self.attester, "recipient": self.recipient, "refUID": self.ref_uid,
+                "data": "0x" + self.data.hex(), "nonce": self.nonce, "deadline": self.deadline,
+                "signature": {"v": self.v, "r": hex(self.r), "s": hex(self.s)}}
+
+    @property
+    def key(self) -> str:
+        """(proposal, voter): the pair VotesResolver allows one vote for."""
+        return f"{self.ref_uid}:{self.attester.lower()}"
+
+    def message(self) -> tuple:
+        return (self.attester, self.schema, self.recipient, 0, False, self.ref_uid, self.data, 0, self.nonce,
+                self.deadline)
+
+    def request(self, legacy: bool) -> tuple:
+        """MultiDelegatedAttestationRequest carrying just this vote."""
+        entry = (self.schema, [(self.recipient, 0, False, self.ref_uid, self.data, 0)],
+                 [(self.v if self.v >= 27 else self.v + 27, self.r.to_bytes(32, "big"), self.s.to_bytes(32, "big"))],
+                 self.attester)
+        return entry if legacy else entry + (self.deadline,)
+
+
+class RelayJournal:
+    """
+    Append-only JSONL queue of the relay: votes as they are accepted, the
+    batches they are sent in and their outcome. Compacted on open.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.votes: Dict[str, dict] = {}            # key -> {"vote", "received", "status", ...}
+        self.batches: Dict[int, List[str]] = {}     # unsettled batch -> vote keys
+        self.last_batch = 0
+        if os.path.exists(path):
+            with open(path) as f:
+                for line in f:
+                    if line.strip():
+                        self._apply(json.loads(line))
+            self.compact()
+
+    def _apply(self, entry: dict):
+        event = entry["event"]
+        if event == "queued":
+            self.votes[entry["key"]] = {"vote": entry["vote"], "received": entry["received"], "status": "queued"}
+        elif event == "batched":
+            self.batches[entry["batch"]] = entry["keys"]
+            self.last_batch = max(self.last_batch, entry["batch"])
+            for key in entry["keys"]:
+                self.votes[key].update(status="batched", batch=entry["batch"])
+        elif event == "requeued":
+            self.last_batch = max(self.last_batch, entry["batch"])
+            for key in self.batches.pop(entry["batch"], ()):
+                self.votes[key]["status"] = "queued"
+        elif event == "settled":
+            # compact() keeps the counter as a lone "settled" line: batch keys are never reused
+            self.last_batch = max(self.last_batch, entry["batch"])
+            self.batches.pop(entry["batch"], None)
+        elif event == "done":
+            if entry["status"] == "confirmed":
+                state = self.votes.setdefault(entry["key"], {})
+                state.update(status="confirmed", uid=entry.get("uid"), tx=entry.get("tx"))
+                state.pop("vote", None)
+            else:
+                self.votes.pop(entry["key"], None)
+
+    def record(self, entries: List[dict]):
+        for entry in entries:
+            self._apply(dict(entry))
+        with open(self.path, "a") as f:
+            f.write("".join(json.dumps(entry) + "\n" for entry in entries))
+            f.flush()
+            os.fsync(f.fileno())
+
+    def compact(self):
+        """Rewrite the file as just the current state."""
+        lines = []
+        for key, state in self.votes.items():
+            if state["status"] == "confirmed":
+                lines.append({"event": "done", "key": key, "status": "confirmed", "uid": state.get("uid"),
+                              "tx": state.get("tx")})
+            else:
+                lines.append({"event": "queued", "key": key, "vote": state["vote"], "received": state["received"]})
+        for batch, keys_ in sorted(self.batches.items()):
+            lines.append({"event": "batched", "batch": batch, "keys": keys_})
+        lines.append({"event": "settled", "batch": self.last_batch})
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            f.write("".join(json.dumps(line) + "\n" for line in lines))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+
+
+def _percentile(values: List[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 3)
+
+
+class VoteRelay:
+    """
+    Queue, validate and submit delegated votes. SCHEMAS maps the delegated
+    vote schema UIDs (0x-prefixed) to their schema strings. CACHE, if given,
+    rejects votes on known proposals that VotesResolver would revert; REFRESH
+    is called before each batch (e.g. to catch the cache up with the chain).
+    At most MAX_BATCHES batch transactions are in flight at once.
+    """
+
+    def __init__(self, rpc: RpcClient, sender: PipelinedSender, eas_contract: str, chain_id: int, version: str,
+                 schemas: Dict[str, str], queue_path: str = DEFAULT_QUEUE, batch_size: int = 50,
+                 max_wait: float = 5.0, workers: Optional[int] = None, cache: Optional[VoteCache] = None,
+                 refresh=None, max_batches: int = 4):
+        self.rpc = rpc
+        self.sender = sender
+        self.eas_contract = to_checksum_address(eas_contract)
+        self.chain_id = chain_id
+        self.legacy = is_legacy(version)
+        self.separator = offchain.domain_separator({"name": DOMAIN_NAME, "version": version, "chainId": chain_id,
+                                                    "verifyingContract": self.eas_contract})
+        self.schemas = {uid.lower(): schema for uid, schema in schemas.items()}
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+        self.workers = workers
+        self.cache = cache
+        self.refresh = refresh
+
+        self.journal = RelayJournal(queue_path)
+        self.queue: List[str] = []                          # keys waiting for a batch, oldest first
+        self.pending: Dict[str, DelegatedVote] = {}         # key -> vote, until confirmed or dropped
+        self.next_nonce: Dict[str, int] = {}                # attester -> nonce its next vote must carry
+        self.in_flight = 0
+        self.busy = set()                                   # attesters with a vote in an unsettled batch
+        self.counts = {"accepted": 0, "rejected": 0, "confirmed": 0, "failed": 0, "batches": 0}
+        self.latencies = deque(maxlen=10000)                # seconds from receipt by the relay to confirmation
+        self._wake = asyncio.Event()
+        self._slots = asyncio.Semaphore(max_batches)
+        self._tasks = set()
+        self._sending = threading.Lock()                    # the sender is not thread-safe
+        self._mined: Dict[str, dict] = {}                   # sender key -> receipt, until its batch collects it
+        self._pool = None
+        for key, state in sorted(self.journal.votes.items(), key=lambda item: item[1].get("received", 0)):
+            if state["status"] in ("queued", "batched"):
+                self.pending[key] = DelegatedVote.from_payload(state["vote"])
+                if state["status"] == "queued":
+                    self.queue.append(key)
+        for vote in self.pending.values():
+            self.next_nonce[vote.attester] = max(self.next_nonce.get(vote.attester, 0), vote.nonce + 1)
+
+    # --- intake --------------------------------------------------------------
+
+    def _fetch_nonce(self, attester: str) -> int:
+        return int(self.rpc.eth_call(self.eas_contract, "0x" + encode_call("getNonce(address)", [attester]).hex()), 16)
+
+    async def _check(self, vote: DelegatedVote):
+        schema = self.schemas.get(vote.schema)
+        if schema is None:
+            raise VoteRejected(f"Not a delegated vote schema on chain {self.chain_id}: {vote.schema}")
+        try:
+            fields = schema_decoder(schema).decode(vote.data)
+        except Exception as e:
+            raise VoteRejected(f"data does not decode as '{schema}': {e}")
+        if to_checksum_address(fields["voter"]) != vote.attester:
+            raise VoteRejected("The voter field must be the signing attester")
+        now = int(time.time())
+        if vote.deadline and vote.deadline <= now + self.max_wait:
+            raise VoteRejected("Signature deadline passes before the vote can be sent", HTTPStatus.UNPROCESSABLE_ENTITY)
+        if vote.key in self.journal.votes:
+            raise VoteRejected("Already voted on this proposal", HTTPStatus.CONFLICT)
+        if self.cache is not None and vote.ref_uid in self.cache.proposals:
+            reason = vote_error(self.cache, vote.attester, vote.recipient, vote.ref_uid, now)
+            if reason:
+                raise VoteRejected(f"Vote would revert: {reason}",
+                                   HTTPStatus.CONFLICT if reason == "AlreadyVoted" else HTTPStatus.UNPROCESSABLE_ENTITY)
+
+        loop = asyncio.get_running_loop()
+        signer = await loop.run_in_executor(self._pool, recover_delegated, self.separator, self.legacy,
+                                            vote.message(), (vote.v, vote.r, vote.s))
+        if signer != vote.attester:
+            raise VoteRejected("Signature does not match the attester", HTTPStatus.UNAUTHORIZED)
+        if vote.attester not in self.next_nonce:
+            onchain = await asyncio.to_thread(self._fetch_nonce, vote.attester)
+            self.next_nonce.setdefault(vote.attester, onchain)
+
+    async def submit(self, payload: dict) -> Tuple[int, dict]:
+        """Validate and queue one vote; returns (HTTP status, response body)."""
+        try:
+            vote = DelegatedVote.from_payload(payload)
+            await self._check(vote)
+            # Re-checked after the awaits above: a concurrent request may have won
+            if vote.key in self.journal.votes:
+                raise VoteRejected("Already voted on this proposal", HTTPStatus.CONFLICT)
+            if vote.nonce != self.next_nonce[vote.attester]:
+                raise VoteRejected(f"Expected nonce {self.next_nonce[vote.attester]} for {vote.attester}",
+                                   HTTPStatus.CONFLICT)
+        except VoteRejected as e:
+            self.counts["rejected"] += 1
+            count("relay_votes", status="rejected")
+            return e.status, {"error": str(e)}
+        except (RpcError, RpcTransportError) as e:
+            return HTTPStatus.SERVICE_UNAVAILABLE, {"error": f"RPC unavailable: {e}"}
+
+        self.next_nonce[vote.attester] = vote.nonce + 1
+        self.journal.record([{"event": "queued", "key": vote.key, "vote": vote.to_payload(), "received": time.time()}])
+        self.pending[vote.key] = vote
+        self.queue.append(vote.key)
+        self.counts["accepted"] += 1
+        count("relay_votes", status="queued")
+        gauge("relay_queue_depth", len(self.queue))
+        self._wake.set()            # start the MAX_WAIT clock, or flush a full batch
+        return HTTPStatus.ACCEPTED, {"key": vote.key, "status": "queued"}
+
+    def status(self, proposal_id: str, voter: str) -> Optional[dict]:
+        key = f"{proposal_id.lower()}:{voter.lower()}"
+        state = self.journal.votes.get(key)
+        if state is None:
+            return None
+        return {"key": key, **{k: v for k, v in state.items() if k != "vote"}}
+
+    def stats(self) -> dict:
+        oldest = self.journal.votes[self.queue[0]]["received"] if self.queue else None
+        return {"queued": len(self.queue), "in_flight": self.in_flight, "batches_in_flight": len(self._tasks),
+                "oldest_wait": round(time.time() - oldest, 3) if oldest else 0.0,
+                **self.counts,
+                "latency": {"p50": _percentile(list(self.latencies), 0.5),
+                            "p95": _percentile(list(self.latencies), 0.95),
+                            "max": round(max(self.latencies), 3) if self.latencies else None}}
+
+    # --- batching ------------------------------------------------------------
+
+    def _take(self) -> List[DelegatedVote]:
+        """Oldest queued votes, at most one per attester so nonces apply in order."""
+        taken, attesters, rest = [], set(self.busy), []
+        for key in self.queue:
+            vote = self.pending[key]
+            if len(taken) < self.batch_size and vote.attester not in attesters:
+                taken.append(vote)
+                attesters.add(vote.attester)
+            else:
+                rest.append(key)
+        self.queue = rest
+        return taken
+
+    def _calldata(self, votes: List[DelegatedVote]) -> bytes:
+        signature = LEGACY_MULTI_ATTEST_BY_DELEGATION_SIG if self.legacy else MULTI_ATTEST_BY_DELEGATION_SIG
+        return encode_call(signature, [[vote.request(self.legacy) for vote in votes]])
+
+    def _simulate(self, votes: List[DelegatedVote]) -> Dict[str, str]:
+        """Revert reason by key for the votes that would make the batch revert."""
+        if self.refresh:
+            with span("relay_refresh"):
+                self.refresh()
+        call = {"from": self.sender.signer.address, "to": self.eas_contract}
+        with span("relay_simulate"):
+            try:
+                self.rpc.call("eth_call", [dict(call, data="0x" + self._calldata(votes).hex()), "latest"])
+                return {}
+            except RpcError:
+                pass
+            calls = [("eth_call", [dict(call, data="0x" + self._calldata([vote]).hex()), "latest"]) for vote in votes]
+            return {vote.key: revert_reason(result)
+                    for vote, result in zip(votes, self.rpc.batch(calls, raise_errors=False))
+                    if isinstance(result, RpcError)}
+
+    def _submit(self, batch: int, votes: List[DelegatedVote]) -> Optional[dict]:
+        """Send (or keep tracking) the batch transaction; returns its receipt if a previous run confirmed it."""
+        key = f"relay:{self.chain_id}:{batch}"
+        with self._sending:
+            if self.sender.is_confirmed(key):
+                return self.sender.confirmed_receipt(key)
+            self.sender.submit(key, self.eas_contract, self._calldata(votes))
+        return None
+
+    def _receipt(self, key: str) -> Optional[dict]:
+        """Receipt of sender KEY once mined; one poll covers every batch in flight."""
+        with self._sending:
+            if key not in self._mined:
+                self._mined.update(self.sender.poll_receipts())
+            return self._mined.pop(key, None)
+
+    def _drop(self, key: str, status: str, reason: str) -> dict:
+        vote = self.pending.pop(key)
+        # Its nonce was not used: expect whatever follows the voter's remaining votes, or ask the chain
+        remaining = [other.nonce for other in self.pending.values() if other.attester == vote.attester]
+        if remaining:
+            self.next_nonce[vote.attester] = max(remaining) + 1
+        else:
+            self.next_nonce.pop(vote.attester, None)
+        self.counts[status if status == "failed" else "rejected"] += 1
+        count("relay_votes", status=status)
+        return {"event": "done", "key": key, "status": status, "reason": reason}
+
+    def _settle(self, batch: int, votes: List[DelegatedVote], receipt: dict):
+        entries = []
+        if int(receipt["status"], 16) == 1:
+            uids = ["0x" + log["data"][2:66] for log in receipt.get("logs", [])
+                    if log["address"].lower() == self.eas_contract.lower() and log["topics"][0] == ATTESTED_TOPIC]
+            now = time.time()
+            for vote, uid in zip(votes, uids + [None] * (len(votes) - len(uids))):
+                self.latencies.append(now - self.journal.votes[vote.key]["received"])
+                METRICS.observe("relay_vote_latency", self.latencies[-1])
+                self.pending.pop(vote.key)
+                self.counts["confirmed"] += 1
+                count("relay_votes", status="confirmed")
+                entries.append({"event": "done", "key": vote.key, "status": "confirmed", "uid": uid,
+                                "tx": receipt["transactionHash"]})
+        else:
+            entries += [self._drop(vote.key, "failed", f"transaction {receipt['transactionHash']} reverted")
+                        for vote in votes]
+        entries.append({"event": "settled", "batch": batch})
+        self.journal.record(entries)
+
+    async def _complete(self, batch: int, votes: List[DelegatedVote]):
+        """Submit a recorded batch and wait for it, retrying through RPC failures."""
+        key = f"relay:{self.chain_id}:{batch}"
+        delay = 1.0
+        self.in_flight += len(votes)
+        gauge("relay_in_flight", self.in_flight)
+        try:
+            while True:
+                try:
+                    receipt = await asyncio.to_thread(self._submit, batch, votes)
+                    while receipt is None:
+                        await asyncio.sleep(self.sender.poll)
+                        receipt = await asyncio.to_thread(self._receipt, key)
+                    break
+                except RpcError as e:
+                    if key not in self.sender.pending and key not in self._mined:
+                        # Rejected before broadcast (e.g. gas estimation reverted): re-check next batch
+                        self.journal.record([{"event": "requeued", "batch": batch}])
+                        self.queue[:0] = [vote.key for vote in votes]
+                        return
+                    error = e
+                except RpcTransportError as e:
+                    error = e
+                click.echo(f"Relay batch {batch}: {error}; retrying in {delay:.0f}s", err=True)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 60.0)
+            self._settle(batch, votes, receipt)
+        finally:
+            self.in_flight -= len(votes)
+            gauge("relay_in_flight", self.in_flight)
+            self.busy.difference_update(vote.attester for vote in votes)
+            self._slots.release()
+            self._wake.set()        # its voters' next votes can go now
+
+    def _finished(self, task: asyncio.Task):
+        self._tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            click.echo(f"Relay batch failed: {task.exception()!r}", err=True)
+
+    def _launch(self, batch: int, votes: List[DelegatedVote]):
+        """Complete BATCH in the background, holding one of the MAX_BATCHES slots until it settles."""
+        self.busy.update(vote.attester for vote in votes)
+        task = asyncio.create_task(self._complete(batch, votes))
+        self._tasks.add(task)
+        task.add_done_callback(self._finished)
+
+    async def flush(self) -> bool:
+        """
+        Send one batch of queued votes, once fewer than MAX_BATCHES are in
+        flight, without waiting for it to be mined. Returns False if no queued
+        vote could go because each voter already has a batch in flight.
+        """
+        await self._slots.acquire()
+        launched = False
+        try:
+            votes = self._take()
+            gauge("relay_queue_depth", len(self.queue))
+            if not votes:
+                return False
+            try:
+                reverts = await asyncio.to_thread(self._simulate, votes)
+            except (RpcError, RpcTransportError) as e:
+                click.echo(f"Relay: could not simulate batch ({e}); retrying", err=True)
+                self.queue[:0] = [vote.key for vote in votes]
+                await asyncio.sleep(1.0)
+                return True
+            if reverts:
+                self.journal.record([self._drop(key, "rejected", reason) for key, reason in reverts.items()])
+                votes = [vote for vote in votes if vote.key not in reverts]
+            if not votes:
+                return True
+            batch = self.journal.last_batch + 1
+            self.journal.record([{"event": "batched", "batch": batch, "keys": [vote.key for vote in votes]}])
+            self.counts["batches"] += 1
+            self._launch(batch, votes)
+            launched = True
+            return True
+        finally:
+            if not launched:
+                self._slots.release()
+
+    async def run(self):
+        """Flush whenever a full batch is queued or the oldest vote has waited MAX_WAIT."""
+        # Batches a previous run recorded but never settled
+        for batch, keys_ in sorted(self.journal.batches.items()):
+            key = f"relay:{self.chain_id}:{batch}"
+            if self.sender.is_confirmed(key) or key in self.sender.pending:
+                await self._slots.acquire()
+                self._launch(batch, [self.pending[k] for k in keys_])
+            else:
+                self.journal.record([{"event": "requeued", "batch": batch}])
+                self.queue[:0] = keys_
+
+        while True:
+            wait = None
+            if self.queue:
+                wait = self.journal.votes[self.queue[0]]["received"] + self.max_wait - time.time()
+            if self.queue and (len(self.queue) >= self.batch_size or wait <= 0):
+                if await self.flush():
+                    continue
+                wait = None         # every queued voter has a batch in flight; one settling wakes us
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), wait)
+            except asyncio.TimeoutError:
+                pass
+
+    # --- HTTP ----------------------------------------------------------------
+
+    async def route(self, method: str, path: str, headers: Dict[str, str], body: bytes) -> Tuple[int, object]:
+        parts = [part for part in path.split("?")[0].split("/") if part]
+        if method == "POST" and parts == ["votes"]:
+            try:
+                payload = safe_json.loads(body)
+            except ValueError as e:
+                return HTTPStatus.BAD_REQUEST, {"error": f"Invalid JSON: {e}"}
+            if isinstance(payload, list):
+                results = await asyncio.gather(*(self.submit(item) for item in payload))
+                return HTTPStatus.OK, [dict(result, status_code=int(status)) for status, result in results]
+            return await self.submit(payload)
+        if method == "GET" and len(parts) == 3 and parts[0] == "votes":
+            state = self.status(parts[1], parts[2])
+            return (HTTPStatus.OK, state) if state else (HTTPStatus.NOT_FOUND, {"error": "Unknown vote"})
+        if method == "GET" and parts == ["stats"]:
+            return HTTPStatus.OK, self.stats()
+        return HTTPStatus.NOT_FOUND, {"error": f"No route for {method} {path}"}
+
+    async def serve(self, host: str, port: int):
+        """Answer HTTP on HOST:PORT and flush batches until cancelled."""
+        with ProcessPoolExecutor(max_workers=self.workers) as self._pool:
+            server = await asyncio.start_server(lambda r, w: handle_connection(r, w, self.route), host, port)
+            async with server:
+                await asyncio.gather(server.serve_forever(), self.run())
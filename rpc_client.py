@@ -0,0 +1,310 @@
+"""
+Pooled JSON-RPC client with multi-endpoint failover.
+
+One RpcClient is shared per chain. It keeps HTTP/1.1 keep-alive connections
+to every configured endpoint, prefers the endpoint with the lowest observed
+latency, and on transport errors, rate limits, non-2xx statuses or bodies
+that are not JSON-RPC fails over to the next endpoint with exponential backoff.
+
+Works against any JSON-RPC node, including a local anvil:
+
+    client = RpcClient(["http://127.0.0.1:8545"])
+    client.call("eth_chainId")
+"""
+
+import http.client
+import itertools
+import json
+import queue
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Sequence, Tuple
+from urllib.parse import urlparse
+
+from metrics import count, span
+
+
+# JSON-RPC error codes providers use for rate limiting / overload
+RETRYABLE_RPC_CODES = {-32005, -32016, -32090, 429}
+RETRYABLE_HTTP_STATUS = {408, 429, 500, 502, 503, 504}
+
+# -32005 also means "query returned more than 10000 results" on some providers;
+# that is about the query, not the endpoint, so it goes back to the caller
+QUERY_LIMIT_MARKERS = ("more than", "results", "block range")
+
+
+def _decode(payload: bytes, ids: List[int]) -> Optional[List[dict]]:
+    """JSON-RPC responses in PAYLOAD, or None unless it answers at least one of IDS."""
+    try:
+        responses = json.loads(payload)
+    except (ValueError, RecursionError):
+        return None
+    if isinstance(responses, dict):
+        responses = [responses]
+    if not isinstance(responses, list) or not all(isinstance(r, dict) for r in responses):
+        return None
+    wanted = set(ids)
+    if not any(isinstance(r.get("id"), int) and r["id"] in wanted for r in responses):
+        return None
+    return responses
+
+
+def _rate_limited(response: dict) -> bool:
+    error = response.get("error") or {}
+    if error.get("code") not in RETRYABLE_RPC_CODES:
+        return False
+    message = (error.get("message") or "").lower()
+    return not any(marker in message for marker in QUERY_LIMIT_MARKERS)
+
+
+class RpcError(Exception):
+    """A JSON-RPC error response (the node answered, the call failed)."""
+
+    def __init__(self, code: int, message: str, data=None):
+        super().__init__(f"RPC error {code}: {message}")
+        self.code = code
+        self.message = message
+        self.data = data
+
+
+class RpcTransportError(Exception):
+    """Every endpoint failed to answer after all retries."""
+
+
+class Endpoint:
+    """A single RPC URL with its own keep-alive connection pool and health."""
+
+    def __init__(self, url: str, timeout: float, pool_size: int):
+        self.url = url
+        parsed = urlparse(url)
+        self.https = parsed.scheme == "https"
+        self.host = parsed.hostname
+        self.port = parsed.port or (443 if self.https else 80)
+        self.path = (parsed.path or "/") + (f"?{parsed.query}" if parsed.query else "")
+        self.timeout = timeout
+        self.pool = queue.LifoQueue(maxsize=pool_size)
+        self.latency = None          # EWMA of request latency in seconds
+        self.failures = 0
+        self.cooldown_until = 0.0
+
+    def _connect(self) -> http.client.HTTPConnection:
+        cls = http.client.HTTPSConnection if self.https else http.client.HTTPConnection
+        return cls(self.host, self.port, timeout=self.timeout)
+
+    def post(self, body: bytes) -> Tuple[int, bytes]:
+        """POST a JSON body, reusing a pooled connection when one is idle."""
+        try:
+            conn = self.pool.get_nowait()
+        except queue.Empty:
+            conn = self._connect()
+
+        started = time.monotonic()
+        try:
+            conn.request("POST", self.path, body=body, headers={
+                "Content-Type": "application/json",
+                "Connection": "keep-alive",
+            })
+            response = conn.getresponse()
+            payload = response.read()
+        except Exception:
+            conn.close()
+            raise
+
+        self.record_latency(time.monotonic() - started)
+        if response.will_close:
+            conn.close()
+        else:
+            try:
+                self.pool.put_nowait(conn)
+            except queue.Full:
+                conn.close()
+        return response.status, payload
+
+    def record_latency(self, seconds: float):
+        self.latency = seconds if self.latency is None else 0.8 * self.latency + 0.2 * seconds
+
+    def mark_failed(self, backoff: float):
+        self.failures += 1
+        self.cooldown_until = time.monotonic() + backoff * (2 ** min(self.failures, 6))
+
+    def mark_ok(self):
+        self.failures = 0
+        self.cooldown_until = 0.0
+
+    def close(self):
+        while True:
+            try:
+                self.pool.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+class RpcClient:
+    """Thread-safe JSON-RPC client over a set of equivalent endpoints."""
+
+    def __init__(self, urls: Sequence[str], timeout: float = 10.0, max_retries: int = 4,
+                 backoff: float = 0.25, pool_size: int = 8):
+        if not urls:
+            raise ValueError("At least one RPC URL is required")
+        self.endpoints = [Endpoint(url, timeout, pool_size) for url in urls]
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    # --- endpoint selection --------------------------------------------------
+
+    def rank_endpoints(self) -> List[Endpoint]:
+        """Probe every endpoint with eth_blockNumber and record its latency."""
+        for endpoint in self.endpoints:
+            try:
+                status, _ = endpoint.post(self._encode([("eth_blockNumber", [])])[0])
+                if status != 200:
+                    endpoint.mark_failed(self.backoff)
+            except Exception:
+                endpoint.mark_failed(self.backoff)
+        return self._ordered()
+
+    def _ordered(self) -> List[Endpoint]:
+        now = time.monotonic()
+        healthy = [e for e in self.endpoints if e.cooldown_until <= now]
+        cooling = [e for e in self.endpoints if e.cooldown_until > now]
+        healthy.sort(key=lambda e: float("inf") if e.latency is None else e.latency)
+        cooling.sort(key=lambda e: e.cooldown_until)
+        return healthy + cooling
+
+    @property
+    def best_url(self) -> str:
+        return self._ordered()[0].url
+
+    # --- requests ------------------------------------------------------------
+
+    def _encode(self, calls: Sequence[Tuple[str, list]]) -> Tuple[bytes, List[int]]:
+        with self._lock:
+            ids = [next(self._ids) for _ in calls]
+        payload = [{"jsonrpc": "2.0", "id": i, "method": m, "params": list(p)} for i, (m, p) in zip(ids, calls)]
+        body = payload[0] if len(payload) == 1 else payload
+        return json.dumps(body).encode(), ids
+
+    def _send(self, calls: Sequence[Tuple[str, list]]) -> List[dict]:
+        """Send calls as one request, failing over across endpoints."""
+        body, ids = self._encode(calls)
+        last_error = None
+        for method, n in Counter(method for method, _ in calls).items():
+            count("rpc_calls", n, method=method)
+
+        for attempt in range(self.max_retries + 1):
+            for endpoint in self._ordered():
+                count("rpc_requests")
+                try:
+                    with span("rpc"):
+                        status, payload = endpoint.post(body)
+                except (OSError, http.client.HTTPException) as e:
+                    endpoint.mark_failed(self.backoff)
+                    last_error = f"{endpoint.url}: {e}"
+                    count("rpc_retries", reason="transport")
+                    continue
+
+                responses = None if status in RETRYABLE_HTTP_STATUS else _decode(payload, ids)
+                if responses is None or (not 200 <= status < 300 and not any("error" in r for r in responses)):
+                    # Proxy error pages, auth failures, HTML: try the next endpoint. A non-2xx
+                    # status carrying JSON-RPC errors for our ids is still the node's answer.
+                    endpoint.mark_failed(self.backoff)
+                    last_error = f"{endpoint.url}: HTTP {status}: {payload[:200]!r}"
+                    count("rpc_retries", reason="http" if not 200 <= status < 300 else "invalid")
+                    continue
+                if any(_rate_limited(r) for r in responses):
+                    endpoint.mark_failed(self.backoff)
+                    last_error = f"{endpoint.url}: rate limited"
+                    count("rpc_retries", reason="rate_limited")
+                    continue
+
+                endpoint.mark_ok()
+                by_id = {r.get("id"): r for r in responses}
+                return [by_id.get(i, {"error": {"code": -32603, "message": "missing response"}}) for i in ids]
+
+            if attempt < self.max_retries:
+                time.sleep(self.backoff * (2 ** attempt))
+
+        count("rpc_failures")
+        raise RpcTransportError(f"All RPC endpoints failed: {last_error}")
+
+    @staticmethod
+    def _result(response: dict):
+        if "error" in response:
+            error = response["error"]
+            reverted = error.get("code") == 3 or "revert" in (error.get("message") or "").lower()
+            count("rpc_reverts" if reverted else "rpc_errors")
+            raise RpcError(error.get("code"), error.get("message"), error.get("data"))
+        return response.get("result")
+
+    def call(self, method: str, params: Optional[list] = None):
+        """Single JSON-RPC call; raises RpcError on an error response."""
+        return self._result(self._send([(method, params or [])])[0])
+
+    def batch(self, calls: Sequence[Tuple[str, list]], size: int = 100, raise_errors: bool = True) -> list:
+        """
+        Send many calls as JSON-RPC batch requests of at most SIZE calls each.
+        Results come back in call order. With raise_errors=False failed calls
+        are returned as RpcError instances instead of raising.
+        """
+        results = []
+        for start in range(0, len(calls), size):
+            for response in self._send(calls[start:start + size]):
+                try:
+                    results.append(self._result(response))
+                except RpcError as e:
+                    if raise_errors:
+                        raise
+                    results.append(e)
+        return results
+
+    # --- helpers -------------------------------------------------------------
+
+    def chain_id(self) -> int:
+        return int(self.call("eth_chainId"), 16)
+
+    def block_number(self) -> int:
+        return int(self.call("eth_blockNumber"), 16)
+
+    def eth_call(self, to: str, data: str, block: str = "latest", sender: Optional[str] = None) -> str:
+        tx = {"to": to, "data": data}
+        if sender:
+            tx["from"] = sender
+        return self.call("eth_call", [tx, block])
+
+    def get_receipt(self, tx_hash: str) -> Optional[dict]:
+        return self.call("eth_getTransactionReceipt", [tx_hash])
+
+    def wait_for_receipt(self, tx_hash: str, timeout: float = 300.0, poll: float = 1.0) -> dict:
+        """Poll for a transaction receipt until it is mined or TIMEOUT elapses."""
+        deadline = time.monotonic() + timeout
+        with span("confirm"):
+            while True:
+                receipt = self.get_receipt(tx_hash)
+                if receipt is not None:
+                    return receipt
+                if time.monotonic() > deadline:
+                    raise TimeoutError(f"Timed out waiting for receipt of {tx_hash}")
+                time.sleep(poll)
+
+    def close(self):
+        for endpoint in self.endpoints:
+            endpoint.close()
+
+
+_CLIENTS: Dict[Tuple[str, ...], RpcClient] = {}
+_CLIENTS_LOCK = threading.Lock()
+
+
+def get_client(urls: Sequence[str]) -> RpcClient:
+    """Return the shared RpcClient for a set of endpoint URLs, ranked by latency on first use."""
+    key = tuple(urls)
+    with _CLIENTS_LOCK:
+        if key not in _CLIENTS:
+            client = RpcClient(key)
+            if len(key) > 1:
+                client.rank_endpoints()
+            _CLIENTS[key] = client
+        return _CLIENTS[key]
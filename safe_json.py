@@ -0,0 +1,43 @@
+"""
+json.loads with a nesting limit, for untrusted input.
+
+eth_account imports py_ecc, which raises the interpreter's recursion limit
+to 100000. With that limit the C JSON decoder overflows the native stack
+(a segfault, not a RecursionError) on a few hundred kilobytes of `[[[[...`.
+Anything parsing JSON from the network or from attestation payloads should
+go through `loads`, which measures the nesting first.
+"""
+
+import json
+import re
+
+import numpy as np
+
+# String literals, whose brackets do not nest
+_STRING = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"', re.DOTALL)
+
+_OPEN, _CLOSE = np.frombuffer(b"[{", dtype=np.uint8), np.frombuffer(b"]}", dtype=np.uint8)
+
+MAX_DEPTH = 64
+
+
+def depth(text) -> int:
+    """Deepest [ / { nesting in a JSON text, ignoring brackets inside strings."""
+    raw = text.encode() if isinstance(text, str) else bytes(text)
+    if raw.count(b"[") + raw.count(b"{") == 0:
+        return 0
+    chars = np.frombuffer(_STRING.sub(b'""', raw), dtype=np.uint8)
+    steps = np.isin(chars, _OPEN).astype(np.int64) - np.isin(chars, _CLOSE)
+    return int(np.cumsum(steps).max(initial=0))
+
+
+def loads(text, max_depth: int = MAX_DEPTH):
+    """json.loads, raising ValueError for input nested deeper than MAX_DEPTH."""
+    raw = text.encode() if isinstance(text, str) else text
+    if isinstance(raw, (bytes, bytearray)) and raw.count(b"[") + raw.count(b"{") > max_depth \
+            and depth(raw) > max_depth:
+        raise ValueError(f"JSON nested deeper than {max_depth} levels")
+    try:
+        return json.loads(text)
+    except RecursionError:
+        raise ValueError("JSON nested too deeply")
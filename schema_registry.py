@@ -0,0 +1,126 @@
+"""
+Per-process registry of protocol schemas on every supported chain.
+
+Everything derived from a schema definition (field types, resolver,
+revocability, UID, register calldata) is computed once per (schema, chain)
+and reused. `verify` checks registrations on several chains with one batched
+`getSchema` JSON-RPC request per chain, running the chains concurrently.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from eth_utils import keccak, to_checksum_address
+
+from abi_codec import decode, encode_call, schema_encoder
+from rpc_client import RpcClient, RpcError
+
+
+ZERO_ADDRESS = "0x0000000000000000000000000000000000000000"
+
+SCHEMA_RECORD_TYPE = "(bytes32,address,bool,string)"
+
+
+class SchemaInfo:
+    """One schema as deployed on one chain."""
+
+    __slots__ = ("name", "chain_id", "schema", "types", "names", "resolver", "revocable", "uid")
+
+    def __init__(self, name: str, chain_id: int, schema: str, resolver: str, revocable: bool):
+        encoder = schema_encoder(schema)
+        self.name = name
+        self.chain_id = chain_id
+        self.schema = schema
+        self.types = encoder.types
+        self.names = encoder.names
+        self.resolver = to_checksum_address(resolver)
+        self.revocable = revocable
+        # SchemaRegistry UID: keccak(abi.encodePacked(schema, resolver, revocable))
+        packed = schema.encode("utf-8") + bytes.fromhex(self.resolver[2:]) + (b"\x01" if revocable else b"\x00")
+        self.uid = keccak(packed).hex()
+
+    def register_calldata(self) -> bytes:
+        return encode_call("register(string,address,bool)", [self.schema, self.resolver, self.revocable])
+
+
+class SchemaRegistry:
+    """
+    SchemaInfo for every (schema, chain). RESOLVERS maps schema name to a key
+    of the chain's deployment config (or None for no resolver); DEPLOYMENT
+    returns that config for a chain id.
+    """
+
+    def __init__(self, schemas: Dict[str, str], resolvers: Dict[str, Optional[str]],
+                 revocability: Dict[str, bool], deployment: Callable[[int], dict], chain_ids: Iterable[int] = ()):
+        self.schemas = schemas
+        self.resolvers = resolvers
+        self.revocability = revocability
+        self.deployment = deployment
+        self._infos: Dict[Tuple[str, int], SchemaInfo] = {}
+        for chain_id in chain_ids:
+            self.chain(chain_id)
+
+    def get(self, name: str, chain_id: int) -> SchemaInfo:
+        key = (name, chain_id)
+        info = self._infos.get(key)
+        if info is None:
+            label = self.resolvers[name]
+            resolver = self.deployment(chain_id)[label] if label else ZERO_ADDRESS
+            info = self._infos[key] = SchemaInfo(name, chain_id, self.schemas[name], resolver, self.revocability[name])
+        return info
+
+    def chain(self, chain_id: int) -> List[SchemaInfo]:
+        """Every schema on CHAIN_ID, in SCHEMAS order."""
+        return [self.get(name, chain_id) for name in self.schemas]
+
+    def by_uid(self, chain_id: int) -> Dict[str, SchemaInfo]:
+        """0x-prefixed UID -> SchemaInfo for CHAIN_ID."""
+        return {"0x" + info.uid: info for info in self.chain(chain_id)}
+
+    def verify_chain(self, rpc: RpcClient, chain_id: int, schema_contract: str) -> List[dict]:
+        """Compare each schema with its onchain SchemaRegistry record, in one batch request."""
+        infos = self.chain(chain_id)
+        calls = [("eth_call", [{"to": schema_contract,
+                                "data": "0x" + encode_call("getSchema(bytes32)", ["0x" + info.uid]).hex()}, "latest"])
+                 for info in infos]
+
+        results = []
+        for info, result in zip(infos, rpc.batch(calls, raise_errors=False)):
+            row = {"chain_id": chain_id, "schema": info.name, "uid": "0x" + info.uid}
+            if isinstance(result, RpcError):
+                row.update(status="error", detail=result.message)
+            elif not result or result == "0x":
+                # Calls to an address without code succeed with no return data
+                row.update(status="missing", detail=f"no SchemaRegistry contract at {schema_contract}")
+            else:
+                try:
+                    uid, resolver, revocable, schema = decode([SCHEMA_RECORD_TYPE], bytes.fromhex(result[2:]))[0]
+                except ValueError as e:
+                    uid, error = None, e
+                if uid is None:
+                    row.update(status="mismatch", detail=f"undecodable getSchema result: {error}")
+                elif int(uid, 16) == 0:
+                    row["status"] = "missing"
+                elif (resolver, revocable, schema) != (info.resolver, info.revocable, info.schema):
+                    row.update(status="mismatch", detail={"resolver": resolver, "revocable": revocable, "schema": schema})
+                else:
+                    row["status"] = "ok"
+            results.append(row)
+        return results
+
+    def verify(self, targets: Dict[int, Tuple[RpcClient, str]]) -> Dict[int, list]:
+        """
+        Verify several chains concurrently. TARGETS maps chain id to (rpc,
+        SchemaRegistry address); returns rows per chain, or the exception
+        for chains that could not be reached.
+        """
+        with ThreadPoolExecutor(max_workers=max(1, len(targets))) as pool:
+            futures = {chain_id: pool.submit(self.verify_chain, rpc, chain_id, contract)
+                       for chain_id, (rpc, contract) in targets.items()}
+            results = {}
+            for chain_id, future in futures.items():
+                try:
+                    results[chain_id] = future.result()
+                except Exception as e:
+                    results[chain_id] = e
+            return results
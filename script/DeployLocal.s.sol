@@ -0,0 +1,51 @@
+// SPDX-License-Identifier: UNLICENSED
+pragma solidity ^0.8.26;
+
+import {Script, console} from "forge-std/Script.sol";
+import {EntitiesResolver} from "../resolvers/EntitiesResolver.sol";
+import {VotesResolver} from "../resolvers/VotesResolver.sol";
+import {EAS} from "eas-contracts/EAS.sol";
+import {ISchemaRegistry} from "eas-contracts/ISchemaRegistry.sol";
+import {SchemaRegistry} from "eas-contracts/SchemaRegistry.sol";
+import {TransparentUpgradeableProxy} from "@openzeppelin/contracts/proxy/transparent/TransparentUpgradeableProxy.sol";
+import {ProxyAdmin} from "@openzeppelin/contracts/proxy/transparent/ProxyAdmin.sol";
+
+// Full stack for a local (anvil) chain: SchemaRegistry, EAS and both resolvers.
+// Used by script/deploy_local.sh for benchmarks.
+contract DeployLocalScript is Script {
+    function run() external {
+        vm.startBroadcast();
+
+        // Read caller information.
+        (, address deployer,) = vm.readCallers();
+
+        SchemaRegistry registry = new SchemaRegistry();
+        EAS eas = new EAS(ISchemaRegistry(address(registry)));
+
+        // The deployer is the default owner of the proxy Admin
+        ProxyAdmin proxyAdmin = new ProxyAdmin(deployer);
+
+        address[] memory initialAttesters = new address[](1);
+        initialAttesters[0] = deployer;
+
+        TransparentUpgradeableProxy entityProxy = new TransparentUpgradeableProxy(
+            address(new EntitiesResolver()),
+            address(proxyAdmin),
+            abi.encodeWithSelector(EntitiesResolver.initialize.selector, eas, deployer, initialAttesters)
+        );
+
+        TransparentUpgradeableProxy votesProxy = new TransparentUpgradeableProxy(
+            address(new VotesResolver()),
+            address(proxyAdmin),
+            abi.encodeWithSelector(VotesResolver.initialize.selector, eas, deployer)
+        );
+
+        vm.stopBroadcast();
+
+        console.log("Deployed SchemaRegistry at address:", address(registry));
+        console.log("Deployed EAS at address:", address(eas));
+        console.log("Deployed EntityResolver at address:", address(entityProxy));
+        console.log("Deployed VotesResolver at address:", address(votesProxy));
+        console.log("Deployed ProxyAdmin at address:", address(proxyAdmin));
+    }
+}
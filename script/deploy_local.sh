@@ -0,0 +1,43 @@
+#!/usr/bin/env bash
+set -euo pipefail
+
+# Deploy SchemaRegistry, EAS and both resolvers to a local anvil node and
+# write their addresses for bench.py.
+#
+#   anvil &
+#   script/deploy_local.sh [bench-deployment.json]
+
+OUTPUT=${1:-bench-deployment.json}
+RPC_URL=${RPC_URL:-http://127.0.0.1:8545}
+# anvil's first default account
+PRIVATE_KEY=${PRIVATE_KEY:-0xac0974bec39a17e36ba4a6b4d238ff944bacb478cbed5efcae784d7bf4f2ff80}
+
+if ! cast chain-id --rpc-url "$RPC_URL" > /dev/null 2>&1; then
+  echo "Error: no node at $RPC_URL (start one with: anvil)"
+  exit 1
+fi
+
+echo "Deploying to $RPC_URL"
+
+LOG=$(forge script script/DeployLocal.s.sol:DeployLocalScript \
+  --rpc-url "$RPC_URL" \
+  --broadcast \
+  --private-key "$PRIVATE_KEY")
+
+address_of() {
+  echo "$LOG" | grep "Deployed $1 at address:" | awk '{print $NF}'
+}
+
+cat > "$OUTPUT" <<JSON
+{
+  "chain_id": $(cast chain-id --rpc-url "$RPC_URL"),
+  "rpc_url": "$RPC_URL",
+  "schema_registry": "$(address_of SchemaRegistry)",
+  "eas": "$(address_of EAS)",
+  "entity_resolver": "$(address_of EntityResolver)",
+  "votes_resolver": "$(address_of VotesResolver)"
+}
+JSON
+
+echo "Wrote $OUTPUT"
+cat "$OUTPUT"
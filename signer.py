@@ -0,0 +1,115 @@
+"""
+In-process transaction signing from a Foundry keystore.
+
+The keystore is decrypted once (scrypt is deliberately slow) and the key is
+kept in memory for the lifetime of the process, so a session can sign any
+number of transactions without re-running the KDF or prompting again.
+"""
+
+import json
+import os
+from typing import Optional, Tuple
+
+import click
+from eth_account import Account
+
+from metrics import count, span
+from rpc_client import RpcClient
+
+
+FOUNDRY_KEYSTORE_DIR = os.path.expanduser("~/.foundry/keystores")
+
+
+def keystore_path(account: str) -> str:
+    """Resolve a Foundry account name (or explicit path) to its keystore file."""
+    if os.path.isfile(account):
+        return account
+    return os.path.join(FOUNDRY_KEYSTORE_DIR, account)
+
+
+class Signer:
+    """An unlocked account that signs and broadcasts EIP-1559 transactions."""
+
+    def __init__(self, account):
+        self._account = account
+        self.address = account.address
+
+    @classmethod
+    def from_keystore(cls, account: str, password: Optional[str] = None) -> "Signer":
+        """
+        Decrypt a Foundry keystore. The password comes from PASSWORD, then the
+        ETH_PASSWORD environment variable (as with cast), then an interactive prompt.
+        """
+        path = keystore_path(account)
+        with open(path) as f:
+            keyfile = json.load(f)
+
+        if password is None:
+            password = os.getenv("ETH_PASSWORD")
+        if password is None:
+            password = click.prompt(f"Password for keystore '{account}'", hide_input=True, err=True)
+
+        with span("unlock"):
+            return cls(Account.from_key(Account.decrypt(keyfile, password)))
+
+    @property
+    def private_key(self) -> bytes:
+        """Raw key, for handing to in-process signing workers (e.g. offchain bulk signing)."""
+        return bytes(self._account.key)
+
+    def sign_transaction(self, tx: dict) -> bytes:
+        with span("sign"):
+            signed = self._account.sign_transaction(tx)
+        return bytes(getattr(signed, "raw_transaction", None) or signed.rawTransaction)
+
+    def build_transaction(self, rpc: RpcClient, chain_id: int, to: str, data: bytes,
+                          value: int = 0, nonce: Optional[int] = None, fees: Optional[Tuple[int, int]] = None) -> dict:
+        """
+        Fill nonce, fees and gas for a call with a single JSON-RPC batch.
+        Pass NONCE and FEES (max_fee, tip) to skip fetching them, e.g. when
+        assigning nonces locally for a pipeline of transactions.
+        """
+        call = {"from": self.address, "to": to, "data": "0x" + data.hex(), "value": hex(value)}
+        calls = [("eth_estimateGas", [call])]
+        if nonce is None:
+            calls.append(("eth_getTransactionCount", [self.address, "pending"]))
+        if fees is None:
+            calls += [("eth_maxPriorityFeePerGas", []), ("eth_getBlockByNumber", ["latest", False])]
+
+        with span("build_tx"):
+            results = rpc.batch(calls)
+        gas = int(results[0], 16)
+        if nonce is None:
+            nonce = int(results[1], 16)
+        if fees is None:
+            tip = int(results[-2], 16)
+            base_fee = int(results[-1].get("baseFeePerGas", "0x0"), 16)
+            fees = (2 * base_fee + tip, tip)
+
+        max_fee, tip = fees
+        return {
+            "chainId": chain_id,
+            "nonce": nonce,
+            "to": to,
+            "data": data,
+            "value": value,
+            "gas": gas + gas // 5,                  # 20% headroom over the estimate
+            "maxPriorityFeePerGas": tip,
+            "maxFeePerGas": max_fee,
+            "type": 2,
+        }
+
+    def suggest_fees(self, rpc: RpcClient) -> Tuple[int, int]:
+        """Current (maxFeePerGas, maxPriorityFeePerGas) suggestion."""
+        tip_hex, block = rpc.batch([("eth_maxPriorityFeePerGas", []), ("eth_getBlockByNumber", ["latest", False])])
+        tip = int(tip_hex, 16)
+        return 2 * int(block.get("baseFeePerGas", "0x0"), 16) + tip, tip
+
+    def send_transaction(self, rpc: RpcClient, chain_id: int, to: str, data: bytes, value: int = 0) -> str:
+        """Sign and broadcast a call; returns the transaction hash."""
+        tx = self.build_transaction(rpc, chain_id, to, data, value)
+        raw = "0x" + self.sign_transaction(tx).hex()
+        with span("broadcast"):
+            tx_hash = rpc.call("eth_sendRawTransaction", [raw])
+        count("tx_sent")
+        return tx_hash
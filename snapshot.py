@@ -0,0 +1,268 @@
+"""
+Checkpointed snapshots of an AttestationStore, for fast restart.
+
+A snapshot is a directory of .npy files, one per store column and index, plus
+a manifest.json with the schemas and the last block it covers on each chain.
+Loading memory-maps the arrays (copy-on-write), so startup costs little more
+than reading the manifest and the interned address / refUID lists. The index
+then only replays blocks after the snapshot.
+
+Reorg safety: a snapshot taken at block B leaves out everything after
+B - WINDOW on that chain (attestations and revocations), so a restart always
+re-reads the last WINDOW blocks from the node. While indexing, SnapshotSink
+holds records back until they are WINDOW blocks deep, so a reorg the indexer
+rewinds never reaches the store.
+
+Derived state (tallies, the grant index, badge holders) is not stored. It is
+rebuilt from the loaded columns, which takes well under a second per million
+votes, and so can never disagree with the attestations.
+"""
+
+import json
+import os
+import shutil
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from attestation_store import (AttestationStore, Column, Interner, ObjectColumn, SchemaTable,
+                               StringColumn)
+from indexer import Sink
+from metrics import span
+
+
+SNAPSHOT_PREFIX = "snapshot-"
+MANIFEST = "manifest.json"
+
+
+def _json_default(value):
+    if isinstance(value, (bytes, bytearray)):
+        return "0x" + bytes(value).hex()
+    raise TypeError(f"Not JSON serializable: {type(value)}")
+
+
+def _renumber(keep: np.ndarray) -> np.ndarray:
+    """Old position -> position after dropping the rows KEEP rejects."""
+    return np.cumsum(keep, dtype=np.int64) - 1
+
+
+def _kept_index(index, keep: np.ndarray, new: np.ndarray) -> Tuple[np.ndarray, int]:
+    """A KeyIndex's sorted permutation restricted to KEEP, in new row numbers."""
+    order = index.order[keep[index.order]]
+    return new[order].astype(np.uint32), int(keep[:index.sealed].sum())
+
+
+def write_snapshot(store: AttestationStore, directory: str, covered: Dict[int, int], keep: int = 3) -> str:
+    """
+    Write the part of STORE up to COVERED (chain id -> last block to include)
+    as a new snapshot in DIRECTORY, keeping the newest KEEP snapshots.
+    Chains missing from COVERED have no checkpoint yet and are left out
+    entirely; a restart re-indexes them from the start.
+    Returns the new snapshot's path.
+    """
+    cutoffs = {int(chain_id): block for chain_id, block in covered.items()}
+    os.makedirs(directory, exist_ok=True)
+    existing = sorted(d for d in os.listdir(directory) if d.startswith(SNAPSHOT_PREFIX))
+    number = int(existing[-1][len(SNAPSHOT_PREFIX):]) + 1 if existing else 0
+    name = f"{SNAPSHOT_PREFIX}{number:08d}"
+    tmp = os.path.join(directory, "." + name)
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+
+    def save(filename, array):
+        np.save(os.path.join(tmp, filename), array)
+
+    # Which attestations and revocations fall after the cutoffs (or on chains without one)
+    keep_seq = np.ones(len(store), dtype=bool)
+    table_keep, table_undo = {}, {}
+    for table in store.tables.values():
+        chain, block = table.column("chain_id"), table.column("block")
+        keep_rows = np.isin(chain, list(cutoffs))
+        undo = np.zeros(len(table), dtype=bool)
+        for chain_id, cutoff in cutoffs.items():
+            on_chain = chain == chain_id
+            keep_rows &= ~(on_chain & (block > cutoff))
+            undo |= on_chain & (table.column("revoked_block") > cutoff)
+        keep_seq[table.column("seq")[~keep_rows]] = False
+        table_keep[table.name], table_undo[table.name] = keep_rows, undo
+    new_seq = _renumber(keep_seq)
+
+    manifest = {"version": 1, "created": int(time.time()),
+                "checkpoints": {str(chain_id): cutoff for chain_id, cutoff in cutoffs.items()},
+                "schemas": {}, "tables": {}}
+
+    row_of = store.row_of.values().astype(np.int64)
+    table_of = store.table_of.values()
+    for table_id, table in enumerate(store.tables.values()):
+        keep_rows, undo = table_keep[table.name], table_undo[table.name]
+        new_row = _renumber(keep_rows)
+        in_table = table_of == table_id
+        row_of[in_table] = new_row[row_of[in_table]]
+
+        prefix = table.name + "."
+        for column in SchemaTable.STANDARD_COLUMNS:
+            values = table.column(column)
+            if column == "seq":
+                values = new_seq[values].astype(np.uint32)
+            elif column in ("revocation_time", "revoked_block"):
+                values = np.where(undo, 0, values).astype(values.dtype)
+            save(prefix + column + ".npy", values[keep_rows])
+
+        strings, objects = [], []
+        for field, column in table.columns.items():
+            if isinstance(column, StringColumn):
+                offsets = column.offsets.values()
+                lengths = np.diff(offsets).astype(np.int64)
+                buffer = np.frombuffer(bytes(column.buffer), dtype=np.uint8)
+                save(prefix + field + ".buffer.npy", buffer[np.repeat(keep_rows, lengths)])
+                save(prefix + field + ".offsets.npy",
+                     np.concatenate([[0], np.cumsum(lengths[keep_rows])]).astype(np.uint64))
+                strings.append(field)
+            elif isinstance(column, ObjectColumn):
+                with open(os.path.join(tmp, prefix + field + ".json"), "w") as f:
+                    json.dump([v for v, k in zip(column.data, keep_rows) if k], f, default=_json_default)
+                objects.append(field)
+            else:
+                save(prefix + field + ".npy", column.values()[keep_rows])
+
+        for index in ("by_ref", "by_recipient", "by_attester"):
+            order, sealed = _kept_index(getattr(table, index), keep_rows, new_row)
+            save(prefix + index + ".npy", order)
+            manifest["tables"].setdefault(table.name, {})[index] = sealed
+
+        manifest["schemas"][table.name] = table.schema
+        manifest["tables"][table.name].update(rows=int(keep_rows.sum()), strings=strings, objects=objects)
+
+    save("uids.npy", store.uids.values()[keep_seq])
+    save("table_of.npy", table_of[keep_seq])
+    save("row_of.npy", row_of[keep_seq].astype(np.uint32))
+    order, manifest["by_uid"] = _kept_index(store.by_uid, keep_seq, new_seq)
+    save("by_uid.npy", order)
+    save("addresses.npy", np.array(store.addresses.values, dtype=str))
+    save("refs.npy", np.array(store.refs.values, dtype=str))
+
+    with open(os.path.join(tmp, MANIFEST), "w") as f:
+        json.dump(manifest, f)
+    path = os.path.join(directory, name)
+    os.replace(tmp, path)
+
+    for old in existing[:max(0, len(existing) + 1 - keep)]:
+        shutil.rmtree(os.path.join(directory, old), ignore_errors=True)
+    return path
+
+
+def latest_snapshot(directory: str) -> Optional[str]:
+    """Path of the newest complete snapshot in DIRECTORY, or None."""
+    if not os.path.isdir(directory):
+        return None
+    names = sorted(d for d in os.listdir(directory)
+                   if d.startswith(SNAPSHOT_PREFIX) and os.path.exists(os.path.join(directory, d, MANIFEST)))
+    return os.path.join(directory, names[-1]) if names else None
+
+
+def load_snapshot(path: str, mmap: bool = True) -> Tuple[AttestationStore, Dict[int, int]]:
+    """
+    Load a snapshot written by `write_snapshot`. Returns the store and, per
+    chain, the last block it covers (resume indexing from the next one).
+    """
+    with open(os.path.join(path, MANIFEST)) as f:
+        manifest = json.load(f)
+    mode = "c" if mmap else None
+
+    def load(filename):
+        return np.load(os.path.join(path, filename), mmap_mode=mode)
+
+    store = AttestationStore(manifest["schemas"])
+    store.addresses = Interner(np.load(os.path.join(path, "addresses.npy")).tolist())
+    store.refs = Interner(np.load(os.path.join(path, "refs.npy")).tolist())
+
+    for name, meta in manifest["tables"].items():
+        table = store.tables[name]
+        prefix = name + "."
+        for column in SchemaTable.STANDARD_COLUMNS:
+            setattr(table, column, Column(None, data=load(prefix + column + ".npy")))
+        for field in list(table.columns):
+            if field in meta["strings"]:
+                table.columns[field] = StringColumn(offsets=load(prefix + field + ".offsets.npy"),
+                                                    buffer=load(prefix + field + ".buffer.npy").tobytes())
+            elif field in meta["objects"]:
+                with open(os.path.join(path, prefix + field + ".json")) as f:
+                    table.columns[field] = ObjectColumn(json.load(f))
+            else:
+                table.columns[field] = Column(None, data=load(prefix + field + ".npy"))
+        for index, column in (("by_ref", table.ref), ("by_recipient", table.recipient), ("by_attester", table.attester)):
+            key_index = getattr(table, index)
+            key_index.column = column
+            key_index.order, key_index.sealed = load(prefix + index + ".npy"), meta[index]
+
+    store.uids = Column(None, data=load("uids.npy"))
+    store.table_of = Column(None, data=load("table_of.npy"))
+    store.row_of = Column(None, data=load("row_of.npy"))
+    store.by_uid.column = store.uids
+    store.by_uid.order, store.by_uid.sealed = load("by_uid.npy"), manifest["by_uid"]
+
+    return store, {int(chain_id): block for chain_id, block in manifest["checkpoints"].items()}
+
+
+class SnapshotSink(Sink):
+    """
+    Writes records into STORE and snapshots it to DIRECTORY at most every
+    INTERVAL seconds (checked at indexer checkpoints) and on close. Records
+    of the last WINDOW blocks of each chain are buffered and only reach the
+    store once a checkpoint is WINDOW blocks past them; a rewind drops the
+    buffered ones it covers. COVERED carries over the blocks a loaded
+    snapshot already covers. Safe to share between the per-chain indexer
+    threads.
+    """
+
+    def __init__(self, store: AttestationStore, directory: str, interval: float = 300.0, window: int = 64,
+                 keep: int = 3, covered: Optional[Dict[int, int]] = None):
+        self.store = store
+        self.directory = directory
+        self.interval = interval
+        self.window = window
+        self.keep = keep
+        self.covered: Dict[int, int] = dict(covered or {})
+        self.checkpoints: Dict[int, int] = {}
+        self.tail: Dict[int, List[dict]] = {}       # chain id -> records not yet WINDOW blocks deep
+        self._lock = threading.RLock()
+        self._saved_at = time.monotonic()
+        self._dirty = False
+
+    def write(self, record: dict):
+        with self._lock:
+            self.tail.setdefault(record["chain_id"], []).append(record)
+
+    def checkpoint(self, chain_id: int, block: int):
+        with self._lock:
+            tail = self.tail.get(chain_id, [])
+            final = 0
+            while final < len(tail) and tail[final]["block"] <= block - self.window:
+                final += 1
+            self.store.extend(tail[:final])
+            del tail[:final]
+            self.checkpoints[chain_id] = block
+            self._dirty = True
+            if time.monotonic() - self._saved_at >= self.interval:
+                self.save()
+
+    def rewind(self, chain_id: int, block: int):
+        with self._lock:
+            self.tail[chain_id] = [r for r in self.tail.get(chain_id, []) if r["block"] <= block]
+
+    def save(self) -> str:
+        with self._lock:
+            covered = dict(self.covered)
+            for chain_id, block in self.checkpoints.items():
+                covered[chain_id] = max(covered.get(chain_id, 0), block - self.window)
+            with span("snapshot_save"):
+                path = write_snapshot(self.store, self.directory, covered, self.keep)
+            self._saved_at = time.monotonic()
+            self._dirty = False
+            return path
+
+    def close(self):
+        if self._dirty:
+            self.save()
@@ -0,0 +1,351 @@
+"""
+Incremental tally of SIMPLE_VOTE / DELEGATED_SIMPLE_VOTE attestations.
+
+Counts live in one NumPy array with a row per proposal and a column per
+choice (Against, Abstain, For), plus one counting advanced ballots. Applying a vote or a DELETE retraction is a
+single array update, so results can be read on every request without
+rescanning the votes. Records are the decoded dicts produced by `indexer`.
+
+Vote validity mirrors VotesResolver: the voter is the attester, each voter
+counts once per proposal (the resolver's `_proposalVotes`, shared by every
+vote schema), and a vote only counts between the proposal's `startts` and
+`endts`. A retracted vote stays in `_proposalVotes`, as it does onchain.
+Membership checks (e.g. badge holders at `startts`) plug in via ELIGIBLE,
+and ADVANCED_VOTE ballots that pass these rules go to an optional
+`advanced_tally.AdvancedVoteTally`.
+
+`from_store` loads a tally straight from an `attestation_store.AttestationStore`
+with array operations over the vote columns; it keeps only a sorted key
+array and a per-attestation int8 instead of a set and tuple per vote.
+"""
+
+from typing import Callable, Collection, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from advanced_tally import AdvancedVoteTally
+
+
+AGAINST, ABSTAIN, FOR = 0, 1, 2
+
+# int8 choice -> column
+CHOICES = {-1: AGAINST, 0: ABSTAIN, 1: FOR}
+
+# Column counting ADVANCED_VOTE ballots; the ballots themselves are held by the AdvancedVoteTally
+ADVANCED = 3
+
+SIMPLE_VOTE_SCHEMAS = ("SIMPLE_VOTE", "DELEGATED_SIMPLE_VOTE")
+
+# Every vote schema resolves through the same VotesResolver, and so the same _proposalVotes
+RESOLVER_VOTE_SCHEMAS = SIMPLE_VOTE_SCHEMAS + ("ADVANCED_VOTE", "DELEGATED_ADVANCED_VOTE")
+
+ZERO_UID = "0x" + "00" * 32
+
+
+class Proposal:
+    __slots__ = ("row", "dao", "start", "end", "type_uid")
+
+    def __init__(self, row: int, dao: str, start: int, end: int, type_uid: Optional[str]):
+        self.row = row
+        self.dao = dao
+        self.start = start
+        self.end = end
+        self.type_uid = type_uid
+
+
+class SimpleVoteTally:
+    """
+    Per-proposal For / Against / Abstain counts, updated one record at a time.
+
+    AUTHORIZE_DELETE(delete_record) decides whether a DELETE issued by someone
+    other than the voter retracts a vote. Without it only voters can retract
+    their own votes.
+
+    ELIGIBLE(proposal) returns the addresses allowed to vote on a proposal
+    (e.g. `BadgeIndex.eligible(badge_ids, proposal.start)`), or None for
+    everyone. It is asked once per proposal. Ineligible votes still use up
+    the voter's vote, as they do onchain.
+
+    ADVANCED (an AdvancedVoteTally) receives every counted ADVANCED_VOTE /
+    DELEGATED_ADVANCED_VOTE ballot and its retractions; the ballots it
+    accepts are counted in the ADVANCED column, so they count towards quorum.
+    """
+
+    def __init__(self, authorize_delete: Optional[Callable[[dict], bool]] = None, capacity: int = 1024,
+                 eligible: Optional[Callable[[Proposal], Optional[Collection[str]]]] = None,
+                 advanced: Optional[AdvancedVoteTally] = None):
+        self.authorize_delete = authorize_delete
+        self.eligible = eligible
+        self.advanced = advanced
+        self._eligible: Dict[str, Optional[Collection[str]]] = {}     # proposal uid -> ELIGIBLE answer
+        self.counts = np.zeros((capacity, 4), dtype=np.int64)      # AGAINST, ABSTAIN, FOR, ADVANCED
+        self.proposals: Dict[str, Proposal] = {}
+        self.proposal_types: Dict[str, tuple] = {}       # uid -> (quorum, approval_threshold)
+        self._voted: Dict[str, set] = {}                 # proposal uid -> attesters
+        self._votes: Dict[str, tuple] = {}               # vote uid -> (row, column, attester)
+
+        # Votes loaded by from_store: (ref id << 32 | attester id) keys, and counted column by store seq
+        self.store = None
+        self._voted_keys = np.zeros(0, dtype=np.uint64)
+        self._counted = np.zeros(0, dtype=np.int8)
+
+    def _add_proposal(self, record: dict) -> Proposal:
+        row = len(self.proposals)
+        if row == len(self.counts):
+            self.counts = np.concatenate([self.counts, np.zeros_like(self.counts)])
+        data = record["data"]
+        type_uid = record["ref_uid"] if record["ref_uid"] != ZERO_UID else None
+        proposal = Proposal(row, record["recipient"], data["startts"], data["endts"], type_uid)
+        self.proposals[record["uid"]] = proposal
+        if self.advanced is not None:
+            self.advanced.configure(record["uid"], data.get("kwargs"))
+        return proposal
+
+    def _vote(self, record: dict) -> Optional[tuple]:
+        proposal = self.proposals.get(record["ref_uid"])
+        if proposal is None or proposal.dao != record["recipient"]:
+            return None
+        if not proposal.start <= record["time"] <= proposal.end:
+            return None
+
+        voted = self._voted.setdefault(record["ref_uid"], set())
+        if record["attester"] in voted or self._stored_voted(record["ref_uid"], record["attester"]):
+            return None
+        voted.add(record["attester"])
+
+        allowed = self._eligible_voters(record["ref_uid"])
+        if allowed is not None and record["attester"] not in allowed:
+            return None
+
+        if record["schema"] not in SIMPLE_VOTE_SCHEMAS:
+            choice = record["data"]["choice"]
+            accepted = self.advanced is not None and self.advanced.add(record["ref_uid"], record["uid"], choice)
+            column = ADVANCED if accepted else None
+        else:
+            column = CHOICES.get(record["data"]["choice"])
+        if column is None:
+            return None
+        self._votes[record["uid"]] = (proposal.row, column, record["attester"])
+        return proposal.row, column, 1
+
+    def _eligible_voters(self, proposal_id: str) -> Optional[Collection[str]]:
+        if self.eligible is None:
+            return None
+        if proposal_id not in self._eligible:
+            self._eligible[proposal_id] = self.eligible(self.proposals[proposal_id])
+        return self._eligible[proposal_id]
+
+    def _stored_voted(self, ref_uid: str, attester: str) -> bool:
+        if not len(self._voted_keys):
+            return False
+        ref, voter = self.store.refs.get(ref_uid), self.store.addresses.get(attester)
+        if ref is None or voter is None:
+            return False
+        key = np.uint64(ref << 32 | voter)
+        i = np.searchsorted(self._voted_keys, key)
+        return i < len(self._voted_keys) and self._voted_keys[i] == key
+
+    def _stored_eligible(self, keys: np.ndarray, refs: np.ndarray) -> np.ndarray:
+        """Mask of (ref id << 32 | attester id) vote KEYS that ELIGIBLE allows."""
+        restricted = np.zeros(len(self.store.refs), dtype=bool)
+        allowed = []
+        for ref in np.unique(refs).tolist():
+            voters = self._eligible_voters(self.store.refs.values[ref])
+            if voters is None:
+                continue
+            restricted[ref] = True
+            ids = [i for i in map(self.store.addresses.get, voters) if i is not None]
+            allowed.append(np.uint64(ref) << np.uint64(32) | np.array(ids, dtype=np.uint64))
+        if not allowed:
+            return np.ones(len(keys), dtype=bool)
+        return ~restricted[refs] | np.isin(keys, np.concatenate(allowed))
+
+    def _stored_vote(self, uid: str) -> Optional[tuple]:
+        """(seq, (row, column, attester)) of a vote counted by from_store."""
+        if self.store is None:
+            return None
+        seq = self.store.seq_of(uid)
+        if seq is None or seq >= len(self._counted) or self._counted[seq] < 0:
+            return None
+        table, row = self.store.find(uid)
+        proposal = self.proposals[self.store.refs.values[table.ref[row]]]
+        return seq, (proposal.row, int(self._counted[seq]), self.store.addresses.values[table.attester[row]])
+
+    def _delete(self, record: dict) -> Optional[tuple]:
+        vote = self._votes.get(record["ref_uid"])
+        stored = None
+        if vote is None:
+            stored = self._stored_vote(record["ref_uid"])
+            if stored is None:
+                return None
+            vote = stored[1]
+        row, column, voter = vote
+        if record["attester"] != voter and not (self.authorize_delete and self.authorize_delete(record)):
+            return None
+        if stored is None:
+            del self._votes[record["ref_uid"]]
+        else:
+            self._counted[stored[0]] = -1
+        if column == ADVANCED:
+            self.advanced.retract(record["ref_uid"])
+        return row, column, -1
+
+    def _update(self, record: dict) -> Optional[tuple]:
+        """Book-keep RECORD; returns the (row, column, delta) count change it causes, if any."""
+        if record.get("event") != "attested" or record.get("data") is None:
+            return None
+
+        schema = record["schema"]
+        data = record["data"]
+        if schema in RESOLVER_VOTE_SCHEMAS:
+            return self._vote(record)
+        if schema == "DELETE":
+            return self._delete(record)
+        if schema == "CREATE_PROPOSAL":
+            self._add_proposal(record)
+        elif schema == "CREATE_PROPOSAL_TYPE":
+            self.proposal_types[record["uid"]] = (data["quorum"], data["approval_threshold"])
+        elif schema == "SET_PROPOSAL_TYPE":
+            proposal = self.proposals.get(data["proposal_id"])
+            if proposal is not None and proposal.dao == record["recipient"]:
+                proposal.type_uid = record["ref_uid"]
+        return None
+
+    def apply(self, record: dict) -> bool:
+        """Apply one record in O(1); returns True if it changed a count."""
+        change = self._update(record)
+        if change is None:
+            return False
+        row, column, delta = change
+        self.counts[row, column] += delta
+        return True
+
+    def extend(self, records: Iterable[dict]) -> int:
+        """Apply many records (in chain order) with one vectorized count update."""
+        changes = [c for c in map(self._update, records) if c is not None]
+        if changes:
+            rows, columns, deltas = np.array(changes, dtype=np.int64).T
+            np.add.at(self.counts, (rows, columns), deltas)
+        return len(changes)
+
+    @classmethod
+    def from_store(cls, store, authorize_delete: Optional[Callable[[dict], bool]] = None,
+                   authorize: Optional[Callable[[dict], bool]] = None,
+                   eligible: Optional[Callable[[Proposal], Optional[Collection[str]]]] = None,
+                   advanced: Optional[AdvancedVoteTally] = None) -> "SimpleVoteTally":
+        """
+        Tally every vote in STORE (an AttestationStore). Proposals and types
+        are applied record by record (skipping those AUTHORIZE rejects), votes
+        in one vectorized pass, then DELETEs. Records applied afterwards must
+        also be written to STORE first.
+        """
+        tally = cls(authorize_delete, capacity=max(1024, len(store.tables["CREATE_PROPOSAL"])), eligible=eligible,
+                    advanced=advanced)
+        tally.store = store
+        for record in store.records(("CREATE_PROPOSAL_TYPE", "CREATE_PROPOSAL", "SET_PROPOSAL_TYPE")):
+            if authorize is None or authorize(record):
+                tally._update(record)
+
+        # Proposal attributes indexed by interned refUID
+        n = len(store.refs)
+        rows, daos = np.full(n, -1, dtype=np.int64), np.full(n, -1, dtype=np.int64)
+        starts, ends = np.zeros(n, dtype=np.uint64), np.zeros(n, dtype=np.uint64)
+        for uid, proposal in tally.proposals.items():
+            ref, dao = store.refs.get(uid), store.addresses.get(proposal.dao)
+            if ref is not None and dao is not None:
+                rows[ref], daos[ref], starts[ref], ends[ref] = proposal.row, dao, proposal.start, proposal.end
+
+        parts = []
+        for name in RESOLVER_VOTE_SCHEMAS:
+            table = store.tables.get(name)
+            if table is None or not len(table):
+                continue
+            if name in SIMPLE_VOTE_SCHEMAS:
+                choice = table.column("choice").astype(np.int64)
+                column = np.where(np.abs(choice) <= 1, choice + 1, -1)      # CHOICES, vectorized
+            else:
+                column = np.full(len(table), ADVANCED, dtype=np.int64)
+            parts.append((table.column("seq"), table.column("ref"), table.column("attester"),
+                          table.column("recipient").astype(np.int64), table.column("time"), column))
+
+        tally._counted = np.full(len(store), -1, dtype=np.int8)
+        if parts:
+            seq, ref, attester, recipient, at, column = (np.concatenate(c) for c in zip(*parts))
+            valid = (rows[ref] >= 0) & (daos[ref] == recipient) & (starts[ref] <= at) & (at <= ends[ref])
+            order = np.argsort(seq[valid], kind="stable")
+            seq, ref, attester, column = (a[valid][order] for a in (seq, ref, attester, column))
+
+            # First vote per (proposal, attester) in chain order wins
+            keys = ref.astype(np.uint64) << np.uint64(32) | attester.astype(np.uint64)
+            tally._voted_keys, first = np.unique(keys, return_index=True)
+            first = first[column[first] >= 0]
+            if eligible is not None:
+                first = first[tally._stored_eligible(keys[first], ref[first])]
+            first = np.sort(first)
+            ballots = first[column[first] == ADVANCED]
+            first = first[column[first] != ADVANCED]
+            tally._counted[seq[first]] = column[first]
+            np.add.at(tally.counts, (rows[ref[first]], column[first]), 1)
+            if advanced is not None:
+                accepted = []
+                for i in ballots.tolist():
+                    table, row = store.at(int(seq[i]))
+                    record = table.record(row)
+                    if advanced.add(record["ref_uid"], record["uid"], record["data"]["choice"]):
+                        accepted.append(i)
+                accepted = np.array(accepted, dtype=np.int64)
+                tally._counted[seq[accepted]] = ADVANCED
+                np.add.at(tally.counts, (rows[ref[accepted]], ADVANCED), 1)
+
+        for record in store.records(("DELETE",)):
+            tally.apply(record)
+        return tally
+
+    def tally(self, proposal_id: str) -> dict:
+        against, abstain, for_, _ = self.counts[self.proposals[proposal_id].row].tolist()
+        return {"for": for_, "against": against, "abstain": abstain}
+
+    def results(self, proposal_ids: Optional[Sequence[str]] = None) -> List[dict]:
+        """
+        Counts and outcome for PROPOSAL_IDS (default: all). Quorum counts every
+        vote, advanced ballots included; approval_threshold is the percentage
+        of For among For + Against. A proposal decided only by advanced
+        ballots passes with quorum and a winner. Proposals without a type have
+        no outcome (`passed` is None).
+        """
+        if proposal_ids is None:
+            proposal_ids = list(self.proposals)
+        rows = np.array([self.proposals[p].row for p in proposal_ids], dtype=np.int64)
+        counts = self.counts[rows]
+        totals = counts.sum(axis=1)
+        decided = counts[:, FOR] + counts[:, AGAINST]
+
+        rules = [self.proposal_types.get(self.proposals[p].type_uid) for p in proposal_ids]
+        quorum = np.array([r[0] if r else 0 for r in rules], dtype=np.int64)
+        threshold = np.array([r[1] if r else 0 for r in rules], dtype=np.int64)
+        quorum_met = totals >= quorum
+        approved = (decided > 0) & (counts[:, FOR] * 100 >= threshold * decided)
+
+        results = []
+        for i, proposal_id in enumerate(proposal_ids):
+            typed = rules[i] is not None
+            advanced = self.advanced.result(proposal_id) if self.advanced is not None else None
+            if decided[i] == 0 and counts[i, ADVANCED]:
+                approved[i] = advanced is not None and advanced["winner"] is not None
+            results.append({
+                "proposal_id": proposal_id,
+                "for": int(counts[i, FOR]),
+                "against": int(counts[i, AGAINST]),
+                "abstain": int(counts[i, ABSTAIN]),
+                "total": int(totals[i]),
+                "quorum": int(quorum[i]) if typed else None,
+                "approval_threshold": int(threshold[i]) if typed else None,
+                "quorum_met": bool(quorum_met[i]) if typed else None,
+                "passed": bool(quorum_met[i] and approved[i]) if typed else None,
+            })
+            if advanced is not None:
+                results[-1]["advanced"] = advanced
+        return results
+
+    def result(self, proposal_id: str) -> dict:
+        return self.results([proposal_id])[0]
@@ -0,0 +1,46 @@
+import pytest
+
+from abi_codec import decode, schema_decoder, schema_encoder
+
+VOTE = "address voter,string choice,string reason"
+CHECK = "string[] passed,string[] failed"
+
+
+def word(value: int) -> bytes:
+    return value.to_bytes(32, "big")
+
+
+def test_roundtrip():
+    data = schema_encoder(VOTE).encode(["0x" + "11" * 20, '{"approval": ["A"]}', "because"])
+    assert dict(schema_decoder(VOTE).view(data))["choice"] == '{"approval": ["A"]}'
+    assert schema_decoder(CHECK).decode(schema_encoder(CHECK).encode([["a", "bb"], []])) == \
+        {"passed": ["a", "bb"], "failed": []}
+
+
+@pytest.mark.parametrize("data", [
+    # choice offset points past the end
+    word(0x11) + word(10_000) + word(0x60),
+    # choice length runs past the end
+    word(0x11) + word(0x60) + word(0x80) + word(1 << 200) + word(0),
+    # truncated: reason's length word is missing
+    word(0x11) + word(0x60) + word(0x80) + word(0),
+])
+def test_out_of_range_offsets_and_lengths_are_rejected(data):
+    with pytest.raises(ValueError):
+        schema_decoder(VOTE).view(data)
+    with pytest.raises(ValueError):
+        schema_decoder(VOTE).decode(data)
+
+
+def test_huge_array_length_is_rejected_before_looping():
+    data = word(0x40) + word(0x60) + word(1 << 250) + word(0)
+    with pytest.raises(ValueError):
+        schema_decoder(CHECK).view(data)
+    with pytest.raises(ValueError):
+        decode(["string[]", "string[]"], data)
+
+
+def test_array_element_offset_out_of_range():
+    data = word(0x40) + word(0x80) + word(1) + word(1 << 20) + word(0)
+    with pytest.raises(ValueError):
+        schema_decoder(CHECK).view(data)
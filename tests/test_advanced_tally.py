@@ -0,0 +1,39 @@
+import json
+
+import eth_account  # noqa: F401  (raises the recursion limit, as it does in the CLI)
+import pytest
+
+from advanced_tally import AdvancedVoteTally, BallotError, ProposalBallots
+
+PROPOSAL = "0x" + "11" * 32
+
+
+@pytest.mark.parametrize("choice", [
+    '{"weights": {"A": Infinity, "B": 1}}',
+    '{"weights": {"A": NaN}}',
+    '{"weights": {"A": -Infinity}}',
+    '{"weights": {"A": %d}}' % 10 ** 300,
+    '{"weights": {"A": 1e308, "B": 1e308}}',
+    '[' * 100_000 + ']' * 100_000,
+])
+def test_malformed_weights_are_rejected(choice):
+    with pytest.raises(BallotError):
+        ProposalBallots().add(choice)
+
+
+def test_malformed_ballot_is_quarantined_not_fatal():
+    tally = AdvancedVoteTally()
+    assert tally.add(PROPOSAL, "0x01", '{"weights": {"A": 3, "B": 1}}')
+    assert not tally.add(PROPOSAL, "0x02", '{"weights": {"A": Infinity, "B": 1}}')
+    assert not tally.add(PROPOSAL, "0x03", '{"weights": {"A": %d}}' % 10 ** 300)
+
+    result = tally.result(PROPOSAL)
+    assert result["quarantined"] == 2
+    # Still valid JSON: no NaN from the rejected ballots
+    json.loads(json.dumps(result, allow_nan=False))
+
+
+def test_deeply_nested_kwargs_are_ignored():
+    tally = AdvancedVoteTally()
+    tally.configure(PROPOSAL, '{"a": ' + '[' * 100_000 + ']' * 100_000 + '}')
+    assert PROPOSAL not in tally.ballots
@@ -0,0 +1,35 @@
+from click.testing import CliRunner
+
+import eas_cli
+
+ENV = {"CHAIN_ID": "11155111", "RPC_URL": "http://127.0.0.1:1", "FORGE_ACCOUNT": "test",
+       "DAO_ID": "0x" + "da" * 20}
+
+
+def run(tmp_path, name: str, content: str):
+    path = tmp_path / name
+    path.write_text(content)
+    return CliRunner().invoke(eas_cli.cli, ["attest-batch", str(path)], env=ENV)
+
+
+def test_malformed_jsonl_rows_are_reported_per_row(tmp_path):
+    result = run(tmp_path, "rows.jsonl", '{"attestation_command": "SIMPLE_VOTE", "args": [1, ""]\n'
+                                         '[1, 2]\n'
+                                         '{"attestation_command": "SIMPLE_VOTE", "args": 1}\n')
+    assert result.exit_code == 1
+    assert "row 0: invalid JSON" in result.output
+    assert "row 1: expected a JSON object" in result.output
+    assert "row 2: args must be a JSON array" in result.output
+
+
+def test_malformed_csv_rows_are_reported_per_row(tmp_path):
+    result = run(tmp_path, "rows.csv", 'attestation_command,args\nSIMPLE_VOTE,"[1, "\n,[]\n')
+    assert result.exit_code == 1
+    assert "row 0: args is not valid JSON" in result.output
+    assert "row 1: no attestation_command column" in result.output
+
+
+def test_csv_without_the_command_column(tmp_path):
+    result = run(tmp_path, "rows.csv", 'command,args\nSIMPLE_VOTE,[]\n')
+    assert result.exit_code == 1
+    assert "row 0: no attestation_command column" in result.output
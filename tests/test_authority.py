@@ -0,0 +1,64 @@
+from authority import CREATE, DELETE, REVOKE, AuthorityIndex
+
+DAO = "0x" + "da" * 20
+ROOT, COUNCIL, DELEGATE = ("0x%040x" % n for n in (1, 2, 3))
+ZERO = "0x" + "00" * 32
+
+
+def uid(n: int) -> str:
+    return "0x%064x" % n
+
+
+def attested(schema: str, n: int, attester: str, at: int, ref_uid: str = ZERO, **data) -> dict:
+    return {"event": "attested", "schema": schema, "uid": uid(n), "ref_uid": ref_uid, "recipient": DAO,
+            "attester": attester, "time": at, "expiration_time": 0, "revocation_time": 0, "data": data}
+
+
+def grant(n: int, attester: str, grantee: str, permission: str, level: int, at: int) -> dict:
+    return attested("GRANT", n, attester, at, verb=grantee, permission=permission, level=level, filter="")
+
+
+def chain() -> AuthorityIndex:
+    """ROOT instantiates the DAO at 100, grants COUNCIL GRANT at 110, COUNCIL grants DELEGATE proposals at 120."""
+    index = AuthorityIndex()
+    for record in (attested("INSTANTIATE", 1, ROOT, 100, name="dao"),
+                   grant(2, ROOT, COUNCIL, "GRANT", CREATE, 110),
+                   grant(3, COUNCIL, DELEGATE, "CREATE_PROPOSAL", CREATE, 120)):
+        index.apply(record)
+    return index
+
+
+def test_grant_chain_confers_authority_from_its_issue_time():
+    index = chain()
+    assert index.level(DAO, ROOT, "ANYTHING", at=100) == CREATE | REVOKE | DELETE
+    assert index.can(DAO, DELEGATE, "CREATE_PROPOSAL", CREATE, at=120)
+    assert not index.can(DAO, DELEGATE, "CREATE_PROPOSAL", CREATE, at=119)
+    assert not index.can(DAO, DELEGATE, "GRANT", CREATE, at=130)
+    assert index.allows(attested("CREATE_PROPOSAL", 4, DELEGATE, 130))
+    assert not index.allows(attested("CREATE_PROPOSAL", 5, COUNCIL, 130))
+
+
+def test_grant_from_an_unauthorized_attester_is_ignored():
+    index = chain()
+    index.apply(grant(4, DELEGATE, COUNCIL, "CREATE_PROPOSAL", CREATE, 130))
+    assert not index.can(DAO, COUNCIL, "CREATE_PROPOSAL", CREATE, at=140)
+
+
+def test_revoking_a_grant_ends_what_it_authorized_afterwards():
+    index = chain()
+    index.apply({"event": "revoked", "schema": "GRANT", "uid": uid(2), "data": {}, "revocation_time": 150})
+    assert index.can(DAO, DELEGATE, "CREATE_PROPOSAL", CREATE, at=149)
+    assert not index.can(DAO, DELEGATE, "CREATE_PROPOSAL", CREATE, at=150)
+
+
+def test_delete_nullifies_a_grant_and_its_subtree_retroactively():
+    index = chain()
+    index.apply(attested("DELETE", 4, ROOT, 200, ref_uid=uid(2), verb="GRANT", schema_id=ZERO))
+    assert not index.can(DAO, COUNCIL, "GRANT", CREATE, at=115)
+    assert not index.can(DAO, DELEGATE, "CREATE_PROPOSAL", CREATE, at=125)
+
+
+def test_delete_needs_the_delete_bit():
+    index = chain()
+    index.apply(attested("DELETE", 4, COUNCIL, 200, ref_uid=uid(3), verb="GRANT", schema_id=ZERO))
+    assert index.can(DAO, DELEGATE, "CREATE_PROPOSAL", CREATE, at=250)
@@ -0,0 +1,80 @@
+import random
+
+from authority import FOREVER
+from badges import BadgeIndex, IntervalTree
+
+DAO = "0x" + "da" * 20
+ISSUER, OTHER, ALICE, BOB = ("0x%040x" % n for n in (1, 2, 3, 4))
+ZERO = "0x" + "00" * 32
+
+
+def uid(n: int) -> str:
+    return "0x%064x" % n
+
+
+def definition(n: int, revocable: bool) -> dict:
+    return {"event": "attested", "schema": "BADGE_DEFINITION", "uid": uid(n), "ref_uid": ZERO, "recipient": DAO,
+            "attester": ISSUER, "time": 0, "data": {"revocable": revocable}}
+
+
+def badge(n: int, of: int, user: str, at: int, expiration: int = 0) -> dict:
+    return {"event": "attested", "schema": "IDENTITY_BADGE", "uid": uid(n), "ref_uid": uid(of), "recipient": DAO,
+            "attester": ISSUER, "time": at, "expiration_time": expiration, "revocation_time": 0,
+            "data": {"user": user}}
+
+
+def test_interval_tree_stab_matches_a_linear_scan():
+    rng = random.Random(7)
+    intervals = []
+    for i in range(300):
+        start = rng.randrange(1000)
+        intervals.append((start, start + rng.randrange(1, 200), i))
+    tree = IntervalTree(intervals)
+    for at in range(0, 1300, 7):
+        assert sorted(tree.stab(at)) == [i for start, end, i in intervals if start <= at < end]
+
+
+def test_holdings_end_at_expiration_and_revocation_only_if_revocable():
+    index = BadgeIndex()
+    index.extend([definition(1, revocable=True), definition(2, revocable=False),
+                  badge(10, 1, ALICE, 100, expiration=500), badge(11, 2, BOB, 100)])
+    index.extend([{"event": "revoked", "schema": "IDENTITY_BADGE", "uid": uid(n), "revocation_time": 300,
+                   "data": {}} for n in (10, 11)])
+
+    assert index.holders(uid(1), 99) == set()
+    assert index.holders(uid(1), 299) == {ALICE}
+    assert index.holders(uid(1), 300) == set()
+    assert index.holders(uid(2), 10 ** 9) == {BOB}
+    assert index.eligible([uid(1), uid(2)], 200) == {ALICE, BOB}
+    assert index.holds(ALICE, [uid(2), uid(1)], 200) and not index.holds(ALICE, [uid(1)], 300)
+    assert index.next_change(uid(1), 100) == 300
+    assert index.next_change(uid(2), 100) is None
+    assert index.badges[uid(11)].end(revocable=False) == FOREVER
+
+
+def test_overlapping_badges_merge_and_deletes_need_the_issuer_or_authority():
+    index = BadgeIndex(authorize_delete=lambda record: record["attester"] == OTHER)
+    index.extend([definition(1, revocable=False),
+                  badge(10, 1, ALICE, 100, expiration=300), badge(11, 1, ALICE, 250, expiration=400),
+                  badge(12, 1, BOB, 100)])
+    assert index.holds(ALICE, [uid(1)], 350) and not index.holds(ALICE, [uid(1)], 400)
+
+    def delete(n: int, attester: str, target: int) -> dict:
+        return {"event": "attested", "schema": "DELETE", "uid": uid(n), "ref_uid": uid(target), "recipient": DAO,
+                "attester": attester, "time": 500, "data": {}}
+
+    index.apply(delete(20, BOB, 11))            # neither issuer nor authorized
+    assert index.holds(ALICE, [uid(1)], 350)
+    index.apply(delete(21, OTHER, 11))
+    assert not index.holds(ALICE, [uid(1)], 350) and index.holds(ALICE, [uid(1)], 299)
+    index.apply(delete(22, ISSUER, 12))         # nullified from its start, not from the delete
+    assert index.holders(uid(1), 150) == {ALICE}
+
+
+def test_badges_of_another_daos_definition_are_ignored():
+    index = BadgeIndex()
+    index.apply(definition(1, revocable=False))
+    foreign = badge(10, 1, ALICE, 100)
+    foreign["recipient"] = "0x" + "ff" * 20
+    index.apply(foreign)
+    assert index.holders(uid(1), 200) == set() and uid(10) not in index.badges
@@ -0,0 +1,26 @@
+from dao_id_gen import _vanity_range, pack_eth_address, vanity_search
+from dao_registry import DaoIdRegistry
+
+
+def test_vanity_search_matches_the_serial_scan():
+    found = list(vanity_search("syndicate", 11155111, 1, suffix="0", workers=2, stop=4096))
+    serial = _vanity_range(("syndicate", 11155111, 1, 0, 4096, "", "0"))
+    assert found == serial and found
+    for nonce, address in found:
+        assert address == pack_eth_address("syndicate", 11155111, 1, nonce)
+        assert address.endswith("0")
+
+
+def test_registry_reports_collisions_per_chain_and_survives_save(tmp_path):
+    path = str(tmp_path / "ids.npz")
+    registry = DaoIdRegistry(path, capacity=4)
+    taken = [pack_eth_address("dao", 1, 1, nonce) for nonce in range(10)]      # grows past the capacity
+    assert all(registry.add(address, 1) for address in taken)
+    assert not registry.add(taken[0], 1)
+    assert registry.add(taken[0], 10)
+    registry.save()
+
+    loaded = DaoIdRegistry(path)
+    assert loaded.chains(taken[0]) == [1, 10]
+    assert loaded.chains(taken[9]) == [1]
+    assert not loaded.taken(pack_eth_address("dao", 1, 1, 10))
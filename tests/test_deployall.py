@@ -0,0 +1,34 @@
+from click.testing import CliRunner
+
+import eas_cli
+
+ENV = {"CHAIN_ID": "11155111", "RPC_URL": "http://127.0.0.1:1", "FORGE_ACCOUNT": "test",
+       "DAO_ID": "0x" + "da" * 20}
+
+
+class ResumingSender:
+    """A sender that resumed another job's transaction from the journal."""
+
+    def __init__(self):
+        self.keys = ["batch:11155111:abc:0"]
+
+    def is_confirmed(self, key):
+        return False
+
+    def submit(self, key, to, data):
+        self.keys.append(key)
+
+    def wait(self):
+        return {key: {"status": "0x1", "transactionHash": "0x" + "ab" * 32, "blockNumber": "0x10"}
+                for key in self.keys}
+
+
+def test_deployall_reports_only_its_own_transactions(monkeypatch):
+    sender = ResumingSender()
+    monkeypatch.setattr(eas_cli, "get_sender", lambda *args: sender)
+    result = CliRunner().invoke(eas_cli.cli, ["deployall", "11155111"], env=ENV)
+
+    assert result.exit_code == 0, result.output
+    assert "deploy:11155111:" in result.output
+    assert "batch:" not in result.output
+    assert len(sender.keys) == len(eas_cli.SCHEMAS) + 1
@@ -0,0 +1,130 @@
+import pytest
+
+from indexer import Indexer, Sink
+from rpc_client import RpcError
+
+EAS = "0x" + "11" * 20
+SCHEMA_UID = "0x" + "22" * 32
+
+
+class EmptyChain:
+    """A node with no matching logs that fails getLogs from block FAIL_FROM on."""
+
+    def __init__(self, head: int, fail_from: int = None):
+        self.head = head
+        self.fail_from = fail_from
+
+    def block_number(self) -> int:
+        return self.head
+
+    def call(self, method, params):
+        assert method == "eth_getLogs"
+        if self.fail_from is not None and int(params[0]["toBlock"], 16) >= self.fail_from:
+            raise RpcError(-32000, "backend unavailable")
+        return []
+
+
+class Checkpoints(Sink):
+    def __init__(self):
+        self.blocks = []
+
+    def write(self, record):
+        pass
+
+    def checkpoint(self, chain_id, block):
+        self.blocks.append(block)
+
+
+def indexer(rpc) -> Indexer:
+    indexer = Indexer(1, rpc, EAS, {SCHEMA_UID: ("NOTE", "string text")}, workers=1)
+    indexer.scanner.span = indexer.scanner.max_span = 1000
+    return indexer
+
+
+def test_backfill_checkpoints_after_every_window():
+    sink = Checkpoints()
+    assert indexer(EmptyChain(head=4999)).run([sink], 0) == 4999
+    assert sink.blocks == [999, 1999, 2999, 3999, 4999]
+
+
+def test_failed_backfill_keeps_earlier_checkpoints():
+    sink = Checkpoints()
+    with pytest.raises(RpcError):
+        indexer(EmptyChain(head=4999, fail_from=3000)).run([sink], 0)
+    assert sink.blocks[-1] == 2999
+
+
+class ForkingChain(EmptyChain):
+    """An empty chain whose blocks from FORK_AT on get new hashes once it reorgs."""
+
+    def __init__(self, head: int, fork_at: int):
+        super().__init__(head)
+        self.fork_at = fork_at
+        self.forked = False
+
+    def call(self, method, params):
+        if method == "eth_getBlockByNumber":
+            number = int(params[0], 16)
+            fork = "b" if self.forked and number >= self.fork_at else "a"
+            return {"hash": f"0x{fork}{number:x}"} if number <= self.head else None
+        return super().call(method, params)
+
+
+class Rewinds(Checkpoints):
+    def __init__(self, chain, heads):
+        super().__init__()
+        self.chain = chain
+        self.heads = iter(heads)
+        self.rewinds = []
+
+    def checkpoint(self, chain_id, block):
+        super().checkpoint(chain_id, block)
+        # Advance the node once the indexer has caught up with it
+        if block == self.chain.head:
+            head, forked = next(self.heads)
+            self.chain.head, self.chain.forked = head, self.chain.forked or forked
+
+    def rewind(self, chain_id, block):
+        self.rewinds.append(block)
+
+
+def test_follow_rewinds_sinks_after_a_reorg(monkeypatch):
+    monkeypatch.setattr("indexer.time.sleep", lambda _: None)
+    chain = ForkingChain(head=999, fork_at=990)
+    sink = Rewinds(chain, [(1010, False), (1020, True)])
+    idx = indexer(chain)
+    idx.reorg_window = 64
+    with pytest.raises(StopIteration):
+        idx.run([sink], 0, follow=True, poll=0)
+
+    # 1010 was indexed on the old fork: the next poll rewinds and re-reads 947..1020
+    assert sink.rewinds == [1010 - 64]
+    assert sink.blocks == [999, 1010, 1020]
+
+
+class RefusingChain(EmptyChain):
+    """Answers every getLogs call with the same error MESSAGE."""
+
+    def __init__(self, head: int, message: str):
+        super().__init__(head)
+        self.message = message
+        self.calls = 0
+
+    def call(self, method, params):
+        if method == "eth_getLogs":
+            self.calls += 1
+            raise RpcError(-32005, self.message)
+        return super().call(method, params)
+
+
+def test_unrelated_errors_do_not_split_the_range():
+    chain = RefusingChain(head=999, message="rate limit exceeded, retry later")
+    with pytest.raises(RpcError):
+        indexer(chain).run([Checkpoints()], 0)
+    assert chain.calls == 1
+
+
+def test_range_refused_at_the_smallest_span_is_an_rpc_error():
+    chain = RefusingChain(head=3, message="query returned more than 10000 results")
+    with pytest.raises(RpcError, match="more than 10000"):
+        indexer(chain).run([Checkpoints()], 0)
@@ -0,0 +1,47 @@
+from eth_keys import keys
+from eth_utils import to_checksum_address
+
+import offchain
+
+KEY = bytes(range(1, 33))
+EAS = "0x" + "ee" * 20
+SCHEMA = "0x" + "11" * 32
+ZERO = "0x" + "00" * 32
+
+
+def signer_of(signed: dict) -> str:
+    """Recover the address that produced a signed package's signature."""
+    sig = signed["sig"]
+    vrs = (sig["signature"]["v"] - 27, int(sig["signature"]["r"], 16), int(sig["signature"]["s"], 16))
+    digest = offchain.attest_digest(offchain.domain_separator(sig["domain"]), sig["message"])
+    return keys.Signature(vrs=vrs).recover_public_key_from_msg_hash(digest).to_checksum_address()
+
+
+def test_signature_recovers_to_the_signer():
+    dom = offchain.domain(10, EAS, "1.3.0")
+    message = offchain.build_message(SCHEMA, "0x" + "33" * 20, b"\x01\x02", ZERO, True, timestamp=1700000000)
+    signed = offchain.sign(KEY, dom, message)
+
+    assert signed["signer"] == keys.PrivateKey(KEY).public_key.to_checksum_address()
+    assert signer_of(signed) == signed["signer"]
+    assert signed["sig"]["uid"] == offchain.offchain_uid(message)
+    assert signed["sig"]["domain"]["verifyingContract"] == to_checksum_address(EAS)
+
+    # Any change to the message or the domain changes the digest
+    tampered = dict(message, time=message["time"] + 1)
+    assert offchain.attest_digest(offchain.domain_separator(dom), tampered) != \
+        offchain.attest_digest(offchain.domain_separator(dom), message)
+    assert offchain.domain_separator(offchain.domain(1, EAS, "1.3.0")) != offchain.domain_separator(dom)
+
+
+def test_sign_many_keeps_input_order_across_chunks_and_workers():
+    dom = offchain.domain(10, EAS, "1.3.0")
+    recipients = ["0x%040x" % n for n in range(1, 8)]
+    rows = [(SCHEMA, recipient, bytes([n]), ZERO, False) for n, recipient in enumerate(recipients)]
+    signed = list(offchain.sign_many(KEY, dom, iter(rows), workers=2, chunk_size=3))
+
+    assert [s["sig"]["message"]["recipient"].lower() for s in signed] == recipients
+    assert [s["sig"]["message"]["data"] for s in signed] == ["0x%02x" % n for n in range(7)]
+    assert len({s["sig"]["message"]["salt"] for s in signed}) == len(rows)
+    assert all(signer_of(s) == s["signer"] for s in signed)
+    assert all(s["sig"]["uid"] == offchain.offchain_uid(s["sig"]["message"]) for s in signed)
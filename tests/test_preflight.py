@@ -0,0 +1,68 @@
+from eth_utils import keccak
+
+from preflight import RECIPIENT_MISMATCH, VoteCache, VotePreflight, revert_reason, vote_error
+from rpc_client import RpcError
+
+DAO = "0x" + "da" * 20
+EAS = "0x" + "ee" * 20
+ALICE, BOB = "0x" + "aa" * 20, "0x" + "bb" * 20
+KNOWN, COLD = "0x" + "01" * 32, "0x" + "02" * 32
+
+
+def attested(schema: str, uid: str, attester: str, ref_uid: str = "0x" + "00" * 32, **data) -> dict:
+    return {"event": "attested", "schema": schema, "uid": uid, "ref_uid": ref_uid, "recipient": DAO,
+            "attester": attester, "data": data}
+
+
+def cache() -> VoteCache:
+    """KNOWN is open over [100, 200] and BOB has voted on it."""
+    votes = VoteCache()
+    votes.write(attested("CREATE_PROPOSAL", KNOWN, ALICE, startts=100, endts=200))
+    votes.write(attested("SIMPLE_VOTE", "0x" + "03" * 32, BOB.upper().replace("0X", "0x"), KNOWN, vote=1))
+    return votes
+
+
+def test_vote_error_follows_the_resolver_checks():
+    votes = cache()
+    assert vote_error(votes, ALICE, "0x" + "ff" * 20, KNOWN, 150) == RECIPIENT_MISMATCH
+    assert vote_error(votes, ALICE, DAO.upper().replace("0X", "0x"), KNOWN, 150) is None
+    assert vote_error(votes, ALICE, DAO, KNOWN, 99) == "VotingNotStarted"
+    assert vote_error(votes, ALICE, DAO, KNOWN, 201) == "VotingEnded"
+    assert vote_error(votes, BOB, DAO, KNOWN, 150) == "AlreadyVoted"
+
+
+class Simulator:
+    """Answers each simulated eth_call with the revert named in its calldata, if any."""
+
+    def __init__(self):
+        self.calls = []
+
+    def batch(self, calls, raise_errors=True):
+        self.calls.extend(calls)
+        results = []
+        for _, (call, _) in calls:
+            reason = bytes.fromhex(call["data"][2:]).decode()
+            if reason:
+                selector = "0x" + keccak(text=reason + "()")[:4].hex()
+                results.append(RpcError(3, "execution reverted", {"data": selector}))
+            else:
+                results.append("0x")
+        return results
+
+
+def test_check_uses_the_cache_and_simulates_unknown_proposals():
+    rpc = Simulator()
+    preflight = VotePreflight(rpc, EAS, ALICE, cache())
+    reasons = preflight.check([(DAO, KNOWN, b""), (DAO, COLD, b"VotingEnded"), (DAO, COLD, b""),
+                               (DAO, KNOWN, b""), (DAO, "0x" + "04" * 32, b"")], now=150)
+
+    assert reasons == [None, "VotingEnded", None, "AlreadyVoted", None]
+    assert [call["data"] for _, (call, _) in rpc.calls] == ["0x" + b"VotingEnded".hex(), "0x", "0x"]
+    assert all(call["from"] == ALICE and call["to"] == EAS for _, (call, _) in rpc.calls)
+
+
+def test_revert_reason_names_known_selectors_and_falls_back_to_the_message():
+    assert revert_reason(RpcError(3, "execution reverted", "0x" + keccak(text="AlreadyVoted()")[:4].hex())) == \
+        "AlreadyVoted"
+    assert revert_reason(RpcError(3, "execution reverted", {"data": "0xdeadbeef00"})) == "reverted (0xdeadbeef)"
+    assert revert_reason(RpcError(-32000, "insufficient funds")) == "insufficient funds"
@@ -0,0 +1,51 @@
+import asyncio
+from http import HTTPStatus
+
+from http_json import handle_connection
+from query_api import QueryApi
+from workload import Workload
+
+
+def api_with_workload():
+    workload = Workload(daos=2, council=1, delegates=1, proposals=1, voters=5)
+    api = QueryApi(clock=lambda: workload.params["start"] + 100)
+    for record in workload.records():
+        api.state.write(record)
+    return api, next(iter(api.state.by_dao))
+
+
+def test_dao_ids_are_normalized_for_library_callers():
+    api, dao = api_with_workload()
+    assert api.proposals(dao.lower()) == api.proposals(dao) != []
+    assert api.grants(dao.lower()) == api.grants(dao) != []
+    grantee = api.grants(dao)[0]["grantee"]
+    assert api.grants(dao, grantee.lower()) == api.grants(dao, grantee) != []
+
+
+def test_route_errors():
+    api, dao = api_with_workload()
+    status, payload = asyncio.run(api.route("GET", "/daos/nonsense/proposals", {}, b""))
+    assert status == HTTPStatus.BAD_REQUEST
+    status, _, _ = asyncio.run(api.route("GET", f"/daos/{dao.lower()}/proposals", {}, b""))
+    assert status == HTTPStatus.OK
+
+
+def test_unexpected_route_error_is_a_500():
+    api, _ = api_with_workload()
+
+    def broken(dao):
+        raise KeyError(dao)
+    api.proposals_json = broken
+
+    async def request():
+        server = await asyncio.start_server(lambda r, w: handle_connection(r, w, api.route),
+                                            "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(b"GET /daos/0x" + b"11" * 20 + b"/proposals HTTP/1.1\r\nConnection: close\r\n\r\n")
+        status_line = await reader.readline()
+        writer.close()
+        server.close()
+        return status_line
+
+    assert asyncio.run(request()).startswith(b"HTTP/1.1 500")
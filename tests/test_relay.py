@@ -0,0 +1,135 @@
+import asyncio
+from types import SimpleNamespace
+
+from relay import DelegatedVote, RelayJournal, VoteRelay
+
+EAS = "0x" + "ee" * 20
+SCHEMA = "0x" + "11" * 32
+PROPOSAL = "0x" + "22" * 32
+
+
+class FakeRpc:
+    def call(self, method, params=None):
+        assert method == "eth_call"
+        return "0x"
+
+
+class FakeSender:
+    """Records submissions; receipts only appear once a test mines them."""
+
+    poll = 0
+
+    def __init__(self):
+        self.signer = SimpleNamespace(address="0x" + "99" * 20)
+        self.pending = {}
+        self.sent = []
+        self.mined = {}
+
+    def is_confirmed(self, key):
+        return False
+
+    def submit(self, key, to, data):
+        self.pending[key] = data
+        self.sent.append(key)
+
+    def mine(self, key):
+        self.mined[key] = {"status": "0x1", "transactionHash": "0x" + "ab" * 32, "logs": []}
+
+    def poll_receipts(self):
+        mined, self.mined = self.mined, {}
+        for key in mined:
+            self.pending.pop(key)
+        return mined
+
+
+def relay(tmp_path, sender, **kwargs):
+    return VoteRelay(FakeRpc(), sender, EAS, 1, "1.3.0", {SCHEMA: "uint256 v"}, str(tmp_path / "queue.jsonl"),
+                     **kwargs)
+
+
+def queue(relay, voter: int, nonce: int = 0) -> DelegatedVote:
+    vote = DelegatedVote.from_payload({
+        "schema": SCHEMA, "attester": "0x%040x" % voter, "recipient": "0x" + "33" * 20, "refUID": PROPOSAL,
+        "data": "0x", "nonce": nonce, "signature": {"v": 27, "r": "0x1", "s": "0x1"}})
+    if nonce:
+        vote.ref_uid = "0x%064x" % nonce      # another proposal: one vote per (proposal, voter)
+    relay.journal.record([{"event": "queued", "key": vote.key, "vote": vote.to_payload(), "received": 0.0}])
+    relay.pending[vote.key] = vote
+    relay.queue.append(vote.key)
+    return vote
+
+
+async def until(condition):
+    """Let the relay's threads and tasks run until CONDITION holds."""
+    for _ in range(200):
+        if condition():
+            return
+        await asyncio.sleep(0.005)
+    raise AssertionError("timed out")
+
+
+def test_batch_counter_survives_restarts(tmp_path):
+    path = str(tmp_path / "queue.jsonl")
+    journal = RelayJournal(path)
+    journal.record([{"event": "queued", "key": "p:a", "vote": {}, "received": 1.0},
+                    {"event": "batched", "batch": 1, "keys": ["p:a"]},
+                    {"event": "done", "key": "p:a", "status": "confirmed", "uid": "0x01", "tx": "0xaa"},
+                    {"event": "settled", "batch": 1}])
+    journal.record([{"event": "queued", "key": "p:b", "vote": {}, "received": 2.0},
+                    {"event": "batched", "batch": 2, "keys": ["p:b"]},
+                    {"event": "requeued", "batch": 2}])
+
+    # Each open compacts the file down to the current state
+    for _ in range(3):
+        journal = RelayJournal(path)
+        assert journal.last_batch == 2
+        assert journal.batches == {}
+    assert journal.votes["p:a"]["status"] == "confirmed"
+    assert journal.votes["p:b"]["status"] == "queued"
+
+
+def test_batches_are_sent_without_waiting_for_receipts(tmp_path):
+    async def scenario():
+        sender = FakeSender()
+        vote_relay = relay(tmp_path, sender, batch_size=1, max_batches=2)
+        votes = [queue(vote_relay, voter) for voter in (1, 2, 3)]
+
+        assert await vote_relay.flush() and await vote_relay.flush()
+        await until(lambda: len(sender.sent) == 2)
+
+        # The third batch waits for a free slot
+        third = asyncio.create_task(vote_relay.flush())
+        await asyncio.sleep(0.02)
+        assert not third.done()
+        sender.mine("relay:1:1")
+        assert await third
+        sender.mine("relay:1:2")
+        await until(lambda: len(sender.sent) == 3)
+        sender.mine("relay:1:3")
+        await asyncio.gather(*vote_relay._tasks)
+
+        assert sender.sent == ["relay:1:1", "relay:1:2", "relay:1:3"]
+        assert all(vote_relay.journal.votes[vote.key]["status"] == "confirmed" for vote in votes)
+        assert vote_relay.journal.batches == {} and vote_relay.in_flight == 0
+
+    asyncio.run(scenario())
+
+
+def test_voter_waits_for_its_batch_to_settle(tmp_path):
+    async def scenario():
+        sender = FakeSender()
+        vote_relay = relay(tmp_path, sender, batch_size=10)
+        first, second = queue(vote_relay, 1, nonce=0), queue(vote_relay, 1, nonce=1)
+
+        assert await vote_relay.flush()
+        assert not await vote_relay.flush()
+        assert vote_relay.queue == [second.key]
+
+        sender.mine("relay:1:1")
+        await asyncio.gather(*vote_relay._tasks)
+        assert await vote_relay.flush()
+        await until(lambda: len(sender.sent) == 2)
+        assert sender.sent == ["relay:1:1", "relay:1:2"]
+        assert vote_relay.journal.votes[first.key]["status"] == "confirmed"
+
+    asyncio.run(scenario())
@@ -0,0 +1,54 @@
+import json
+
+import pytest
+
+from rpc_client import RpcClient, RpcError, RpcTransportError
+
+
+def client(*answers) -> RpcClient:
+    """A client whose endpoints answer with the given (status, body) pairs, echoing request ids."""
+    rpc = RpcClient([f"http://node{i}" for i in range(len(answers))], max_retries=0, backoff=0)
+    for endpoint, (status, body) in zip(rpc.endpoints, answers):
+        def post(request, status=status, body=body):
+            if callable(body):
+                body = json.dumps(body(json.loads(request)["id"])).encode()
+            return status, body
+        endpoint.post = post
+        endpoint.latency = 0.0
+    return rpc
+
+
+@pytest.mark.parametrize("status, body", [
+    (401, b'{"error": "invalid api key"}'),
+    (403, b"forbidden"),
+    (404, b"<html>Not Found</html>"),
+    (200, b"<html>Bad gateway</html>"),
+    (200, b'{"unexpected": true}'),
+])
+def test_fails_over_on_bad_responses(status, body):
+    rpc = client((status, body), (200, lambda i: {"jsonrpc": "2.0", "id": i, "result": "0x1"}))
+    assert rpc.call("eth_blockNumber") == "0x1"
+    assert rpc.endpoints[0].failures == 1
+
+
+def test_all_bad_endpoints_raise_transport_error():
+    rpc = client((403, b"forbidden"), (200, b"<html></html>"))
+    with pytest.raises(RpcTransportError):
+        rpc.call("eth_blockNumber")
+
+
+def test_jsonrpc_error_on_http_400_is_the_node_answer():
+    revert = lambda i: {"jsonrpc": "2.0", "id": i, "error": {"code": 3, "message": "execution reverted"}}
+    rpc = client((400, revert), (200, lambda i: {"jsonrpc": "2.0", "id": i, "result": "0x1"}))
+    with pytest.raises(RpcError):
+        rpc.call("eth_call", [{}, "latest"])
+
+
+def test_no_backoff_after_the_last_attempt(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr("rpc_client.time.sleep", sleeps.append)
+    rpc = client((403, b"forbidden"))
+    rpc.max_retries, rpc.backoff = 2, 0.5
+    with pytest.raises(RpcTransportError):
+        rpc.call("eth_blockNumber")
+    assert sleeps == [0.5, 1.0]
@@ -0,0 +1,21 @@
+import eth_account  # noqa: F401  (raises the recursion limit, as it does in the CLI and relay)
+import pytest
+
+import safe_json
+
+
+def test_depth_ignores_brackets_in_strings():
+    assert safe_json.depth('{"a": "[[[[", "b": [[1]]}') == 3
+    assert safe_json.depth(r'["a\\", [1]]') == 2
+    assert safe_json.depth('"]]]]"') == 0
+
+
+@pytest.mark.parametrize("text", ["[" * 200_000 + "]" * 200_000, b'{"a":' * 100_000 + b"1" + b"}" * 100_000,
+                                  '["]]]]"' + ", [" * 100 + "]" * 100 + "]"])
+def test_deep_input_is_rejected_not_fatal(text):
+    with pytest.raises(ValueError):
+        safe_json.loads(text)
+
+
+def test_shallow_input_parses():
+    assert safe_json.loads(b'[{"signature": {"v": 27}}]') == [{"signature": {"v": 27}}]
@@ -0,0 +1,35 @@
+from abi_codec import encode
+from rpc_client import RpcError
+from schema_registry import SCHEMA_RECORD_TYPE, SchemaRegistry
+
+REGISTRY = "0x" + "55" * 20
+SCHEMAS = {"NOTE": "string text", "FLAG": "bool flag", "OTHER": "uint8 n"}
+
+
+class Answers:
+    """Answers the getSchema batch with one canned result per schema."""
+
+    def __init__(self, results):
+        self.results = results
+
+    def batch(self, calls, raise_errors=True):
+        assert len(calls) == len(self.results)
+        return self.results
+
+
+def registry() -> SchemaRegistry:
+    return SchemaRegistry(SCHEMAS, dict.fromkeys(SCHEMAS), dict.fromkeys(SCHEMAS, False), lambda chain_id: {})
+
+
+def test_no_contract_is_reported_per_schema_not_as_unreachable():
+    rows = registry().verify_chain(Answers(["0x", "0x", None]), 1, REGISTRY)
+    assert [row["status"] for row in rows] == ["missing"] * 3
+    assert REGISTRY in rows[0]["detail"]
+
+
+def test_each_schema_gets_its_own_status():
+    schemas = registry()
+    note = schemas.get("NOTE", 1)
+    found = "0x" + encode([SCHEMA_RECORD_TYPE], [("0x" + note.uid, note.resolver, False, note.schema)]).hex()
+    rows = schemas.verify_chain(Answers([found, "0x1234", RpcError(-32000, "boom")]), 1, REGISTRY)
+    assert [row["status"] for row in rows] == ["ok", "mismatch", "error"]
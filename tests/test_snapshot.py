@@ -0,0 +1,65 @@
+from attestation_store import AttestationStore
+from snapshot import SnapshotSink, load_snapshot, write_snapshot
+
+SCHEMAS = {"NOTE": "string text"}
+ATTESTER = "0x" + "aa" * 20
+
+
+def record(chain_id: int, block: int, n: int) -> dict:
+    return {"event": "attested", "chain_id": chain_id, "block": block, "uid": "0x%064x" % n, "schema": "NOTE",
+            "recipient": ATTESTER, "attester": ATTESTER, "time": 1000 + n, "expiration_time": 0,
+            "revocation_time": 0, "ref_uid": "0x" + "00" * 32, "data": {"text": f"note {n}"}}
+
+
+def test_write_is_idempotent_on_uid():
+    store = AttestationStore(SCHEMAS)
+    store.extend([record(1, 10, 1), record(1, 11, 2), record(1, 10, 1)])
+    assert len(store) == 2
+    store.by_uid.seal()
+    store.write(record(1, 11, 2))
+    assert len(store) == 2
+    assert store.get("0x%064x" % 2)["data"]["text"] == "note 2"
+
+
+def test_snapshot_leaves_out_chains_without_checkpoint(tmp_path):
+    store = AttestationStore(SCHEMAS)
+    store.extend([record(1, 10, 1), record(1, 20, 2), record(2, 5, 3)])
+    path = write_snapshot(store, str(tmp_path), {1: 15})
+
+    loaded, covered = load_snapshot(path)
+    assert covered == {1: 15}
+    assert len(loaded) == 1
+
+    # A restart replays chain 1 after its checkpoint and chain 2 from the start
+    loaded.extend([record(1, 20, 2), record(2, 5, 3), record(2, 5, 3)])
+    assert len(loaded) == 3
+    assert list(loaded.by_uid.rows(bytes.fromhex("%064x" % 3))) == [2]
+
+
+def test_replaying_covered_blocks_adds_nothing(tmp_path):
+    store = AttestationStore(SCHEMAS)
+    store.extend([record(1, 10, 1), record(1, 11, 2)])
+    loaded, _ = load_snapshot(write_snapshot(store, str(tmp_path), {1: 11}))
+    loaded.extend([record(1, 10, 1), record(1, 11, 2), record(1, 12, 4)])
+    assert len(loaded) == 3
+
+
+def test_sink_keeps_reorged_records_out_of_the_store(tmp_path):
+    store = AttestationStore(SCHEMAS)
+    sink = SnapshotSink(store, str(tmp_path), window=2)
+    sink.write(record(1, 4, 1))
+    sink.write(record(1, 5, 2))
+    sink.checkpoint(1, 5)
+    assert len(store) == 0
+
+    # Block 5 is replaced: the indexer rewinds and re-reads from block 4
+    sink.rewind(1, 3)
+    sink.write(record(1, 4, 1))
+    sink.write(record(1, 5, 3))
+    sink.checkpoint(1, 6)
+    sink.checkpoint(1, 10)
+    assert len(store) == 2
+    assert store.find("0x%064x" % 2) is None
+
+    loaded, covered = load_snapshot(sink.save())
+    assert covered == {1: 8} and len(loaded) == 2
@@ -0,0 +1,104 @@
+import pytest
+
+from advanced_tally import AdvancedVoteTally
+from attestation_store import AttestationStore
+from tally import SimpleVoteTally
+
+DAO = "0x" + "da" * 20
+PROPOSAL = "0x" + "01" * 32
+PROPOSAL_TYPE = "0x" + "02" * 32
+ZERO = "0x" + "00" * 32
+
+# Just the fields the tally reads
+SCHEMAS = {"CREATE_PROPOSAL_TYPE": "uint32 quorum,uint32 approval_threshold",
+           "CREATE_PROPOSAL": "uint64 startts,uint64 endts,string kwargs",
+           "SET_PROPOSAL_TYPE": "bytes32 proposal_id",
+           "SIMPLE_VOTE": "int8 choice",
+           "ADVANCED_VOTE": "string choice",
+           "DELETE": "string verb"}
+
+
+def voter(n: int) -> str:
+    return "0x%040x" % n
+
+
+def attested(schema: str, uid, attester: str, ref_uid: str = ZERO, at: int = 150, **data) -> dict:
+    return {"event": "attested", "schema": schema, "uid": uid if isinstance(uid, str) else "0x%064x" % uid,
+            "ref_uid": ref_uid, "recipient": DAO, "attester": attester, "time": at, "data": data}
+
+
+def proposal(kwargs: str = "", quorum: int = 2) -> list:
+    return [attested("CREATE_PROPOSAL_TYPE", PROPOSAL_TYPE, voter(0), quorum=quorum, approval_threshold=50),
+            attested("CREATE_PROPOSAL", PROPOSAL, voter(0), PROPOSAL_TYPE, startts=100, endts=200, kwargs=kwargs)]
+
+
+def build(records, from_store: bool, **kwargs) -> SimpleVoteTally:
+    if from_store:
+        store = AttestationStore(SCHEMAS)
+        store.extend(records)
+        return SimpleVoteTally.from_store(store, **kwargs)
+    tally = SimpleVoteTally(**kwargs)
+    tally.extend(records)
+    return tally
+
+
+@pytest.mark.parametrize("from_store", [False, True])
+def test_advanced_ballots_count_towards_quorum(from_store):
+    records = proposal('{"voting": "approval", "options": ["A", "B"]}')
+    records += [attested("ADVANCED_VOTE", 0x20 + n, voter(n), PROPOSAL, choice='{"approval": ["A"]}')
+                for n in (1, 2)]
+    tally = build(records, from_store, advanced=AdvancedVoteTally())
+
+    result = tally.result(PROPOSAL)
+    assert result["total"] == 2
+    assert result["quorum_met"] and result["passed"]
+    assert result["advanced"]["winner"] == "A"
+
+    # Retracting one ballot drops the proposal below quorum
+    delete = attested("DELETE", 0x30, voter(1), "0x%064x" % 0x21, verb="")
+    if from_store:
+        tally.store.write(delete)
+    tally.apply(delete)
+    result = tally.result(PROPOSAL)
+    assert result["total"] == 1
+    assert not result["quorum_met"] and not result["passed"]
+
+
+def simple_votes() -> list:
+    records = proposal()
+    records += [attested("SIMPLE_VOTE", 0x20 + n, voter(n), PROPOSAL, choice=choice)
+                for n, choice in enumerate([1, 1, -1, 0], start=1)]
+    records += [attested("SIMPLE_VOTE", 0x30, voter(1), PROPOSAL, choice=-1),            # second vote: ignored
+                attested("SIMPLE_VOTE", 0x31, voter(9), PROPOSAL, at=201, choice=-1),    # after endts
+                attested("SIMPLE_VOTE", 0x32, voter(8), PROPOSAL, choice=5)]             # not a choice
+    return records
+
+
+@pytest.mark.parametrize("from_store", [False, True])
+def test_simple_votes_follow_the_resolver_rules(from_store):
+    tally = build(simple_votes(), from_store)
+    assert tally.tally(PROPOSAL) == {"for": 2, "against": 1, "abstain": 1}
+
+    result = tally.result(PROPOSAL)
+    assert result["total"] == 4 and result["quorum"] == 2 and result["approval_threshold"] == 50
+    assert result["quorum_met"] and result["passed"]
+
+
+@pytest.mark.parametrize("from_store", [False, True])
+def test_only_the_voter_retracts_a_vote_without_authorization(from_store):
+    tally = build(simple_votes(), from_store)
+    for delete in (attested("DELETE", 0x40, voter(3), "0x%064x" % 0x21, verb=""),     # someone else's vote
+                   attested("DELETE", 0x41, voter(1), "0x%064x" % 0x21, verb="")):    # the voter's own
+        if from_store:
+            tally.store.write(delete)
+        tally.apply(delete)
+    assert tally.tally(PROPOSAL) == {"for": 1, "against": 1, "abstain": 1}
+
+    # A retracted vote still used up the voter's vote
+    assert not tally.apply(attested("SIMPLE_VOTE", 0x42, voter(1), PROPOSAL, choice=1))
+
+
+def test_untyped_proposal_has_no_outcome():
+    tally = build([dict(proposal()[1], ref_uid=ZERO)], False)
+    result = tally.result(PROPOSAL)
+    assert result["quorum_met"] is None and result["passed"] is None
@@ -0,0 +1,169 @@
+from eth_account import Account
+from eth_account.typed_transactions import TypedTransaction
+from eth_utils import keccak
+from hexbytes import HexBytes
+import pytest
+
+from rpc_client import RpcError
+from signer import Signer
+from tx_sender import PipelinedSender, TxJournal
+
+
+class FakeChain:
+    """Just enough of a node for PipelinedSender: nonces, gas estimates and receipts."""
+
+    def __init__(self, nonce: int = 5):
+        self.nonce = nonce
+        self.fail_estimate = False
+        self.revert = set()         # nonces whose transaction reverts
+        self.sent = []
+        self.receipts = {}
+
+    def call(self, method, params=None):
+        return self.batch([(method, params or [])])[0]
+
+    def batch(self, calls, raise_errors=True):
+        results = []
+        for method, params in calls:
+            try:
+                results.append(self._handle(method, params))
+            except RpcError as e:
+                if raise_errors:
+                    raise
+                results.append(e)
+        return results
+
+    def _handle(self, method, params):
+        if method == "eth_estimateGas":
+            if self.fail_estimate:
+                raise RpcError(3, "execution reverted")
+            return hex(50_000)
+        if method == "eth_getTransactionCount":
+            return hex(self.nonce)
+        if method == "eth_maxPriorityFeePerGas":
+            return hex(1)
+        if method == "eth_getBlockByNumber":
+            return {"baseFeePerGas": hex(10)}
+        if method == "eth_sendRawTransaction":
+            raw = HexBytes(params[0])
+            nonce = TypedTransaction.from_bytes(raw).as_dict()["nonce"]
+            if nonce != self.nonce:
+                raise RpcError(-32000, f"nonce too high: expected {self.nonce}, got {nonce}")
+            self.nonce += 1
+            self.sent.append(nonce)
+            tx_hash = "0x" + keccak(raw).hex()
+            self.receipts[tx_hash] = {"transactionHash": tx_hash, "blockNumber": "0x1", "logs": [],
+                                      "status": "0x0" if nonce in self.revert else "0x1"}
+            return tx_hash
+        if method == "eth_getTransactionReceipt":
+            return self.receipts.get(params[0])
+        raise AssertionError(f"unexpected call {method}")
+
+
+@pytest.fixture
+def signer():
+    return Signer(Account.from_key(b"\x01" * 32))
+
+
+def test_failed_gas_estimate_does_not_use_up_a_nonce(signer):
+    chain = FakeChain(nonce=5)
+    sender = PipelinedSender(chain, signer, 1, journal_path=None, poll=0)
+
+    chain.fail_estimate = True
+    with pytest.raises(RpcError):
+        sender.submit("a", signer.address, b"")
+    chain.fail_estimate = False
+    sender.submit("b", signer.address, b"")
+
+    assert chain.sent == [5]
+    assert sender.wait()["b"]["status"] == "0x1"
+
+
+def test_rejected_broadcast_is_not_resumed(signer, tmp_path):
+    journal = str(tmp_path / "journal.jsonl")
+    chain = FakeChain(nonce=5)
+    sender = PipelinedSender(chain, signer, 1, journal_path=journal, poll=0)
+    sender._nonce = 7               # out of sync with the node
+
+    with pytest.raises(RpcError):
+        sender.submit("a", signer.address, b"")
+    assert TxJournal(journal).in_flight(1, signer.address) == []
+
+    sender.submit("a", signer.address, b"")
+    assert chain.sent == [5]
+
+
+def test_sent_is_journaled_before_broadcast(signer, tmp_path):
+    journal = str(tmp_path / "journal.jsonl")
+    chain = FakeChain()
+
+    def crash(method, params=None):
+        assert TxJournal(journal).in_flight(1, signer.address), "broadcast before the journal entry"
+        raise KeyboardInterrupt
+
+    sender = PipelinedSender(chain, signer, 1, journal_path=journal, poll=0)
+    sender.rpc = type("Crashing", (), {"call": staticmethod(lambda m, p=None: crash(m, p) if m == "eth_sendRawTransaction"
+                                                           else chain.call(m, p)),
+                                       "batch": staticmethod(chain.batch)})()
+    with pytest.raises(KeyboardInterrupt):
+        sender.submit("a", signer.address, b"")
+
+    # The rerun rebroadcasts the journaled transaction instead of signing a new one
+    resumed = PipelinedSender(chain, signer, 1, journal_path=journal, poll=0, replace_after=0)
+    assert resumed.submit("a", signer.address, b"") is resumed.pending["a"]
+    assert resumed.wait()["a"]["status"] == "0x1"
+    assert chain.sent == [chain.nonce - 1]
+
+
+def test_reverted_receipt_is_not_confirmed(signer, tmp_path):
+    journal = str(tmp_path / "journal.jsonl")
+    chain = FakeChain(nonce=5)
+    chain.revert.add(5)
+    sender = PipelinedSender(chain, signer, 1, journal_path=journal, poll=0)
+    sender.submit("a", signer.address, b"")
+    assert sender.wait()["a"]["status"] == "0x0"
+    assert not sender.is_confirmed("a")
+
+    rerun = PipelinedSender(chain, signer, 1, journal_path=journal, poll=0)
+    assert not rerun.is_confirmed("a")
+    assert rerun.pending == {}
+    rerun.submit("a", signer.address, b"")
+    assert rerun.wait()["a"]["status"] == "0x1"
+    assert PipelinedSender(chain, signer, 1, journal_path=journal).is_confirmed("a")
+    assert chain.sent == [5, 6]
+
+
+def test_reverted_key_is_resent_in_the_same_run(signer):
+    chain = FakeChain(nonce=5)
+    chain.revert.add(5)
+    sender = PipelinedSender(chain, signer, 1, journal_path=None, poll=0)
+    sender.submit("a", signer.address, b"")
+    assert sender.wait()["a"]["status"] == "0x0"
+    sender.submit("a", signer.address, b"")
+    assert sender.wait()["a"]["status"] == "0x1"
+    assert chain.sent == [5, 6]
+
+
+def test_mined_transactions_are_forgotten_and_fees_refreshed(signer):
+    chain = FakeChain()
+    sender = PipelinedSender(chain, signer, 1, journal_path=None, poll=0, fee_ttl=0)
+    sender.submit("a", signer.address, b"")
+    sender.wait()
+    assert sender.pending == {} and sender.order == []
+
+    chain._handle_block = chain._handle
+    chain._handle = lambda method, params: ({"baseFeePerGas": hex(1000)} if method == "eth_getBlockByNumber"
+                                            else chain._handle_block(method, params))
+    tx = sender.submit("b", signer.address, b"").tx
+    assert tx["maxFeePerGas"] == 2 * 1000 + 1
+
+
+def test_poll_receipts_returns_mined_transactions_without_blocking(signer):
+    chain = FakeChain(nonce=0)
+    sender = PipelinedSender(chain, signer, 1, journal_path=None, poll=0)
+    sender.submit("a", signer.address, b"")
+    sender.submit("b", signer.address, b"")
+
+    assert set(sender.poll_receipts()) == {"a", "b"}
+    assert sender.pending == {} and sender.order == []
+    assert sender.poll_receipts() == {}
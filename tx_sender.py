@@ -0,0 +1,280 @@
+"""
+Pipelined transaction sender with local nonce management.
+
+Transactions are signed with locally assigned nonces and broadcast back to
+back without waiting for receipts, so N transactions land in about one block
+instead of N. Receipts for everything in flight are polled together with one
+JSON-RPC batch per tick; transactions that sit unmined for too long are
+replaced (same nonce) with bumped fees.
+
+Every signed transaction is appended to a small JSONL journal before it is
+broadcast, and every receipt after it is mined. After a crash, re-running the
+same job with the same journal skips work that was already confirmed and
+resumes tracking (and rebroadcasting) what was in flight. Reverted steps are
+not confirmed and are sent again.
+"""
+
+import json
+import os
+import time
+from typing import Dict, List, Optional
+
+from eth_utils import keccak
+
+from metrics import count, span
+from rpc_client import RpcClient, RpcError, RpcTransportError
+from signer import Signer
+
+
+DEFAULT_JOURNAL = ".eas-tx-journal.jsonl"
+
+# Replacement transactions must raise both fee fields by at least 10%
+FEE_BUMP_NUMERATOR = 1125
+FEE_BUMP_DENOMINATOR = 1000
+
+# Fee suggestions are reused for about a block
+FEE_TTL = 12.0
+
+
+class PendingTx:
+    """One nonce slot; HASHES holds every broadcast (original and replacements)."""
+
+    def __init__(self, key: str, tx: dict, raw: str, tx_hash: str):
+        self.key = key
+        self.tx = tx
+        self.raw = raw
+        self.hashes = [tx_hash]
+        self.sent_at = time.monotonic()
+        self.receipt = None
+
+
+class TxJournal:
+    """Append-only JSONL record of sent / mined transactions keyed by job label."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.sent: Dict[str, dict] = {}
+        self.confirmed: Dict[str, dict] = {}
+        self.reverted: Dict[str, dict] = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                for line in f:
+                    if line.strip():
+                        self._apply(json.loads(line))
+
+    def _apply(self, entry: dict):
+        if entry["event"] == "sent":
+            previous = self.sent.get(entry["key"], {})
+            entry["hashes"] = previous.get("hashes", []) + [entry["hash"]]
+            self.sent[entry["key"]] = entry
+        elif entry["event"] == "confirmed":
+            # Only a successful receipt completes the step; a reverted one is retried
+            self.sent.pop(entry["key"], None)
+            if entry.get("status", 1) == 1:
+                self.confirmed[entry["key"]] = entry
+            else:
+                self.reverted[entry["key"]] = entry
+        elif entry["event"] == "dropped":
+            # Signed but rejected by the node, so its nonce was never used
+            self.sent.pop(entry["key"], None)
+
+    def record(self, entry: dict):
+        self._apply(dict(entry))
+        with open(self.path, "a") as f:
+            f.write(json.dumps(entry) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def in_flight(self, chain_id: int, sender: str) -> List[dict]:
+        return [e for k, e in self.sent.items()
+                if k not in self.confirmed and e["chain_id"] == chain_id and e["from"] == sender]
+
+
+class PipelinedSender:
+    """Broadcast many transactions from one signer without waiting between them."""
+
+    def __init__(self, rpc: RpcClient, signer: Signer, chain_id: int, journal_path: Optional[str] = DEFAULT_JOURNAL,
+                 replace_after: float = 90.0, timeout: float = 900.0, poll: float = 1.0, fee_ttl: float = FEE_TTL):
+        self.rpc = rpc
+        self.signer = signer
+        self.chain_id = chain_id
+        self.replace_after = replace_after
+        self.timeout = timeout
+        self.poll = poll
+        self.fee_ttl = fee_ttl
+        self.journal = TxJournal(journal_path) if journal_path else None
+        self.pending: Dict[str, PendingTx] = {}
+        self.order: List[str] = []
+        self._nonce = None
+        self._fees = None
+        self._fees_at = 0.0
+        self._resume()
+
+    def _resume(self):
+        """Pick up transactions a previous run broadcast but never saw confirmed."""
+        if not self.journal:
+            return
+        for entry in self.journal.in_flight(self.chain_id, self.signer.address):
+            tx = dict(entry["tx"], data=bytes.fromhex(entry["tx"]["data"][2:]))
+            pending = PendingTx(entry["key"], tx, entry["raw"], entry["hashes"][0])
+            pending.hashes = list(entry["hashes"])
+            pending.sent_at = 0.0       # eligible for rebroadcast / replacement straight away
+            self.pending[entry["key"]] = pending
+            self.order.append(entry["key"])
+
+    def is_confirmed(self, key: str) -> bool:
+        return bool(self.journal and key in self.journal.confirmed)
+
+    def confirmed_receipt(self, key: str) -> Optional[dict]:
+        """Receipt of a step a previous run already confirmed."""
+        if not self.is_confirmed(key):
+            return None
+        return self.rpc.get_receipt(self.journal.confirmed[key]["hash"])
+
+    def _peek_nonce(self) -> int:
+        """Next local nonce; it is only used up once a transaction with it is broadcast."""
+        if self._nonce is None:
+            onchain = int(self.rpc.call("eth_getTransactionCount", [self.signer.address, "pending"]), 16)
+            resumed = [p.tx["nonce"] + 1 for p in self.pending.values()]
+            self._nonce = max([onchain] + resumed)
+        return self._nonce
+
+    def _current_fees(self):
+        if self._fees is None or time.monotonic() - self._fees_at > self.fee_ttl:
+            self._fees = self.signer.suggest_fees(self.rpc)
+            self._fees_at = time.monotonic()
+        return self._fees
+
+    def _broadcast(self, pending: PendingTx, tx: dict):
+        """Journal the signed transaction, then send it (write-ahead, so a crash never loses a hash)."""
+        signed = self.signer.sign_transaction(tx)
+        raw, tx_hash = "0x" + signed.hex(), "0x" + keccak(signed).hex()
+        if self.journal:
+            serializable = dict(tx, data="0x" + tx["data"].hex())
+            self.journal.record({"event": "sent", "key": pending.key, "chain_id": self.chain_id,
+                                 "from": self.signer.address, "hash": tx_hash, "raw": raw, "tx": serializable})
+        pending.tx, pending.raw, pending.sent_at = tx, raw, time.monotonic()
+        if tx_hash not in pending.hashes:
+            pending.hashes.append(tx_hash)
+
+        try:
+            with span("broadcast"):
+                self.rpc.call("eth_sendRawTransaction", [raw])
+            count("tx_sent")
+        except RpcError as e:
+            # The node already has it (e.g. rebroadcast after a restart)
+            if "known" not in e.message.lower() and "already" not in e.message.lower():
+                raise
+
+    def submit(self, key: str, to: str, data: bytes, value: int = 0) -> Optional[PendingTx]:
+        """
+        Sign and broadcast immediately with the next local nonce. KEY names the
+        job step; already-confirmed or already-pending keys are not resent.
+        """
+        if self.is_confirmed(key):
+            return None
+        if key in self.pending:
+            receipt = self.pending[key].receipt
+            if receipt is None or int(receipt["status"], 16) == 1:
+                return self.pending[key]
+            # Reverted: send it again
+            del self.pending[key]
+            self.order.remove(key)
+
+        # Gas estimation may revert: the nonce is only taken once the transaction is broadcast
+        tx = self.signer.build_transaction(self.rpc, self.chain_id, to, data, value,
+                                           nonce=self._peek_nonce(), fees=self._current_fees())
+        pending = PendingTx(key, tx, "", "")
+        pending.hashes = []
+        try:
+            self._broadcast(pending, tx)
+        except RpcError as e:
+            # Nothing was accepted for this nonce, reuse it
+            if self.journal:
+                self.journal.record({"event": "dropped", "key": key})
+            if "nonce" in e.message.lower():
+                self._nonce = None      # out of sync with the node, ask it again
+            raise
+        except RpcTransportError:
+            # The node may have it: keep tracking, wait() rebroadcasts if it does not
+            self._track(pending)
+            raise
+        self._track(pending)
+        return pending
+
+    def _track(self, pending: PendingTx):
+        self._nonce = pending.tx["nonce"] + 1
+        self.pending[pending.key] = pending
+        self.order.append(pending.key)
+
+    def _replace(self, pending: PendingTx):
+        """Rebroadcast the same nonce with both fee fields bumped."""
+        count("tx_replaced")
+        tx = dict(pending.tx)
+        tx["maxFeePerGas"] = tx["maxFeePerGas"] * FEE_BUMP_NUMERATOR // FEE_BUMP_DENOMINATOR + 1
+        tx["maxPriorityFeePerGas"] = tx["maxPriorityFeePerGas"] * FEE_BUMP_NUMERATOR // FEE_BUMP_DENOMINATOR + 1
+        try:
+            self._broadcast(pending, tx)
+        except RpcError as e:
+            # Nonce already used: one of the earlier hashes got mined, keep polling
+            if "nonce" not in e.message.lower():
+                raise
+
+    def wait(self) -> Dict[str, dict]:
+        """
+        Track every in-flight transaction until mined; returns receipts by key.
+        Mined transactions are then forgotten, so a long-lived sender only
+        keeps what is still in flight.
+        """
+        with span("confirm"):
+            return self._wait()
+
+    def poll_receipts(self) -> Dict[str, dict]:
+        """
+        Check everything in flight once, without blocking; returns the
+        receipts mined so far by key and forgets those transactions. Lets a
+        long-lived caller keep submitting while earlier transactions confirm.
+        """
+        self._check_receipts()
+        mined = {key: self.pending.pop(key).receipt for key in self.order if self.pending[key].receipt is not None}
+        self.order = [key for key in self.order if key in self.pending]
+        return mined
+
+    def _check_receipts(self):
+        """One batched receipt poll; replaces transactions unmined for REPLACE_AFTER."""
+        waiting = [p for p in self.pending.values() if p.receipt is None]
+        if not waiting:
+            return
+        calls = [("eth_getTransactionReceipt", [h]) for p in waiting for h in p.hashes]
+        results = iter(self.rpc.batch(calls, raise_errors=False))
+        for pending in waiting:
+            for _ in pending.hashes:
+                receipt = next(results)
+                if receipt and not isinstance(receipt, RpcError) and pending.receipt is None:
+                    pending.receipt = receipt
+
+            if pending.receipt is not None:
+                if int(pending.receipt["status"], 16) != 1:
+                    count("tx_reverted")
+                if self.journal:
+                    self.journal.record({"event": "confirmed", "key": pending.key,
+                                         "hash": pending.receipt["transactionHash"],
+                                         "status": int(pending.receipt["status"], 16)})
+            elif time.monotonic() - pending.sent_at > self.replace_after:
+                self._replace(pending)
+
+    def _wait(self) -> Dict[str, dict]:
+        deadline = time.monotonic() + self.timeout
+        while True:
+            waiting = [p for p in self.pending.values() if p.receipt is None]
+            if not waiting:
+                break
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"{len(waiting)} transactions still unmined")
+            self._check_receipts()
+            if any(p.receipt is None for p in self.pending.values()):
+                time.sleep(self.poll)
+
+        receipts = {key: self.pending.pop(key).receipt for key in self.order}
+        self.order = []
+        return receipts
@@ -0,0 +1,174 @@
+"""
+Synthetic, reproducible DAO workloads for benchmarks.
+
+A Workload is N DAOs, each with a grant tree (root -> council -> delegates),
+a proposal type, proposals and a pool of voters whose votes bunch up in
+the last `burst_window` seconds before `endts`, as they do on real
+proposals. Everything derives from SEED: keys, DAO IDs, choices and times.
+
+Events are attestations in the order they must be mined: an event's `ref`
+(the id of the event whose UID becomes its refUID) always has a smaller
+`at`. `bench.py e2e` replays them against a local chain; `records()` turns
+them into indexer-style records for offline runs of the store and tally.
+"""
+
+import random
+from typing import Dict, Iterator, List, Optional
+
+from eth_account import Account
+from eth_utils import keccak, to_checksum_address
+
+from abi_codec import schema_decoder, schema_encoder
+from authority import CREATE
+from dao_id_gen import pack_eth_address
+from eas_cli import RESOLVER, REVOCABILITY, SCHEMAS
+from indexer import JsonlSink
+from schema_registry import ZERO_ADDRESS, SchemaRegistry
+
+
+ANVIL_CHAIN_ID = 31337
+
+ZERO_UID = "0x" + "00" * 32
+
+# Against, Abstain, For
+CHOICES = (-1, 0, 1)
+CHOICE_WEIGHTS = (3, 1, 6)
+
+
+class Workload:
+    """Deterministic list of attestation events; see the module docstring."""
+
+    def __init__(self, daos: int = 10, council: int = 3, delegates: int = 2, proposals: int = 2, voters: int = 50,
+                 turnout: float = 0.8, burst: float = 0.7, burst_window: int = 60, voting_delay: int = 60,
+                 voting_period: int = 600, start: int = 1_700_000_000, chain_id: int = ANVIL_CHAIN_ID, seed: int = 0):
+        if voting_delay < 4:
+            raise ValueError("voting_delay must leave room for the setup events (at least 4 seconds)")
+        if not 0 < burst_window < voting_period:
+            raise ValueError("burst_window must be between 0 and voting_period")
+        self.params = {"daos": daos, "council": council, "delegates": delegates, "proposals": proposals,
+                       "voters": voters, "turnout": turnout, "burst": burst, "burst_window": burst_window,
+                       "voting_delay": voting_delay, "voting_period": voting_period, "start": start,
+                       "chain_id": chain_id, "seed": seed}
+        self.chain_id = chain_id
+        self.seed = seed
+        self.keys: Dict[str, bytes] = {}            # address -> private key
+        self.events: List[dict] = []
+        self._rng = random.Random(seed)
+        self._generate()
+
+    def __len__(self) -> int:
+        return len(self.events)
+
+    def account(self, role: str) -> str:
+        """Address of the deterministic account ROLE, created on first use."""
+        key = keccak(f"workload:{self.seed}:{role}".encode())
+        address = Account.from_key(key).address
+        self.keys[address] = key
+        return address
+
+    def _event(self, event_id: str, at: int, attester: str, schema: str, dao: str, args: list,
+               ref: Optional[str] = None):
+        self.events.append({"id": event_id, "at": at, "attester": attester, "schema": schema,
+                            "recipient": dao, "ref": ref, "args": args})
+
+    def _generate(self):
+        p, rng = self.params, self._rng
+        start = p["start"]
+        votes = []
+        for d in range(p["daos"]):
+            dao = to_checksum_address(pack_eth_address(f"bench{d}", self.chain_id, 1, self.seed & 0xFFFF))
+            root = self.account(f"{d}:root")
+            self._event(f"{d}:instantiate", start, root, "INSTANTIATE", dao,
+                        [1, f"Bench DAO {d}", p["voting_period"], p["voting_delay"]])
+            self._event(f"{d}:type", start + 1, root, "CREATE_PROPOSAL_TYPE", dao,
+                        [max(1, int(p["voters"] * p["turnout"]) // 2), 50, "standard", "Benchmark proposals", "simple"])
+
+            proposers = []
+            for c in range(p["council"]):
+                member = self.account(f"{d}:council:{c}")
+                for permission in ("GRANT", "CREATE_PROPOSAL"):
+                    self._event(f"{d}:grant:{c}:{permission}", start + 1, root, "GRANT", dao,
+                                [member, permission, CREATE, ""])
+                for g in range(p["delegates"]):
+                    delegate = self.account(f"{d}:delegate:{c}:{g}")
+                    self._event(f"{d}:grant:{c}:{g}", start + 2, member, "GRANT", dao,
+                                [delegate, "CREATE_PROPOSAL", CREATE, ""])
+                    proposers.append(delegate)
+            proposers = proposers or [root]
+
+            voters = [self.account(f"{d}:voter:{v}") for v in range(p["voters"])]
+            startts = start + p["voting_delay"]
+            endts = startts + p["voting_period"]
+            for n in range(p["proposals"]):
+                proposal = f"{d}:proposal:{n}"
+                self._event(proposal, start + 3, proposers[n % len(proposers)], "CREATE_PROPOSAL", dao,
+                            [f"Proposal {d}-{n}", "Synthetic benchmark proposal", startts, endts, "bench", "{}"],
+                            ref=f"{d}:type")
+                for v, voter in enumerate(voters):
+                    if rng.random() >= p["turnout"]:
+                        continue
+                    if rng.random() < p["burst"]:
+                        at = rng.randint(endts - p["burst_window"], endts - 1)
+                    else:
+                        at = rng.randint(startts, endts - p["burst_window"] - 1)
+                    choice = rng.choices(CHOICES, CHOICE_WEIGHTS)[0]
+                    votes.append({"id": f"{proposal}:vote:{v}", "at": at, "attester": voter, "schema": "SIMPLE_VOTE",
+                                  "recipient": dao, "ref": proposal, "args": [choice, ""]})
+
+        # Stable: an event still follows everything it refers to
+        self.events += votes
+        self.events.sort(key=lambda event: event["at"])
+
+    def counts(self) -> Dict[str, int]:
+        """Number of events per schema."""
+        counts: Dict[str, int] = {}
+        for event in self.events:
+            counts[event["schema"]] = counts.get(event["schema"], 0) + 1
+        return counts
+
+    def records(self, deployment: Optional[dict] = None, per_block: int = 100) -> Iterator[dict]:
+        """
+        Indexer-style records for every event, as if mined PER_BLOCK to a
+        block. UIDs are synthetic; schema UIDs use DEPLOYMENT's resolvers
+        (zero addresses by default).
+        """
+        deployment = deployment or {"entity_resolver": ZERO_ADDRESS, "votes_resolver": ZERO_ADDRESS}
+        registry = SchemaRegistry(SCHEMAS, RESOLVER, {name: value == "true" for name, value in REVOCABILITY.items()},
+                                  lambda chain_id: deployment)
+        uids = {}
+        for i, event in enumerate(self.events):
+            schema = SCHEMAS[event["schema"]]
+            uid = uids[event["id"]] = "0x" + keccak(f"uid:{self.seed}:{event['id']}".encode()).hex()
+            yield {
+                "chain_id": self.chain_id,
+                "event": "attested",
+                "block": 1 + i // per_block,
+                "tx": "0x" + keccak(f"tx:{self.seed}:{event['id']}".encode()).hex(),
+                "log_index": i % per_block,
+                "uid": uid,
+                "schema": event["schema"],
+                "schema_uid": "0x" + registry.get(event["schema"], self.chain_id).uid,
+                "recipient": event["recipient"],
+                "attester": event["attester"],
+                "dao_id_valid": True,
+                "time": event["at"],
+                "expiration_time": 0,
+                "revocation_time": 0,
+                "ref_uid": uids[event["ref"]] if event["ref"] else ZERO_UID,
+                "revocable": REVOCABILITY[event["schema"]] == "true",
+                "data": schema_decoder(schema).decode(schema_encoder(schema).encode(event["args"])),
+            }
+
+    def write_records(self, path: str, deployment: Optional[dict] = None) -> int:
+        """Write `records()` as JSONL, the format `index` writes; returns the count."""
+        if path != "-":
+            open(path, "w").close()     # JsonlSink appends
+        sink = JsonlSink(path)
+        n = 0
+        try:
+            for record in self.records(deployment):
+                sink.write(record)
+                n += 1
+        finally:
+            sink.close()
+        return n